@@ -0,0 +1,295 @@
+"""内容处理流水线基准：不启动界面，对 benchmarks/corpus 中保存的页面运行各处理阶段
+
+用法:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --iterations 20 --json out/data/bench_pipeline.json
+    python benchmarks/bench_pipeline.py --baseline out/data/bench_pipeline.json
+
+测量的阶段:
+    text / markdown / fit_markdown / html / cleaned_html   各格式的内容处理器
+    extract_pure_text                                        纯文本提取并保存Word/文本
+    save_browsable_page                                      网页克隆（资源从本地HTTP服务下载）
+
+每个阶段输出迭代次数、p50/p95/平均延迟、吞吐量（页/秒、MB/秒）和峰值内存。
+峰值内存在单独的一轮中用 tracemalloc 测量，不影响计时结果。指定 --baseline
+时与之前保存的结果比较，p50 变慢超过阈值的阶段标记为回退。
+"""
+import argparse
+import asyncio
+import functools
+import importlib.util
+import json
+import logging
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_PATH = BENCH_DIR.parent / "test.py"
+CORPUS_DIR = BENCH_DIR / "corpus"
+
+STAGES = ['text', 'markdown', 'fit_markdown', 'html', 'cleaned_html',
+          'extract_pure_text', 'save_browsable_page']
+
+
+def load_app():
+    """以模块方式加载 test.py（不会创建窗口）"""
+    spec = importlib.util.spec_from_file_location("tai_crawler_app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class PlainVar:
+    """代替 tk 变量，只保存一个普通值"""
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class NullWidget:
+    """代替界面控件，所有方法调用都不做任何事"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class NullRoot(NullWidget):
+    """代替 Tk 根窗口，丢弃 after 调度的界面更新"""
+
+
+def make_host(app, base_dir, url):
+    """创建不依赖界面的 CrawlerGUI 实例，只初始化处理流水线用到的属性"""
+
+    class HeadlessHost(app.CrawlerGUI):
+        def __init__(self):
+            self.root = NullRoot()
+            self.progress_frame = NullWidget()
+            self.progress_bar = NullWidget()
+            self.progress_label = NullWidget()
+            self.progress_bus = NullWidget()
+            self.base_dir = Path(base_dir)
+            self.ensure_directories()
+            (self.base_dir / "text").mkdir(parents=True, exist_ok=True)
+            self.saved_files = []
+            self.url_var = PlainVar(url)
+            self.enable_text_extract = PlainVar(True)
+            self.enable_page_clone = PlainVar(True)
+            self.format_options = {key: PlainVar(True) for key in (
+                'preserve_images', 'preserve_links', 'preserve_tables', 'preserve_lists',
+                'preserve_code', 'preserve_headings', 'preserve_emphasis', 'preserve_quotes')}
+            # 与界面中纯文本提取选项的默认值一致
+            self.text_extract_options = {key: PlainVar(value) for key, value in {
+                'remove_ads': True, 'remove_menus': True, 'remove_headers': True,
+                'remove_footers': True, 'remove_comments': True, 'remove_social': True,
+                'keep_main_content': True, 'keep_images': False, 'keep_tables': False,
+                'keep_links': False, 'keep_lists': True, 'keep_formatting': True,
+                'merge_spaces': True, 'smart_paragraphs': True, 'normalize_spaces': True,
+                'fix_punctuation': True, 'remove_empty_lines': True, 'combine_short_lines': True,
+                'save_as_word': True, 'add_toc': True, 'add_page_numbers': True,
+                'add_header_footer': False, 'use_styles': True,
+                'extract_article': True, 'extract_title': True, 'extract_metadata': True,
+                'clean_boilerplate': True, 'detect_language': True,
+                'min_text_length': 20, 'max_title_length': 200, 'paragraph_threshold': 100,
+                'image_min_size': 100, 'max_line_length': 80}.items()}
+            self._last_display = None
+            self._runs = 0
+
+        def get_safe_filename(self, url):
+            # 原实现按秒生成文件名，同一秒内的多次克隆会命中缓存，这里保证每次都不同
+            self._runs += 1
+            return f"{super().get_safe_filename(url)}_{self._runs}"
+
+    return HeadlessHost()
+
+
+class AssetServer:
+    """在本地端口上提供语料中的页面和资源文件，可模拟网络延迟"""
+
+    def __init__(self, directory, latency_ms=0):
+        latency = latency_ms / 1000
+
+        class Handler(SimpleHTTPRequestHandler):
+            def do_GET(self):
+                if latency:
+                    time.sleep(latency)
+                super().do_GET()
+
+            def log_message(self, format, *args):
+                pass
+
+        handler = functools.partial(Handler, directory=str(directory))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_stage(host, stage):
+    """返回执行一个阶段的协程函数: run(html, url) -> 输出"""
+    options = {key: var.get() for key, var in host.format_options.items()}
+    processors = {
+        'text': lambda html: host.process_text_content(html, options),
+        'markdown': lambda html: host.process_markdown_content(html, options, False),
+        'fit_markdown': lambda html: host.process_markdown_content(html, options, True),
+        'html': lambda html: host.process_html_content(html, options, False),
+        'cleaned_html': lambda html: host.process_html_content(html, options, True),
+    }
+    if stage in processors:
+        async def run(html, url):
+            return processors[stage](html)
+    elif stage == 'extract_pure_text':
+        async def run(html, url):
+            host.url_var.set(url)
+            return await host.extract_pure_text(html)
+    else:
+        async def run(html, url):
+            return await host.save_browsable_page(html, url)
+    return run
+
+
+async def bench_stage(host, stage, pages, iterations, warmup):
+    """计时运行一个阶段：每轮依次处理所有页面"""
+    run = make_stage(host, stage)
+    for _ in range(warmup):
+        for url, html in pages:
+            await run(html, url)
+
+    latencies = []
+    failures = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for url, html in pages:
+            t0 = time.perf_counter()
+            output = await run(html, url)
+            latencies.append(time.perf_counter() - t0)
+            if output is None:
+                failures += 1
+    elapsed = time.perf_counter() - started
+
+    # 单独一轮测量峰值内存
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    for url, html in pages:
+        await run(html, url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    input_bytes = sum(len(html.encode('utf-8')) for _, html in pages) * iterations
+    ordered = sorted(latencies)
+    return {
+        'stage': stage,
+        'samples': len(latencies),
+        'failures': failures,
+        'p50_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000,
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'pages_per_s': len(latencies) / elapsed,
+        'mb_per_s': input_bytes / elapsed / 1024 / 1024,
+        'peak_kb': peak / 1024
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """与基线结果比较，返回回退的阶段列表"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r['stage']: r for r in json.load(f)['results']}
+    regressions = []
+    print()
+    print(f"与基线比较 ({baseline_path}):")
+    for result in results:
+        base = baseline.get(result['stage'])
+        if not base:
+            continue
+        if base['failures'] != result['failures']:
+            # 失败的样本会提前返回，耗时不可比
+            print(f"  {result['stage']:<20} 失败次数不同 ({base['failures']} -> {result['failures']})，跳过比较")
+            continue
+        delta = (result['p50_ms'] - base['p50_ms']) / base['p50_ms'] * 100 if base['p50_ms'] else 0
+        memory = (result['peak_kb'] - base['peak_kb']) / base['peak_kb'] * 100 if base['peak_kb'] else 0
+        flag = "  <-- 回退" if delta > threshold else ""
+        print(f"  {result['stage']:<20} p50 {delta:+6.1f}%   峰值内存 {memory:+6.1f}%{flag}")
+        if flag:
+            regressions.append(result['stage'])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="内容处理流水线基准（无界面）")
+    parser.add_argument('--iterations', type=int, default=5, help="每个阶段的计时轮数")
+    parser.add_argument('--warmup', type=int, default=1, help="预热轮数")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help="要测量的阶段")
+    parser.add_argument('--pages', default="*.html", help="语料页面的文件名模式")
+    parser.add_argument('--asset-latency-ms', type=int, default=0, help="本地资源服务器的模拟延迟")
+    parser.add_argument('--json', help="把结果写入JSON文件")
+    parser.add_argument('--baseline', help="与之前保存的JSON结果比较")
+    parser.add_argument('--threshold', type=float, default=10.0, help="判定回退的p50变慢百分比")
+    args = parser.parse_args()
+
+    # 处理阶段内部的日志会影响计时，失败次数在结果中单独统计
+    logging.disable(logging.ERROR)
+    app = load_app()
+
+    page_files = sorted((CORPUS_DIR / "pages").glob(args.pages))
+    if not page_files:
+        sys.exit(f"没有找到语料页面: {CORPUS_DIR / 'pages' / args.pages}")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_pipeline_"))
+    results = []
+    try:
+        with AssetServer(CORPUS_DIR, args.asset_latency_ms) as server:
+            pages = [(f"{server.base_url}/pages/{path.name}", path.read_text(encoding='utf-8'))
+                     for path in page_files]
+            host = make_host(app, work_dir, pages[0][0])
+            total_kb = sum(len(html.encode('utf-8')) for _, html in pages) / 1024
+            print(f"语料: {len(pages)} 个页面, {total_kb:.0f} KB, 资源服务器 {server.base_url}")
+            print()
+            print(f"{'阶段':<20}{'样本':>6}{'失败':>6}{'p50(ms)':>10}{'p95(ms)':>10}"
+                  f"{'平均(ms)':>10}{'页/秒':>9}{'MB/秒':>8}{'峰值(KB)':>10}")
+            for stage in args.stages:
+                result = asyncio.run(bench_stage(host, stage, pages, args.iterations, args.warmup))
+                results.append(result)
+                print(f"{stage:<20}{result['samples']:>6}{result['failures']:>6}"
+                      f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['mean_ms']:>10.2f}"
+                      f"{result['pages_per_s']:>9.1f}{result['mb_per_s']:>8.2f}{result['peak_kb']:>10.0f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        output = Path(args.json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': sys.version.split()[0],
+                'iterations': args.iterations,
+                'pages': [path.name for path in page_files],
+                'results': results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存至: {output}")
+
+    if args.baseline and compare(results, args.baseline, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
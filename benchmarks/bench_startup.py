@@ -0,0 +1,125 @@
+"""启动耗时基准：测量从进程启动到主窗口显示的时间
+
+用法:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --runs 10 --json out/data/bench_startup.json
+
+每次测量都在新的子进程中进行，避免模块缓存影响结果。输出各阶段耗时：
+    import       导入 test.py（含所有顶层依赖）
+    init         CrawlerGUI.__init__ 构建界面
+    first_window 从子进程启动到主窗口完成首次绘制
+    process      子进程总耗时（含解释器启动和退出）
+需要图形环境，在无显示器的Linux上可以用 xvfb-run 运行。
+"""
+import argparse
+import importlib.util
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+APP_PATH = Path(__file__).resolve().parent.parent / "test.py"
+
+
+def count_widgets(widget):
+    """统计控件树中的控件数量"""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+def measure_once():
+    """在当前进程中测量一次启动耗时（子进程模式）"""
+    started = time.perf_counter()
+
+    spec = importlib.util.spec_from_file_location("tai_crawler_app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    imported = time.perf_counter()
+
+    root = module.tk.Tk()
+    app = module.CrawlerGUI(root)
+    initialized = time.perf_counter()
+
+    # 等待主窗口映射并完成首次绘制
+    root.wait_visibility(root)
+    root.update()
+    shown = time.perf_counter()
+
+    result = {
+        'import': imported - started,
+        'init': initialized - imported,
+        'first_window': shown - started,
+        'widgets': count_widgets(root),
+        'modules': len(sys.modules),
+        'heavy_modules': sorted(
+            name for name in ('crawl4ai', 'PIL', 'aiohttp', 'tqdm', 'pydantic', 'llama_cpp')
+            if name in sys.modules)
+    }
+    root.destroy()
+    del app
+    return result
+
+
+def run(runs):
+    """在新子进程中重复测量"""
+    results = []
+    for i in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, __file__, "--child"],
+            cwd=APP_PATH.parent, capture_output=True, text=True)
+        elapsed = time.perf_counter() - started
+        if completed.returncode != 0:
+            raise RuntimeError(f"第 {i + 1} 次测量失败:\n{completed.stderr}")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['process'] = elapsed
+        results.append(result)
+        print(f"第 {i + 1} 次: 首个窗口 {result['first_window'] * 1000:.0f} ms "
+              f"(导入 {result['import'] * 1000:.0f} ms, 构建界面 {result['init'] * 1000:.0f} ms)")
+    return results
+
+
+def summarize(results):
+    """汇总各阶段耗时的中位数和最小值（毫秒）"""
+    summary = {}
+    for key in ('import', 'init', 'first_window', 'process'):
+        values = [r[key] * 1000 for r in results]
+        summary[key] = {'median_ms': statistics.median(values), 'min_ms': min(values)}
+    summary['widgets'] = results[-1]['widgets']
+    summary['modules'] = results[-1]['modules']
+    summary['heavy_modules'] = results[-1]['heavy_modules']
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量爬虫界面的启动耗时")
+    parser.add_argument('--runs', type=int, default=5, help="测量次数")
+    parser.add_argument('--json', help="把结果写入JSON文件")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_once()))
+        return
+
+    results = run(args.runs)
+    summary = summarize(results)
+
+    print()
+    print(f"{'阶段':<14}{'中位数(ms)':>12}{'最小值(ms)':>12}")
+    for key in ('import', 'init', 'first_window', 'process'):
+        print(f"{key:<14}{summary[key]['median_ms']:>12.0f}{summary[key]['min_ms']:>12.0f}")
+    print(f"控件数: {summary['widgets']}, 已导入模块: {summary['modules']}, "
+          f"启动时已加载的重型模块: {', '.join(summary['heavy_modules']) or '无'}")
+
+    if args.json:
+        output = Path(args.json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'runs': results, 'summary': summary}, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存至: {output}")
+
+
+if __name__ == "__main__":
+    main()
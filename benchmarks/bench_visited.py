@@ -0,0 +1,120 @@
+"""已访问URL集合基准：比较字符串 set 与 VisitedSet 的内存占用和吞吐
+
+用法:
+    python benchmarks/bench_visited.py --urls 1000000
+    python benchmarks/bench_visited.py --urls 200000 --exact --json out/data/bench_visited.json
+
+生成指定数量的合成URL（带路径、查询参数和跟踪参数），先用 normalize_url 规范化，
+再分别加入各个集合，输出每个URL平均占用的字节数（tracemalloc 统计）、
+插入和查找的吞吐量。--exact 时额外测量带磁盘精确集合的 VisitedSet。
+"""
+import argparse
+import json
+import logging
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import load_app  # noqa: E402
+
+
+def make_urls(count, seed):
+    """生成合成URL，约一成带跟踪参数，用于同时测量规范化的开销"""
+    rng = random.Random(seed)
+    sections = ["news", "blog", "docs", "products", "forum", "tags"]
+    urls = []
+    for i in range(count):
+        url = f"https://Site{i % 50}.Example.com/{rng.choice(sections)}/{i}/item-{rng.randrange(10 ** 6)}"
+        if rng.random() < 0.3:
+            url += f"?page={rng.randrange(100)}&sort=new"
+        if rng.random() < 0.1:
+            url += ("&" if "?" in url else "?") + "utm_source=feed&utm_medium=rss"
+        urls.append(url)
+    return urls
+
+
+def measure(name, factory, urls, holds_strings=False):
+    """把所有URL加入集合，返回内存和吞吐统计
+
+    字符串 set 引用的是已生成的URL对象，实际使用时这些字符串由集合持有，
+    holds_strings 为真时把字符串本身的大小计入内存。
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    visited = factory()
+    for url in urls:
+        visited.add(url)
+    insert_s = time.perf_counter() - started
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    if holds_strings:
+        memory += sum(sys.getsizeof(url) for url in urls)
+
+    started = time.perf_counter()
+    hits = sum(1 for url in urls[::10] if url in visited)
+    lookup_s = time.perf_counter() - started
+    if hasattr(visited, 'close'):
+        visited.close()
+    return {
+        'set': name,
+        'urls': len(urls),
+        'bytes_per_url': memory / len(urls),
+        'memory_mb': memory / 1024 / 1024,
+        'inserts_per_s': len(urls) / insert_s,
+        'lookups_per_s': len(urls[::10]) / lookup_s,
+        'lookup_hits': hits
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="已访问URL集合的内存和吞吐基准")
+    parser.add_argument('--urls', type=int, default=200000, help="URL数量")
+    parser.add_argument('--seed', type=int, default=1, help="随机数种子")
+    parser.add_argument('--exact', action='store_true', help="同时测量带磁盘精确集合的 VisitedSet")
+    parser.add_argument('--json', help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    app = load_app()
+
+    raw_urls = make_urls(args.urls, args.seed)
+    started = time.perf_counter()
+    urls = [app.normalize_url(url) for url in raw_urls]
+    normalize_s = time.perf_counter() - started
+    del raw_urls
+    print(f"URL: {len(urls)} 个，不同 {len(set(urls))} 个，规范化 {len(urls) / normalize_s:,.0f} 个/秒")
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_visited_"))
+    candidates = [('set', set), ('VisitedSet', app.VisitedSet)]
+    if args.exact:
+        candidates.append(('VisitedSet+exact', lambda: app.VisitedSet(exact_path=work_dir / "visited.sqlite")))
+    results = []
+    try:
+        print()
+        print(f"{'集合':<18}{'字节/URL':>10}{'内存(MB)':>10}{'插入/秒':>12}{'查找/秒':>12}")
+        for name, factory in candidates:
+            result = measure(name, factory, urls, holds_strings=factory is set)
+            results.append(result)
+            print(f"{name:<18}{result['bytes_per_url']:>10.1f}{result['memory_mb']:>10.1f}"
+                  f"{result['inserts_per_s']:>12,.0f}{result['lookups_per_s']:>12,.0f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        output = Path(args.json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'normalize_per_s': len(urls) / normalize_s, 'results': results},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存至: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+function handler0(e) { return e && e.target ? 0 : -0; }
+function handler1(e) { return e && e.target ? 1 : -1; }
+function handler2(e) { return e && e.target ? 2 : -2; }
+function handler3(e) { return e && e.target ? 3 : -3; }
+function handler4(e) { return e && e.target ? 4 : -4; }
+function handler5(e) { return e && e.target ? 5 : -5; }
+function handler6(e) { return e && e.target ? 6 : -6; }
+function handler7(e) { return e && e.target ? 7 : -7; }
+function handler8(e) { return e && e.target ? 8 : -8; }
+function handler9(e) { return e && e.target ? 9 : -9; }
+function handler10(e) { return e && e.target ? 10 : -10; }
+function handler11(e) { return e && e.target ? 11 : -11; }
+function handler12(e) { return e && e.target ? 12 : -12; }
+function handler13(e) { return e && e.target ? 13 : -13; }
+function handler14(e) { return e && e.target ? 14 : -14; }
+function handler15(e) { return e && e.target ? 15 : -15; }
+function handler16(e) { return e && e.target ? 16 : -16; }
+function handler17(e) { return e && e.target ? 17 : -17; }
+function handler18(e) { return e && e.target ? 18 : -18; }
+function handler19(e) { return e && e.target ? 19 : -19; }
+function handler20(e) { return e && e.target ? 20 : -20; }
+function handler21(e) { return e && e.target ? 21 : -21; }
+function handler22(e) { return e && e.target ? 22 : -22; }
+function handler23(e) { return e && e.target ? 23 : -23; }
+function handler24(e) { return e && e.target ? 24 : -24; }
+function handler25(e) { return e && e.target ? 25 : -25; }
+function handler26(e) { return e && e.target ? 26 : -26; }
+function handler27(e) { return e && e.target ? 27 : -27; }
+function handler28(e) { return e && e.target ? 28 : -28; }
+function handler29(e) { return e && e.target ? 29 : -29; }
+function handler30(e) { return e && e.target ? 30 : -30; }
+function handler31(e) { return e && e.target ? 31 : -31; }
+function handler32(e) { return e && e.target ? 32 : -32; }
+function handler33(e) { return e && e.target ? 33 : -33; }
+function handler34(e) { return e && e.target ? 34 : -34; }
+function handler35(e) { return e && e.target ? 35 : -35; }
+function handler36(e) { return e && e.target ? 36 : -36; }
+function handler37(e) { return e && e.target ? 37 : -37; }
+function handler38(e) { return e && e.target ? 38 : -38; }
+function handler39(e) { return e && e.target ? 39 : -39; }
+function handler40(e) { return e && e.target ? 40 : -40; }
+function handler41(e) { return e && e.target ? 41 : -41; }
+function handler42(e) { return e && e.target ? 42 : -42; }
+function handler43(e) { return e && e.target ? 43 : -43; }
+function handler44(e) { return e && e.target ? 44 : -44; }
+function handler45(e) { return e && e.target ? 45 : -45; }
+function handler46(e) { return e && e.target ? 46 : -46; }
+function handler47(e) { return e && e.target ? 47 : -47; }
+function handler48(e) { return e && e.target ? 48 : -48; }
+function handler49(e) { return e && e.target ? 49 : -49; }
+function handler50(e) { return e && e.target ? 50 : -50; }
+function handler51(e) { return e && e.target ? 51 : -51; }
+function handler52(e) { return e && e.target ? 52 : -52; }
+function handler53(e) { return e && e.target ? 53 : -53; }
+function handler54(e) { return e && e.target ? 54 : -54; }
+function handler55(e) { return e && e.target ? 55 : -55; }
+function handler56(e) { return e && e.target ? 56 : -56; }
+function handler57(e) { return e && e.target ? 57 : -57; }
+function handler58(e) { return e && e.target ? 58 : -58; }
+function handler59(e) { return e && e.target ? 59 : -59; }
+function handler60(e) { return e && e.target ? 60 : -60; }
+function handler61(e) { return e && e.target ? 61 : -61; }
+function handler62(e) { return e && e.target ? 62 : -62; }
+function handler63(e) { return e && e.target ? 63 : -63; }
+function handler64(e) { return e && e.target ? 64 : -64; }
+function handler65(e) { return e && e.target ? 65 : -65; }
+function handler66(e) { return e && e.target ? 66 : -66; }
+function handler67(e) { return e && e.target ? 67 : -67; }
+function handler68(e) { return e && e.target ? 68 : -68; }
+function handler69(e) { return e && e.target ? 69 : -69; }
+function handler70(e) { return e && e.target ? 70 : -70; }
+function handler71(e) { return e && e.target ? 71 : -71; }
+function handler72(e) { return e && e.target ? 72 : -72; }
+function handler73(e) { return e && e.target ? 73 : -73; }
+function handler74(e) { return e && e.target ? 74 : -74; }
+function handler75(e) { return e && e.target ? 75 : -75; }
+function handler76(e) { return e && e.target ? 76 : -76; }
+function handler77(e) { return e && e.target ? 77 : -77; }
+function handler78(e) { return e && e.target ? 78 : -78; }
+function handler79(e) { return e && e.target ? 79 : -79; }
+function handler80(e) { return e && e.target ? 80 : -80; }
+function handler81(e) { return e && e.target ? 81 : -81; }
+function handler82(e) { return e && e.target ? 82 : -82; }
+function handler83(e) { return e && e.target ? 83 : -83; }
+function handler84(e) { return e && e.target ? 84 : -84; }
+function handler85(e) { return e && e.target ? 85 : -85; }
+function handler86(e) { return e && e.target ? 86 : -86; }
+function handler87(e) { return e && e.target ? 87 : -87; }
+function handler88(e) { return e && e.target ? 88 : -88; }
+function handler89(e) { return e && e.target ? 89 : -89; }
+function handler90(e) { return e && e.target ? 90 : -90; }
+function handler91(e) { return e && e.target ? 91 : -91; }
+function handler92(e) { return e && e.target ? 92 : -92; }
+function handler93(e) { return e && e.target ? 93 : -93; }
+function handler94(e) { return e && e.target ? 94 : -94; }
+function handler95(e) { return e && e.target ? 95 : -95; }
+function handler96(e) { return e && e.target ? 96 : -96; }
+function handler97(e) { return e && e.target ? 97 : -97; }
+function handler98(e) { return e && e.target ? 98 : -98; }
+function handler99(e) { return e && e.target ? 99 : -99; }
+function handler100(e) { return e && e.target ? 100 : -100; }
+function handler101(e) { return e && e.target ? 101 : -101; }
+function handler102(e) { return e && e.target ? 102 : -102; }
+function handler103(e) { return e && e.target ? 103 : -103; }
+function handler104(e) { return e && e.target ? 104 : -104; }
+function handler105(e) { return e && e.target ? 105 : -105; }
+function handler106(e) { return e && e.target ? 106 : -106; }
+function handler107(e) { return e && e.target ? 107 : -107; }
+function handler108(e) { return e && e.target ? 108 : -108; }
+function handler109(e) { return e && e.target ? 109 : -109; }
+function handler110(e) { return e && e.target ? 110 : -110; }
+function handler111(e) { return e && e.target ? 111 : -111; }
+function handler112(e) { return e && e.target ? 112 : -112; }
+function handler113(e) { return e && e.target ? 113 : -113; }
+function handler114(e) { return e && e.target ? 114 : -114; }
+function handler115(e) { return e && e.target ? 115 : -115; }
+function handler116(e) { return e && e.target ? 116 : -116; }
+function handler117(e) { return e && e.target ? 117 : -117; }
+function handler118(e) { return e && e.target ? 118 : -118; }
+function handler119(e) { return e && e.target ? 119 : -119; }
+function handler120(e) { return e && e.target ? 120 : -120; }
+function handler121(e) { return e && e.target ? 121 : -121; }
+function handler122(e) { return e && e.target ? 122 : -122; }
+function handler123(e) { return e && e.target ? 123 : -123; }
+function handler124(e) { return e && e.target ? 124 : -124; }
+function handler125(e) { return e && e.target ? 125 : -125; }
+function handler126(e) { return e && e.target ? 126 : -126; }
+function handler127(e) { return e && e.target ? 127 : -127; }
+function handler128(e) { return e && e.target ? 128 : -128; }
+function handler129(e) { return e && e.target ? 129 : -129; }
+function handler130(e) { return e && e.target ? 130 : -130; }
+function handler131(e) { return e && e.target ? 131 : -131; }
+function handler132(e) { return e && e.target ? 132 : -132; }
+function handler133(e) { return e && e.target ? 133 : -133; }
+function handler134(e) { return e && e.target ? 134 : -134; }
+function handler135(e) { return e && e.target ? 135 : -135; }
+function handler136(e) { return e && e.target ? 136 : -136; }
+function handler137(e) { return e && e.target ? 137 : -137; }
+function handler138(e) { return e && e.target ? 138 : -138; }
+function handler139(e) { return e && e.target ? 139 : -139; }
+function handler140(e) { return e && e.target ? 140 : -140; }
+function handler141(e) { return e && e.target ? 141 : -141; }
+function handler142(e) { return e && e.target ? 142 : -142; }
+function handler143(e) { return e && e.target ? 143 : -143; }
+function handler144(e) { return e && e.target ? 144 : -144; }
+function handler145(e) { return e && e.target ? 145 : -145; }
+function handler146(e) { return e && e.target ? 146 : -146; }
+function handler147(e) { return e && e.target ? 147 : -147; }
+function handler148(e) { return e && e.target ? 148 : -148; }
+function handler149(e) { return e && e.target ? 149 : -149; }
+function handler150(e) { return e && e.target ? 150 : -150; }
+function handler151(e) { return e && e.target ? 151 : -151; }
+function handler152(e) { return e && e.target ? 152 : -152; }
+function handler153(e) { return e && e.target ? 153 : -153; }
+function handler154(e) { return e && e.target ? 154 : -154; }
+function handler155(e) { return e && e.target ? 155 : -155; }
+function handler156(e) { return e && e.target ? 156 : -156; }
+function handler157(e) { return e && e.target ? 157 : -157; }
+function handler158(e) { return e && e.target ? 158 : -158; }
+function handler159(e) { return e && e.target ? 159 : -159; }
+function handler160(e) { return e && e.target ? 160 : -160; }
+function handler161(e) { return e && e.target ? 161 : -161; }
+function handler162(e) { return e && e.target ? 162 : -162; }
+function handler163(e) { return e && e.target ? 163 : -163; }
+function handler164(e) { return e && e.target ? 164 : -164; }
+function handler165(e) { return e && e.target ? 165 : -165; }
+function handler166(e) { return e && e.target ? 166 : -166; }
+function handler167(e) { return e && e.target ? 167 : -167; }
+function handler168(e) { return e && e.target ? 168 : -168; }
+function handler169(e) { return e && e.target ? 169 : -169; }
+function handler170(e) { return e && e.target ? 170 : -170; }
+function handler171(e) { return e && e.target ? 171 : -171; }
+function handler172(e) { return e && e.target ? 172 : -172; }
+function handler173(e) { return e && e.target ? 173 : -173; }
+function handler174(e) { return e && e.target ? 174 : -174; }
+function handler175(e) { return e && e.target ? 175 : -175; }
+function handler176(e) { return e && e.target ? 176 : -176; }
+function handler177(e) { return e && e.target ? 177 : -177; }
+function handler178(e) { return e && e.target ? 178 : -178; }
+function handler179(e) { return e && e.target ? 179 : -179; }
+function handler180(e) { return e && e.target ? 180 : -180; }
+function handler181(e) { return e && e.target ? 181 : -181; }
+function handler182(e) { return e && e.target ? 182 : -182; }
+function handler183(e) { return e && e.target ? 183 : -183; }
+function handler184(e) { return e && e.target ? 184 : -184; }
+function handler185(e) { return e && e.target ? 185 : -185; }
+function handler186(e) { return e && e.target ? 186 : -186; }
+function handler187(e) { return e && e.target ? 187 : -187; }
+function handler188(e) { return e && e.target ? 188 : -188; }
+function handler189(e) { return e && e.target ? 189 : -189; }
+function handler190(e) { return e && e.target ? 190 : -190; }
+function handler191(e) { return e && e.target ? 191 : -191; }
+function handler192(e) { return e && e.target ? 192 : -192; }
+function handler193(e) { return e && e.target ? 193 : -193; }
+function handler194(e) { return e && e.target ? 194 : -194; }
+function handler195(e) { return e && e.target ? 195 : -195; }
+function handler196(e) { return e && e.target ? 196 : -196; }
+function handler197(e) { return e && e.target ? 197 : -197; }
+function handler198(e) { return e && e.target ? 198 : -198; }
+function handler199(e) { return e && e.target ? 199 : -199; }
+function handler200(e) { return e && e.target ? 200 : -200; }
+function handler201(e) { return e && e.target ? 201 : -201; }
+function handler202(e) { return e && e.target ? 202 : -202; }
+function handler203(e) { return e && e.target ? 203 : -203; }
+function handler204(e) { return e && e.target ? 204 : -204; }
+function handler205(e) { return e && e.target ? 205 : -205; }
+function handler206(e) { return e && e.target ? 206 : -206; }
+function handler207(e) { return e && e.target ? 207 : -207; }
+function handler208(e) { return e && e.target ? 208 : -208; }
+function handler209(e) { return e && e.target ? 209 : -209; }
+function handler210(e) { return e && e.target ? 210 : -210; }
+function handler211(e) { return e && e.target ? 211 : -211; }
+function handler212(e) { return e && e.target ? 212 : -212; }
+function handler213(e) { return e && e.target ? 213 : -213; }
+function handler214(e) { return e && e.target ? 214 : -214; }
+function handler215(e) { return e && e.target ? 215 : -215; }
+function handler216(e) { return e && e.target ? 216 : -216; }
+function handler217(e) { return e && e.target ? 217 : -217; }
+function handler218(e) { return e && e.target ? 218 : -218; }
+function handler219(e) { return e && e.target ? 219 : -219; }
+function handler220(e) { return e && e.target ? 220 : -220; }
+function handler221(e) { return e && e.target ? 221 : -221; }
+function handler222(e) { return e && e.target ? 222 : -222; }
+function handler223(e) { return e && e.target ? 223 : -223; }
+function handler224(e) { return e && e.target ? 224 : -224; }
+function handler225(e) { return e && e.target ? 225 : -225; }
+function handler226(e) { return e && e.target ? 226 : -226; }
+function handler227(e) { return e && e.target ? 227 : -227; }
+function handler228(e) { return e && e.target ? 228 : -228; }
+function handler229(e) { return e && e.target ? 229 : -229; }
+function handler230(e) { return e && e.target ? 230 : -230; }
+function handler231(e) { return e && e.target ? 231 : -231; }
+function handler232(e) { return e && e.target ? 232 : -232; }
+function handler233(e) { return e && e.target ? 233 : -233; }
+function handler234(e) { return e && e.target ? 234 : -234; }
+function handler235(e) { return e && e.target ? 235 : -235; }
+function handler236(e) { return e && e.target ? 236 : -236; }
+function handler237(e) { return e && e.target ? 237 : -237; }
+function handler238(e) { return e && e.target ? 238 : -238; }
+function handler239(e) { return e && e.target ? 239 : -239; }
+function handler240(e) { return e && e.target ? 240 : -240; }
+function handler241(e) { return e && e.target ? 241 : -241; }
+function handler242(e) { return e && e.target ? 242 : -242; }
+function handler243(e) { return e && e.target ? 243 : -243; }
+function handler244(e) { return e && e.target ? 244 : -244; }
+function handler245(e) { return e && e.target ? 245 : -245; }
+function handler246(e) { return e && e.target ? 246 : -246; }
+function handler247(e) { return e && e.target ? 247 : -247; }
+function handler248(e) { return e && e.target ? 248 : -248; }
+function handler249(e) { return e && e.target ? 249 : -249; }
+function handler250(e) { return e && e.target ? 250 : -250; }
+function handler251(e) { return e && e.target ? 251 : -251; }
+function handler252(e) { return e && e.target ? 252 : -252; }
+function handler253(e) { return e && e.target ? 253 : -253; }
+function handler254(e) { return e && e.target ? 254 : -254; }
+function handler255(e) { return e && e.target ? 255 : -255; }
+function handler256(e) { return e && e.target ? 256 : -256; }
+function handler257(e) { return e && e.target ? 257 : -257; }
+function handler258(e) { return e && e.target ? 258 : -258; }
+function handler259(e) { return e && e.target ? 259 : -259; }
+function handler260(e) { return e && e.target ? 260 : -260; }
+function handler261(e) { return e && e.target ? 261 : -261; }
+function handler262(e) { return e && e.target ? 262 : -262; }
+function handler263(e) { return e && e.target ? 263 : -263; }
+function handler264(e) { return e && e.target ? 264 : -264; }
+function handler265(e) { return e && e.target ? 265 : -265; }
+function handler266(e) { return e && e.target ? 266 : -266; }
+function handler267(e) { return e && e.target ? 267 : -267; }
+function handler268(e) { return e && e.target ? 268 : -268; }
+function handler269(e) { return e && e.target ? 269 : -269; }
+function handler270(e) { return e && e.target ? 270 : -270; }
+function handler271(e) { return e && e.target ? 271 : -271; }
+function handler272(e) { return e && e.target ? 272 : -272; }
+function handler273(e) { return e && e.target ? 273 : -273; }
+function handler274(e) { return e && e.target ? 274 : -274; }
+function handler275(e) { return e && e.target ? 275 : -275; }
+function handler276(e) { return e && e.target ? 276 : -276; }
+function handler277(e) { return e && e.target ? 277 : -277; }
+function handler278(e) { return e && e.target ? 278 : -278; }
+function handler279(e) { return e && e.target ? 279 : -279; }
+function handler280(e) { return e && e.target ? 280 : -280; }
+function handler281(e) { return e && e.target ? 281 : -281; }
+function handler282(e) { return e && e.target ? 282 : -282; }
+function handler283(e) { return e && e.target ? 283 : -283; }
+function handler284(e) { return e && e.target ? 284 : -284; }
+function handler285(e) { return e && e.target ? 285 : -285; }
+function handler286(e) { return e && e.target ? 286 : -286; }
+function handler287(e) { return e && e.target ? 287 : -287; }
+function handler288(e) { return e && e.target ? 288 : -288; }
+function handler289(e) { return e && e.target ? 289 : -289; }
+function handler290(e) { return e && e.target ? 290 : -290; }
+function handler291(e) { return e && e.target ? 291 : -291; }
+function handler292(e) { return e && e.target ? 292 : -292; }
+function handler293(e) { return e && e.target ? 293 : -293; }
+function handler294(e) { return e && e.target ? 294 : -294; }
+function handler295(e) { return e && e.target ? 295 : -295; }
+function handler296(e) { return e && e.target ? 296 : -296; }
+function handler297(e) { return e && e.target ? 297 : -297; }
+function handler298(e) { return e && e.target ? 298 : -298; }
+function handler299(e) { return e && e.target ? 299 : -299; }
\ No newline at end of file
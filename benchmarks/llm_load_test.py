@@ -0,0 +1,182 @@
+"""LLM API 调用路径的负载测试：通过应用自身的 optimize_with_api_model 并发发送请求
+
+用法:
+    # 启动内置的模拟服务并发送 200 个请求，并发 16
+    python benchmarks/llm_load_test.py --requests 200 --concurrency 16
+
+    # 注入限流，检查重试行为
+    python benchmarks/llm_load_test.py --rate-429 0.2 --retry-after 0.5 --max-concurrent 8
+
+    # 对已运行的服务（例如 llm_server.py 或 mock_openai_server.py）测试
+    python benchmarks/llm_load_test.py --url http://127.0.0.1:8765/v1
+
+输出客户端视角的成功率、p50/p95/最大延迟和吞吐量，以及服务端统计的实际请求数
+（含重试）、429次数、并发峰值和不同提示的数量，用于对比并发、缓存和重试策略。
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_pipeline import NullWidget, PlainVar, load_app, make_host  # noqa: E402
+from mock_openai_server import add_server_arguments, server_from_args, start_mock_server  # noqa: E402
+
+
+def make_api_host(app, work_dir, base_url, model, max_retries, max_tokens):
+    """在无界面的实例上配置 API 调用所需的属性"""
+    host = make_host(app, work_dir, "http://127.0.0.1/")
+    host.content_text = NullWidget()
+    host.api_model_combo = {}
+    host.api_providers = {}
+    host.api_provider_var = PlainVar("自定义")
+    host.api_url_var = PlainVar(base_url.rstrip('/'))
+    host.api_key_var = PlainVar("mock-key")
+    host.api_model_var = PlainVar(model)
+    host.enable_custom_system_prompt = PlainVar(False)
+    host.default_system_prompt = "你是一个专业的文本优化助手。"
+    host.api_params = {key: PlainVar(value) for key, value in {
+        'stream': False, 'max_tokens': max_tokens, 'temperature': 0.7, 'top_p': 0.7,
+        'top_k': 50, 'frequency_penalty': 1, 'auto_max_tokens': True,
+        'context_window': 32768, 'max_retries': max_retries}.items()}
+    return host
+
+
+def make_prompts(count, words, duplicate_ratio, seed):
+    """生成测试提示；duplicate_ratio 比例的提示重复之前出现过的内容"""
+    rng = random.Random(seed)
+    vocabulary = ("crawler frontier politeness robots sitemap render extract clean "
+                  "paragraph heading table list link image token budget chunk").split()
+    prompts = []
+    for i in range(count):
+        if prompts and rng.random() < duplicate_ratio:
+            prompts.append(rng.choice(prompts))
+        else:
+            prompts.append(f"文档 {i}: " + " ".join(rng.choice(vocabulary) for _ in range(words)))
+    return prompts
+
+
+async def fetch_json(url, method="GET"):
+    """请求服务端统计接口，服务不支持时返回 None"""
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.request(method, url) as response:
+                if response.status == 200:
+                    return await response.json()
+    except aiohttp.ClientError:
+        pass
+    return None
+
+
+async def run_load(host, prompts, concurrency):
+    """以固定并发通过应用的API调用路径发送所有提示"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+
+    async def one(prompt):
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                await host.optimize_with_api_model(prompt)
+                latencies.append(time.perf_counter() - t0)
+            except Exception as e:
+                errors.append(str(e).splitlines()[0])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(prompt) for prompt in prompts))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def main_async(args):
+    runner = None
+    base_url = args.url
+    if not base_url:
+        runner, base_url = await start_mock_server(server_from_args(args))
+    stats_url = base_url.rsplit('/v1', 1)[0] + "/stats"
+    try:
+        logging.disable(logging.ERROR)
+        app = load_app()
+        work_dir = Path(tempfile.mkdtemp(prefix="llm_load_"))
+        host = make_api_host(app, work_dir, base_url, args.models[0], args.max_retries, args.max_tokens)
+
+        # 模型列表接口
+        t0 = time.perf_counter()
+        await host.fetch_api_models()
+        models_ms = (time.perf_counter() - t0) * 1000
+
+        await fetch_json(stats_url + "/reset", "POST")
+        prompts = make_prompts(args.requests, args.prompt_words, args.duplicate_ratio, args.seed)
+        latencies, errors, elapsed = await run_load(host, prompts, args.concurrency)
+        server_stats = await fetch_json(stats_url)
+    finally:
+        if runner:
+            await runner.cleanup()
+
+    ordered = sorted(latencies)
+    report = {
+        'server': base_url,
+        'requests': len(prompts),
+        'unique_prompts': len(set(prompts)),
+        'concurrency': args.concurrency,
+        'succeeded': len(latencies),
+        'failed': len(errors),
+        'elapsed_s': elapsed,
+        'requests_per_s': len(latencies) / elapsed if elapsed else 0,
+        'p50_ms': statistics.median(ordered) * 1000 if ordered else 0,
+        'p95_ms': ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000 if ordered else 0,
+        'max_ms': ordered[-1] * 1000 if ordered else 0,
+        'models_ms': models_ms,
+        'models': host.api_model_combo.get("values"),
+        'errors': sorted(set(errors))[:10],
+        'server_stats': server_stats
+    }
+
+    print(f"服务: {base_url}  模型列表 {models_ms:.0f} ms {report['models']}")
+    print(f"请求: {report['requests']}（不同提示 {report['unique_prompts']}），并发 {args.concurrency}")
+    print(f"成功 {report['succeeded']}，失败 {report['failed']}，耗时 {elapsed:.2f}s，"
+          f"{report['requests_per_s']:.1f} 请求/秒")
+    print(f"延迟 p50 {report['p50_ms']:.0f} ms, p95 {report['p95_ms']:.0f} ms, 最大 {report['max_ms']:.0f} ms")
+    if server_stats:
+        retries = server_stats['requests'] - len(prompts)
+        print(f"服务端: 收到 {server_stats['requests']} 个请求（重试 {retries}），"
+              f"完成 {server_stats['completed']}，429 {server_stats['rejected_429']}，"
+              f"5xx {server_stats['rejected_5xx']}，并发峰值 {server_stats['peak_concurrency']}，"
+              f"不同提示 {server_stats['unique_prompts']}")
+    for error in report['errors']:
+        print(f"  错误: {error}")
+
+    if args.json:
+        output = Path(args.json)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存至: {output}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM API 调用路径的负载测试")
+    parser.add_argument('--url', help="已运行服务的地址（如 http://127.0.0.1:8765/v1），不指定时启动内置模拟服务")
+    parser.add_argument('--requests', type=int, default=100, help="请求总数")
+    parser.add_argument('--concurrency', type=int, default=8, help="客户端并发数")
+    parser.add_argument('--prompt-words', type=int, default=200, help="每个提示的词数")
+    parser.add_argument('--duplicate-ratio', type=float, default=0.0, help="重复提示的比例")
+    parser.add_argument('--max-tokens', type=int, default=128, help="请求的最大生成长度")
+    parser.add_argument('--max-retries', type=int, default=3, help="应用的最大重试次数")
+    parser.add_argument('--json', help="把结果写入JSON文件")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""模拟的 OpenAI 兼容接口，用于离线测试 API 调用路径的并发、重试和吞吐
+
+用法:
+    python benchmarks/mock_openai_server.py --port 8766 --latency-ms 200 --tokens-per-s 50
+    python benchmarks/mock_openai_server.py --rate-429 0.2 --retry-after 1 --max-concurrent 4
+
+接口:
+    GET  /v1/models              返回 --models 指定的模型列表
+    POST /v1/chat/completions    支持 stream=true 的SSE输出
+    GET  /stats                  请求数、429次数、并发峰值、生成token数等统计
+    POST /stats/reset            清零统计
+
+回复内容由用户消息确定性地生成（截取前若干个词），相同请求得到相同回复，
+便于检查缓存和去重的效果。
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+
+
+class MockOpenAIServer:
+    """可配置延迟、生成速度和限流的模拟服务"""
+
+    def __init__(self, models=("mock-model",), latency_ms=100, tokens_per_s=100.0,
+                 response_tokens=128, rate_429=0.0, retry_after=1.0, max_concurrent=0,
+                 rate_5xx=0.0, seed=None):
+        self.models = list(models)
+        self.latency = latency_ms / 1000
+        self.tokens_per_s = tokens_per_s
+        self.response_tokens = response_tokens
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        # 同时处理的请求超过该数量时返回429，0表示不限制
+        self.max_concurrent = max_concurrent
+        self.random = random.Random(seed)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清零统计"""
+        self.inflight = 0
+        self.stats = {
+            'requests': 0,
+            'completed': 0,
+            'streamed': 0,
+            'rejected_429': 0,
+            'rejected_5xx': 0,
+            'peak_concurrency': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'unique_prompts': 0,
+            'started_at': time.time()
+        }
+        self._seen_prompts = set()
+
+    @staticmethod
+    def count_tokens(text):
+        """粗略的token计数：按空白分词，中文按字符计"""
+        ascii_words = len(text.encode('ascii', 'ignore').split())
+        cjk = sum(1 for ch in text if ord(ch) > 0x2E80)
+        return ascii_words + cjk
+
+    def make_reply(self, messages, max_tokens):
+        """根据最后一条用户消息生成确定性的回复，返回token列表"""
+        prompt = next((m.get('content', '') for m in reversed(messages) if m.get('role') == 'user'), '')
+        tokens = prompt.split() or list(prompt)
+        limit = min(max_tokens or self.response_tokens, self.response_tokens)
+        reply = tokens[:limit]
+        # 提示较短时重复填充，保证生成长度稳定
+        while len(reply) < limit and tokens:
+            reply.extend(tokens[:limit - len(reply)])
+        return [f"{token} " for token in reply] or ["ok"]
+
+    def _reject(self):
+        """按配置决定是否拒绝本次请求，返回错误响应或 None"""
+        if self.max_concurrent and self.inflight > self.max_concurrent:
+            self.stats['rejected_429'] += 1
+            return web.json_response(
+                {"error": {"message": "并发请求过多", "type": "rate_limit_exceeded"}},
+                status=429, headers={'Retry-After': f"{self.retry_after:g}"})
+        roll = self.random.random()
+        if roll < self.rate_429:
+            self.stats['rejected_429'] += 1
+            return web.json_response(
+                {"error": {"message": "请求速率超出限制", "type": "rate_limit_exceeded"}},
+                status=429, headers={'Retry-After': f"{self.retry_after:g}"})
+        if roll < self.rate_429 + self.rate_5xx:
+            self.stats['rejected_5xx'] += 1
+            return web.json_response({"error": {"message": "服务暂时不可用"}}, status=503)
+        return None
+
+    async def handle_models(self, request):
+        """GET /v1/models"""
+        return web.json_response({
+            "object": "list",
+            "data": [{"id": model, "object": "model", "owned_by": "mock"} for model in self.models]
+        })
+
+    async def handle_stats(self, request):
+        """GET /stats"""
+        elapsed = time.time() - self.stats['started_at']
+        return web.json_response({
+            **self.stats,
+            'inflight': self.inflight,
+            'elapsed_s': round(elapsed, 3),
+            'completion_tokens_per_s': round(self.stats['completion_tokens'] / elapsed, 2) if elapsed else 0
+        })
+
+    async def handle_stats_reset(self, request):
+        """POST /stats/reset"""
+        self.reset_stats()
+        return web.json_response({"ok": True})
+
+    async def handle_chat_completions(self, request):
+        """POST /v1/chat/completions"""
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return web.json_response({"error": {"message": "请求体不是有效的JSON"}}, status=400)
+        messages = body.get('messages')
+        if not messages:
+            return web.json_response({"error": {"message": "缺少 messages"}}, status=400)
+
+        self.stats['requests'] += 1
+        self.inflight += 1
+        self.stats['peak_concurrency'] = max(self.stats['peak_concurrency'], self.inflight)
+        try:
+            rejected = self._reject()
+            if rejected is not None:
+                return rejected
+
+            prompt_key = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+            if prompt_key not in self._seen_prompts:
+                self._seen_prompts.add(prompt_key)
+                self.stats['unique_prompts'] += 1
+            prompt_tokens = sum(self.count_tokens(m.get('content', '')) for m in messages)
+            reply = self.make_reply(messages, body.get('max_tokens'))
+            self.stats['prompt_tokens'] += prompt_tokens
+            model = body.get('model') or self.models[0]
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+            # 首个token前的延迟（排队 + 预填充）
+            await asyncio.sleep(self.latency)
+            token_delay = 1 / self.tokens_per_s if self.tokens_per_s > 0 else 0
+
+            if not body.get('stream'):
+                await asyncio.sleep(token_delay * len(reply))
+                self.stats['completed'] += 1
+                self.stats['completion_tokens'] += len(reply)
+                return web.json_response({
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(reply)},
+                        "finish_reason": "length" if len(reply) >= (body.get('max_tokens') or 0) else "stop"
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": len(reply),
+                        "total_tokens": prompt_tokens + len(reply)
+                    }
+                })
+
+            response = web.StreamResponse(headers={
+                'Content-Type': 'text/event-stream',
+                'Cache-Control': 'no-cache'
+            })
+            await response.prepare(request)
+            for token in reply:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]
+                }
+                await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+                self.stats['completion_tokens'] += 1
+                if token_delay:
+                    await asyncio.sleep(token_delay)
+            await response.write(b"data: [DONE]\n\n")
+            self.stats['completed'] += 1
+            self.stats['streamed'] += 1
+            return response
+        finally:
+            self.inflight -= 1
+
+    def create_app(self):
+        """创建 aiohttp 应用"""
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get('/v1/models', self.handle_models)
+        app.router.add_post('/v1/chat/completions', self.handle_chat_completions)
+        app.router.add_get('/stats', self.handle_stats)
+        app.router.add_post('/stats/reset', self.handle_stats_reset)
+        return app
+
+
+async def start_mock_server(server, host=DEFAULT_HOST, port=0):
+    """在当前事件循环中启动服务，返回 (runner, base_url)，port 为 0 时自动选择端口"""
+    runner = web.AppRunner(server.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    actual_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{actual_port}/v1"
+
+
+def add_server_arguments(parser):
+    """添加模拟服务的命令行参数（供负载测试脚本复用）"""
+    parser.add_argument('--models', nargs='+', default=["mock-model"], help="模型列表")
+    parser.add_argument('--latency-ms', type=int, default=100, help="首个token前的延迟")
+    parser.add_argument('--tokens-per-s', type=float, default=100.0, help="每个请求的生成速度，0表示不限速")
+    parser.add_argument('--response-tokens', type=int, default=128, help="每个回复的最大token数")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="随机返回429的概率")
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help="随机返回503的概率")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="429响应中的 Retry-After 秒数")
+    parser.add_argument('--max-concurrent', type=int, default=0, help="超过该并发数时返回429，0表示不限制")
+    parser.add_argument('--seed', type=int, default=None, help="随机数种子")
+
+
+def server_from_args(args):
+    """根据命令行参数创建模拟服务"""
+    return MockOpenAIServer(
+        models=args.models,
+        latency_ms=args.latency_ms,
+        tokens_per_s=args.tokens_per_s,
+        response_tokens=args.response_tokens,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        retry_after=args.retry_after,
+        max_concurrent=args.max_concurrent,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟的 OpenAI 兼容接口")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = server_from_args(args)
+    logging.info(f"模拟服务启动: http://{args.host}:{args.port}/v1")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""本地的 Redis 协议（RESP2）替身服务，用于在没有 Redis 的机器上测试多节点工作队列
+
+用法:
+    python benchmarks/resp_server.py --port 6390
+
+    # 在界面中把工作队列设为 redis://127.0.0.1:6390/0?name=crawl 并推送URL，然后启动多个节点
+    python test.py --worker "redis://127.0.0.1:6390/0?name=crawl" --name node1
+    python test.py --worker "redis://127.0.0.1:6390/0?name=crawl" --name node2
+
+只实现 RedisWorkQueue 用到的命令（字符串、列表、集合、哈希和有序集合的一小部分），
+数据只保存在内存中。所有命令在同一个事件循环中顺序执行，与 Redis 一样每条命令都是原子的。
+"""
+import argparse
+import asyncio
+import logging
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 6390
+
+
+class CommandError(Exception):
+    """返回给客户端的错误"""
+
+
+class _SortedSet(dict):
+    """有序集合：用字典保存成员的分数，范围查询时再排序"""
+
+
+class RespStore:
+    """内存中的键空间和命令实现"""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = 0
+
+    def _get(self, key, kind):
+        value = self.data.get(key)
+        if value is not None and not isinstance(value, kind):
+            raise CommandError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _container(self, key, kind):
+        value = self._get(key, kind)
+        if value is None:
+            value = self.data[key] = kind()
+        return value
+
+    def _cleanup(self, key):
+        if key in self.data and not self.data[key] and not isinstance(self.data[key], str):
+            del self.data[key]
+
+    def execute(self, name, args):
+        self.commands += 1
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            raise CommandError(f"ERR unknown command '{name}'")
+        return handler(*args)
+
+    # 连接
+    def cmd_ping(self, message=None):
+        return message if message is not None else "PONG"
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_auth(self, *args):
+        return "OK"
+
+    # 字符串
+    def cmd_get(self, key):
+        return self._get(key, str)
+
+    def cmd_set(self, key, value):
+        self.data[key] = value
+        return "OK"
+
+    def cmd_incr(self, key):
+        value = int(self._get(key, str) or 0) + 1
+        self.data[key] = str(value)
+        return value
+
+    def cmd_del(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    # 列表
+    def cmd_rpush(self, key, *values):
+        items = self._container(key, list)
+        items.extend(values)
+        return len(items)
+
+    def cmd_llen(self, key):
+        return len(self._get(key, list) or [])
+
+    def cmd_lrange(self, key, start, stop):
+        items = self._get(key, list) or []
+        start, stop = int(start), int(stop)
+        stop = len(items) if stop == -1 else stop + 1
+        return items[start:stop]
+
+    def cmd_lrem(self, key, count, value):
+        items = self._get(key, list) or []
+        count = int(count)
+        indexes = [index for index, item in enumerate(items) if item == value]
+        if count < 0:
+            indexes.reverse()
+        if count:
+            indexes = indexes[:abs(count)]
+        for index in sorted(indexes, reverse=True):
+            del items[index]
+        self._cleanup(key)
+        return len(indexes)
+
+    def cmd_lmove(self, source, destination, where_from, where_to):
+        items = self._get(source, list)
+        if not items:
+            return None
+        value = items.pop(0 if where_from.upper() == "LEFT" else -1)
+        target = self._container(destination, list)
+        target.insert(0 if where_to.upper() == "LEFT" else len(target), value)
+        self._cleanup(source)
+        return value
+
+    # 集合
+    def cmd_sadd(self, key, *members):
+        members_set = self._container(key, set)
+        before = len(members_set)
+        members_set.update(members)
+        return len(members_set) - before
+
+    def cmd_scard(self, key):
+        return len(self._get(key, set) or ())
+
+    # 哈希
+    def cmd_hset(self, key, *pairs):
+        fields = self._container(key, dict)
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in fields
+            fields[field] = value
+        return added
+
+    def cmd_hget(self, key, field):
+        return (self._get(key, dict) or {}).get(field)
+
+    def cmd_hdel(self, key, *fields):
+        values = self._get(key, dict) or {}
+        removed = sum(1 for field in fields if values.pop(field, None) is not None)
+        self._cleanup(key)
+        return removed
+
+    def cmd_hincrby(self, key, field, amount):
+        fields = self._container(key, dict)
+        value = int(fields.get(field, 0)) + int(amount)
+        fields[field] = str(value)
+        return value
+
+    # 有序集合（成员 -> 分数）
+    def cmd_zadd(self, key, *args):
+        args = list(args)
+        only_new = False
+        if args and args[0].upper() == "NX":
+            only_new = True
+            args.pop(0)
+        scores = self._container(key, _SortedSet)
+        added = 0
+        for score, member in zip(args[::2], args[1::2]):
+            if member in scores:
+                if only_new:
+                    continue
+            else:
+                added += 1
+            scores[member] = float(score)
+        return added
+
+    def cmd_zrem(self, key, *members):
+        scores = self._get(key, _SortedSet) or {}
+        removed = sum(1 for member in members if scores.pop(member, None) is not None)
+        self._cleanup(key)
+        return removed
+
+    def cmd_zcard(self, key):
+        return len(self._get(key, _SortedSet) or ())
+
+    def cmd_zscore(self, key, member):
+        score = (self._get(key, _SortedSet) or {}).get(member)
+        return None if score is None else repr(score)
+
+    def cmd_zrangebyscore(self, key, minimum, maximum):
+        scores = self._get(key, _SortedSet) or {}
+        low, high = float(minimum), float(maximum)
+        return [member for member, score in sorted(scores.items(), key=lambda item: item[1])
+                if low <= score <= high]
+
+
+def encode(value):
+    """把命令的返回值编码为 RESP2"""
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, CommandError):
+        return b"-%s\r\n" % str(value).encode('utf-8')
+    if isinstance(value, (list, tuple)):
+        return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+    if value == "OK" or value == "PONG":
+        return b"+%s\r\n" % value.encode('utf-8')
+    data = str(value).encode('utf-8')
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+async def read_command(reader):
+    """读取一条命令（数组格式），连接关闭时返回 None"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # 内联命令，例如 redis-cli 的 PING
+        return line.decode('utf-8').split()
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = await reader.readline()
+        length = int(header[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2].decode('utf-8'))
+    return args
+
+
+async def start_resp_server(store, host=DEFAULT_HOST, port=0):
+    """在当前事件循环中启动服务，返回 (server, 端口)，port 为 0 时自动选择端口"""
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                command = await read_command(reader)
+                if not command:
+                    break
+                try:
+                    reply = store.execute(command[0], command[1:])
+                except CommandError as e:
+                    reply = e
+                except (TypeError, ValueError) as e:
+                    reply = CommandError(f"ERR {e}")
+                writer.write(encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def main_async(args):
+    store = RespStore()
+    server, port = await start_resp_server(store, args.host, args.port)
+    logging.info(f"RESP 替身服务启动: redis://{args.host}:{port}/0")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地的 Redis 协议替身服务")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
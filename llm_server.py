@@ -0,0 +1,299 @@
+"""本地推理服务：在独立进程中常驻本地GGUF模型，提供OpenAI兼容的接口
+
+用法:
+    python llm_server.py --model models/qwen-7b.Q4_K_M.gguf --port 8765
+
+启动后，爬虫界面中的 "本地推理服务"（或 "自定义"）API提供商填入
+http://127.0.0.1:8765/v1 即可使用。多个并发请求进入同一队列，由调度器
+按共享前缀分组后依次在常驻模型上执行，相同的系统提示和指令前缀只需评估一次。
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from aiohttp import web
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class InferenceRequest:
+    """排队中的一次对话补全请求"""
+
+    def __init__(self, messages, params, stream):
+        self.messages = messages
+        self.params = params
+        self.stream = stream
+        # 用于按共享前缀排序的提示文本
+        self.prompt_key = "\n".join(
+            f"{m.get('role', '')}:{m.get('content', '')}" for m in messages)
+        self.enqueued_at = time.monotonic()
+        self.chunks = asyncio.Queue()
+        self.cancelled = threading.Event()
+
+
+class LocalInferenceServer:
+    """持有常驻模型的推理服务，调度并发请求"""
+
+    def __init__(self, model_path, n_ctx=4096, n_threads=None,
+                 max_batch=8, batch_window_ms=20, max_wait_s=30.0):
+        self.model_path = Path(model_path)
+        self.model_id = self.model_path.stem
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads or max(1, os.cpu_count() // 2)
+        self.max_batch = max_batch
+        self.batch_window = batch_window_ms / 1000
+        # 等待超过该时间的请求优先执行，避免前缀分组导致饥饿
+        self.max_wait = max_wait_s
+
+        self.llm = None
+        self.queue = None
+        self.pending = []
+        self.last_prompt = ""
+        # llama-cpp 上下文不是线程安全的，所有推理都在同一个线程中执行
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-inference")
+        self.stats = {'requests': 0, 'completed': 0, 'failed': 0, 'batches': 0}
+
+    def load_model(self):
+        """加载模型（只在启动时执行一次）"""
+        from llama_cpp import Llama
+
+        logging.info(f"加载模型: {self.model_path} (n_ctx={self.n_ctx})")
+        self.llm = Llama(
+            model_path=str(self.model_path),
+            n_ctx=self.n_ctx,
+            n_threads=self.n_threads,
+            verbose=False
+        )
+        logging.info("模型加载完成")
+
+    async def start(self, app):
+        """aiohttp 启动回调：初始化队列和调度器"""
+        self.queue = asyncio.Queue()
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.load_model)
+        app['scheduler'] = asyncio.create_task(self._scheduler())
+
+    async def stop(self, app):
+        """aiohttp 关闭回调"""
+        app['scheduler'].cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _pick_next(self):
+        """选择下一个执行的请求
+
+        优先选择与上一个提示共享最长前缀的请求，使KV缓存尽量复用；
+        等待过久的请求按先来先服务处理。
+        """
+        now = time.monotonic()
+        oldest = min(self.pending, key=lambda r: r.enqueued_at)
+        if now - oldest.enqueued_at > self.max_wait:
+            best = oldest
+        else:
+            best = max(
+                self.pending,
+                key=lambda r: (len(os.path.commonprefix([r.prompt_key, self.last_prompt])),
+                               -r.enqueued_at))
+        self.pending.remove(best)
+        return best
+
+    async def _collect(self):
+        """把队列中的新请求收入待处理集合，在短窗口内聚合同时到达的请求"""
+        if not self.pending:
+            self.pending.append(await self.queue.get())
+        deadline = time.monotonic() + self.batch_window
+        while len(self.pending) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                self.pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # 窗口之外已经到达的请求也一并加入
+        while not self.queue.empty():
+            self.pending.append(self.queue.get_nowait())
+
+    async def _scheduler(self):
+        """持续调度：每完成一个请求就重新从待处理集合中挑选下一个"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._collect()
+            self.stats['batches'] += 1
+            while self.pending:
+                request = self._pick_next()
+                if request.cancelled.is_set():
+                    continue
+                self.last_prompt = request.prompt_key
+                try:
+                    await loop.run_in_executor(self.executor, self._generate, request, loop)
+                    self.stats['completed'] += 1
+                except Exception as e:
+                    logging.error(f"推理失败: {e}", exc_info=True)
+                    self.stats['failed'] += 1
+                    loop.call_soon_threadsafe(request.chunks.put_nowait, e)
+                # 执行期间到达的新请求参与下一次挑选
+                while not self.queue.empty():
+                    self.pending.append(self.queue.get_nowait())
+
+    def _generate(self, request, loop):
+        """在推理线程中执行生成，把结果逐块送回事件循环"""
+        def emit(item):
+            loop.call_soon_threadsafe(request.chunks.put_nowait, item)
+
+        params = dict(request.params)
+        if request.stream:
+            for chunk in self.llm.create_chat_completion(
+                    messages=request.messages, stream=True, **params):
+                if request.cancelled.is_set():
+                    logging.info("客户端已断开，停止生成")
+                    break
+                emit(chunk)
+        else:
+            from llama_cpp import StoppingCriteriaList
+
+            # 非流式请求在每个token后检查客户端是否已断开
+            stop_when_cancelled = StoppingCriteriaList([lambda ids, logits: request.cancelled.is_set()])
+            result = self.llm.create_chat_completion(
+                messages=request.messages, stream=False, stopping_criteria=stop_when_cancelled, **params)
+            if request.cancelled.is_set():
+                logging.info("客户端已断开，停止生成")
+            emit(result)
+        emit(None)
+
+    @staticmethod
+    def _generation_params(body):
+        """从OpenAI格式的请求体中提取 llama-cpp 支持的参数"""
+        params = {}
+        for key in ('max_tokens', 'temperature', 'top_p', 'top_k',
+                    'frequency_penalty', 'presence_penalty', 'stop', 'seed'):
+            if body.get(key) is not None:
+                params[key] = body[key]
+        extra = body.get('extra_body') or {}
+        if extra.get('top_k') is not None:
+            params['top_k'] = extra['top_k']
+        return params
+
+    async def handle_models(self, request):
+        """GET /v1/models"""
+        return web.json_response({
+            "object": "list",
+            "data": [{"id": self.model_id, "object": "model", "owned_by": "local"}]
+        })
+
+    async def handle_health(self, request):
+        """GET /health：返回队列和统计信息"""
+        return web.json_response({
+            "model": self.model_id,
+            "queued": self.queue.qsize() + len(self.pending),
+            **self.stats
+        })
+
+    async def handle_chat_completions(self, request):
+        """POST /v1/chat/completions"""
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return web.json_response({"error": {"message": "请求体不是有效的JSON"}}, status=400)
+
+        messages = body.get('messages')
+        if not messages:
+            return web.json_response({"error": {"message": "缺少 messages"}}, status=400)
+
+        inference = InferenceRequest(messages, self._generation_params(body), bool(body.get('stream')))
+        self.stats['requests'] += 1
+        await self.queue.put(inference)
+
+        if not inference.stream:
+            try:
+                result = await self._wait_result(request, inference)
+            except asyncio.CancelledError:
+                inference.cancelled.set()
+                raise
+            if result is None:
+                # 客户端已断开，没有需要返回的内容
+                return web.Response(status=499)
+            if isinstance(result, Exception):
+                return web.json_response({"error": {"message": str(result)}}, status=500)
+            result['model'] = body.get('model') or self.model_id
+            return web.json_response(result)
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache'
+        })
+        await response.prepare(request)
+        try:
+            while True:
+                chunk = await inference.chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    chunk = {"error": {"message": str(chunk)}}
+                    await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+                    break
+                chunk['model'] = body.get('model') or self.model_id
+                await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+        except (ConnectionResetError, asyncio.CancelledError):
+            inference.cancelled.set()
+            raise
+        return response
+
+    @staticmethod
+    async def _wait_result(request, inference, poll_interval=1.0):
+        """等待非流式请求的结果，期间客户端断开时取消生成并返回 None"""
+        waiter = asyncio.ensure_future(inference.chunks.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait({waiter}, timeout=poll_interval)
+                if done:
+                    return waiter.result()
+                if request.transport is None or request.transport.is_closing():
+                    logging.info("客户端已断开，取消排队或进行中的请求")
+                    inference.cancelled.set()
+                    return None
+        finally:
+            waiter.cancel()
+
+    def create_app(self):
+        """创建 aiohttp 应用"""
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_get('/v1/models', self.handle_models)
+        app.router.add_post('/v1/chat/completions', self.handle_chat_completions)
+        app.router.add_get('/health', self.handle_health)
+        app.on_startup.append(self.start)
+        app.on_cleanup.append(self.stop)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地推理服务（OpenAI兼容接口）")
+    parser.add_argument('--model', required=True, help="GGUF模型文件路径")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--n-ctx', type=int, default=4096, help="上下文窗口大小")
+    parser.add_argument('--n-threads', type=int, default=None, help="推理线程数")
+    parser.add_argument('--max-batch', type=int, default=8, help="每轮调度聚合的最大请求数")
+    parser.add_argument('--batch-window-ms', type=int, default=20, help="聚合并发请求的等待窗口")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = LocalInferenceServer(
+        args.model,
+        n_ctx=args.n_ctx,
+        n_threads=args.n_threads,
+        max_batch=args.max_batch,
+        batch_window_ms=args.batch_window_ms
+    )
+    logging.info(f"本地推理服务启动: http://{args.host}:{args.port}/v1")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
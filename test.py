@@ -1,33 +1,49 @@
 import asyncio
 import threading
 import tkinter as tk
-from tkinter import ttk, scrolledtext
-from PIL import Image, ImageTk  # 新增，用于图像处理
+from tkinter import ttk, scrolledtext, messagebox
 import json
-from crawl4ai import AsyncWebCrawler
-from crawl4ai.extraction_strategy import JsonCssExtractionStrategy, LLMExtractionStrategy
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import base64
-from urllib.parse import urlparse, urljoin
+import contextlib
+import cProfile
+import email.utils
+import hashlib
+import mmap
+import struct
+from urllib.parse import urlparse, urljoin, urlunparse, parse_qsl, urlencode, quote as url_quote
 import re
+import math
+import random
+import time
+import tracemalloc
 import logging
 import os
+import pstats
 import sys
+import weakref
 import webbrowser
-from pydantic import BaseModel
-from typing import List
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Full
 import aiofiles
-import aiohttp
 import mimetypes
-from tqdm import tqdm
+import multiprocessing
 import shutil
+import subprocess
 import tkinter.filedialog
 import tkinter.messagebox
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
+# crawl4ai、PIL、aiohttp 等较重的模块在首次使用时才导入，加快窗口显示
+
 
 
 class ScrollableFrame(ttk.Frame):
@@ -86,6 +102,2693 @@ class ScrollableFrame(ttk.Frame):
             self.canvas.yview_scroll(-1, "units")
 
 
+class ProgressBus:
+    """合并高频的进度更新，按固定间隔在主线程中统一刷新到界面
+
+    每个通道只保留最新的一次更新：下载每个数据块、克隆每个资源、本地模型
+    每个token都可以随意发布，界面最多每 interval_ms 毫秒刷新一次。
+    """
+
+    def __init__(self, root, interval_ms=100):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        # 统计：发布次数与实际刷新次数
+        self.published = 0
+        self.flushed = 0
+
+    def publish(self, channel, callback, *args):
+        """发布一次更新，同一通道中尚未刷新的旧更新会被覆盖（可在任意线程调用）"""
+        with self._lock:
+            self._pending[channel] = (callback, args)
+            self.published += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.root.after(self.interval_ms, self._flush)
+
+    def _flush(self):
+        """在主线程中执行所有通道的最新更新"""
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+            self._scheduled = False
+        for channel, (callback, args) in pending.items():
+            try:
+                callback(*args)
+            except tk.TclError:
+                # 窗口已关闭，丢弃该通道的更新
+                pass
+            except Exception as e:
+                logging.error(f"刷新进度失败 [{channel}]: {e}")
+        self.flushed += len(pending)
+
+
+class PagedTextView:
+    """分页显示大段文本：完整文本保存在内存中，文本控件只保留当前页
+
+    Tk 的 Text 控件在插入几十万行时会卡住界面，按页显示后每次只插入
+    不超过 page_lines 行（且不超过 page_chars 个字符）。
+    """
+
+    def __init__(self, parent, text_widget, page_lines=2000, page_chars=200_000):
+        self.text_widget = text_widget
+        self.page_lines = page_lines
+        self.page_chars = page_chars
+        self.text = ""
+        self.pages = [(0, 0)]
+        self.current = 0
+
+        # 翻页栏，只有一页时隐藏
+        self.nav_frame = ttk.Frame(parent)
+        self.prev_button = ttk.Button(self.nav_frame, text="上一页", width=8,
+                                      command=lambda: self.show_page(self.current - 1))
+        self.prev_button.pack(side=tk.LEFT, padx=2)
+        self.page_label = ttk.Label(self.nav_frame, text="")
+        self.page_label.pack(side=tk.LEFT, padx=5)
+        self.next_button = ttk.Button(self.nav_frame, text="下一页", width=8,
+                                      command=lambda: self.show_page(self.current + 1))
+        self.next_button.pack(side=tk.LEFT, padx=2)
+
+    def _paginate(self, text):
+        """计算每页在文本中的起止位置"""
+        pages = []
+        start, length = 0, len(text)
+        while start < length:
+            limit = min(start + self.page_chars, length)
+            end, lines = start, 0
+            while lines < self.page_lines:
+                newline = text.find("\n", end, limit)
+                if newline == -1:
+                    end = limit
+                    break
+                end = newline + 1
+                lines += 1
+            pages.append((start, end))
+            start = end
+        return pages or [(0, 0)]
+
+    def set_text(self, text):
+        """替换全部文本并显示第一页"""
+        self.text = text
+        self.pages = self._paginate(text)
+        if len(self.pages) > 1:
+            self.nav_frame.pack(side=tk.BOTTOM, fill=tk.X, before=self.text_widget)
+        else:
+            self.nav_frame.pack_forget()
+        self.show_page(0)
+
+    def show_page(self, index):
+        """显示指定页"""
+        index = max(0, min(index, len(self.pages) - 1))
+        self.current = index
+        start, end = self.pages[index]
+        self.text_widget.delete('1.0', tk.END)
+        self.text_widget.insert(tk.END, self.text[start:end])
+        self.text_widget.see('1.0')
+        self.page_label.config(text=f"第 {index + 1} / {len(self.pages)} 页")
+        self.prev_button.config(state='normal' if index > 0 else 'disabled')
+        self.next_button.config(state='normal' if index < len(self.pages) - 1 else 'disabled')
+
+    def clear(self):
+        """清空文本"""
+        self.set_text("")
+
+
+class MetricFamily:
+    """一组同名指标（按标签值区分），线程安全"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    @staticmethod
+    def _format_labels(pairs):
+        if not pairs:
+            return ""
+        escaped = (f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+                   for name, value in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def samples(self):
+        """返回 (后缀, 标签对, 值) 列表"""
+        with self._lock:
+            return [("", list(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+    def render(self):
+        """输出 Prometheus 文本格式"""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for suffix, pairs, value in self.samples():
+            # 整数原样输出，避免大的字节计数被截断精度
+            text = str(value) if isinstance(value, int) else repr(float(value))
+            lines.append(f"{self.name}{suffix}{self._format_labels(pairs)} {text}")
+        return "\n".join(lines)
+
+
+class CounterMetric(MetricFamily):
+    """只增不减的计数器"""
+
+    metric_type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class GaugeMetric(MetricFamily):
+    """可增可减的当前值，也可以在采集时调用函数取值"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function, **labels):
+        """采集时调用 function() 取值"""
+        with self._lock:
+            self._functions[self._key(labels)] = function
+
+    def track(self, **labels):
+        """进入时加一、退出时减一的上下文管理器，用于统计进行中的任务"""
+        gauge = self
+
+        class Tracker:
+            def __enter__(self):
+                gauge.inc(**labels)
+                return self
+
+            def __exit__(self, *exc):
+                gauge.dec(**labels)
+                return False
+
+        return Tracker()
+
+    def samples(self):
+        samples = super().samples()
+        with self._lock:
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                samples.append(("", list(zip(self.labelnames, key)), float(function())))
+            except Exception:
+                pass
+        return samples
+
+
+class HistogramMetric(MetricFamily):
+    """按区间统计观测值分布（耗时、大小等）"""
+
+    metric_type = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    def time(self, **labels):
+        """计时上下文管理器，退出时记录耗时（秒）"""
+        histogram = self
+
+        class Timer:
+            def __enter__(self):
+                self.start = time.perf_counter()
+                return self
+
+            def __exit__(self, *exc):
+                histogram.observe(time.perf_counter() - self.start, **labels)
+                return False
+
+        return Timer()
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            items = list(self._values.items())
+        for key, (counts, total, count) in items:
+            pairs = list(zip(self.labelnames, key))
+            for bound, bucket_count in zip(self.buckets, counts):
+                samples.append(("_bucket", pairs + [("le", f"{bound:g}")], bucket_count))
+            samples.append(("_bucket", pairs + [("le", "+Inf")], count))
+            samples.append(("_sum", pairs, total))
+            samples.append(("_count", pairs, count))
+        return samples
+
+
+class MetricsRegistry:
+    """指标注册表，负责输出所有指标"""
+
+    def __init__(self):
+        self._metrics = OrderedDict()
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(CounterMetric(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(GaugeMetric(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=HistogramMetric.DEFAULT_BUCKETS):
+        return self._register(HistogramMetric(name, help_text, labelnames, buckets))
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+class MetricsServer:
+    """在本地端口上以 Prometheus 文本格式提供 /metrics"""
+
+    def __init__(self, registry, host="127.0.0.1", port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="metrics-server").start()
+        logging.info(f"指标接口已启动: http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            logging.info("指标接口已停止")
+
+
+# 全局指标：爬取、资源下载、内容处理、LLM调用、缓存和进行中的任务
+METRICS = MetricsRegistry()
+PAGES_CRAWLED = METRICS.counter("crawler_pages_total", "已爬取的页面数", ("status",))
+STAGE_SECONDS = METRICS.histogram("crawler_stage_seconds", "流水线各阶段耗时（秒）", ("stage",))
+PROCESSOR_SECONDS = METRICS.histogram("crawler_processor_seconds", "内容处理器耗时（秒）", ("format",))
+RESOURCE_BYTES = METRICS.counter("crawler_resource_bytes_total", "网页克隆下载的资源字节数", ("type",))
+RESOURCE_REQUESTS = METRICS.counter(
+    "crawler_resource_requests_total", "网页克隆的资源请求数", ("type", "result"))
+LLM_REQUESTS = METRICS.counter("llm_requests_total", "LLM调用次数", ("provider", "status"))
+LLM_RETRIES = METRICS.counter("llm_retries_total", "LLM调用因限流或服务错误的重试次数", ("provider",))
+LLM_SECONDS = METRICS.histogram("llm_request_seconds", "LLM调用耗时（秒）", ("provider",),
+                                buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300))
+LLM_TOKENS = METRICS.counter("llm_tokens_total", "LLM调用的token数", ("provider", "kind"))
+CACHE_REQUESTS = METRICS.counter("cache_requests_total", "缓存查询次数", ("cache", "result"))
+RETRIES = METRICS.counter("crawler_retries_total", "页面和资源请求的重试次数", ("kind",))
+CIRCUIT_OPENS = METRICS.counter("crawler_circuit_opens_total", "主机因连续失败被熔断的次数")
+FETCHES = METRICS.counter("crawler_fetches_total", "页面获取次数（HTTP直接请求或浏览器渲染）", ("mode",))
+BLOCKED_REQUESTS = METRICS.counter("browser_blocked_requests_total", "浏览器中被拦截的资源请求数", ("type",))
+INFLIGHT = METRICS.gauge("inflight_tasks", "进行中的任务数", ("kind",))
+
+
+def percentile(values, q):
+    """计算百分位数（最近秩法），values 为空时返回 0"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+class MetricSpan:
+    """一个阶段的计时区间，记录耗时、输入输出字节数和资源数量"""
+
+    def __init__(self, page, name):
+        self.page = page
+        self.name = name
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.items = 0
+        self.error = None
+        self.duration = 0.0
+
+    def add_file(self, path):
+        """把写出的文件大小计入输出字节数"""
+        if path and Path(path).exists():
+            self.bytes_out += Path(path).stat().st_size
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.page.spans.append(self)
+        return False
+
+
+class PageMetrics:
+    """单个页面在流水线中各阶段的计时"""
+
+    def __init__(self, pipeline, url):
+        self.pipeline = pipeline
+        self.url = url
+        self.spans = []
+        self.started = time.perf_counter()
+        self.finished = False
+
+    def span(self, name):
+        """创建一个阶段计时区间，用法: with page.span('arun') as span: ..."""
+        return MetricSpan(self, name)
+
+    def finish(self, status="ok", error=None):
+        """结束该页面的计时，写出一行JSONL并计入批次汇总"""
+        if self.finished:
+            return
+        self.finished = True
+        PAGES_CRAWLED.inc(status=status)
+        record = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'batch': self.pipeline.batch_id,
+            'url': self.url,
+            'status': status,
+            'error': error,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'stages': [
+                {
+                    'stage': span.name,
+                    'ms': round(span.duration * 1000, 2),
+                    'bytes_in': span.bytes_in,
+                    'bytes_out': span.bytes_out,
+                    'items': span.items,
+                    'error': span.error
+                }
+                for span in self.spans
+            ]
+        }
+        self.pipeline.record_page(record)
+
+
+class PipelineMetrics:
+    """一批爬取的分阶段计时，每个页面写一行JSONL，批次结束时写汇总
+
+    log_dir 为 None 时只在内存中统计，不写文件。
+    """
+
+    def __init__(self, log_dir="logs", batch_id=None):
+        self.batch_id = batch_id or datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.log_dir = Path(log_dir) if log_dir else None
+        self.pages_path = None
+        if self.log_dir:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            self.pages_path = self.log_dir / f"metrics_{self.batch_id}.jsonl"
+        self.started = time.perf_counter()
+        self.pages = 0
+        self.failed = 0
+        self.page_ms = []
+        # 阶段名 -> {'ms': [...], 'bytes_in': n, 'bytes_out': n, 'items': n, 'errors': n}
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def start_page(self, url):
+        """开始记录一个页面"""
+        return PageMetrics(self, url)
+
+    def record_page(self, record):
+        """记录一个页面的结果（可在任意线程调用）"""
+        with self._lock:
+            self.pages += 1
+            if record['status'] != "ok":
+                self.failed += 1
+            self.page_ms.append(record['total_ms'])
+            for span in record['stages']:
+                STAGE_SECONDS.observe(span['ms'] / 1000, stage=span['stage'])
+                stage = self.stages.setdefault(
+                    span['stage'], {'ms': [], 'bytes_in': 0, 'bytes_out': 0, 'items': 0, 'errors': 0})
+                stage['ms'].append(span['ms'])
+                stage['bytes_in'] += span['bytes_in']
+                stage['bytes_out'] += span['bytes_out']
+                stage['items'] += span['items']
+                stage['errors'] += 1 if span['error'] else 0
+            if self.pages_path:
+                with open(self.pages_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def summary(self):
+        """批次汇总：各阶段耗时的总和、均值、p50/p95/最大值以及字节数"""
+        with self._lock:
+            stages = {}
+            for name, stage in self.stages.items():
+                values = stage['ms']
+                stages[name] = {
+                    'count': len(values),
+                    'total_ms': round(sum(values), 2),
+                    'mean_ms': round(sum(values) / len(values), 2),
+                    'p50_ms': percentile(values, 50),
+                    'p95_ms': percentile(values, 95),
+                    'max_ms': max(values),
+                    'bytes_in': stage['bytes_in'],
+                    'bytes_out': stage['bytes_out'],
+                    'items': stage['items'],
+                    'errors': stage['errors']
+                }
+            return {
+                'ts': datetime.now().isoformat(timespec='milliseconds'),
+                'batch': self.batch_id,
+                'pages': self.pages,
+                'failed': self.failed,
+                'wall_ms': round((time.perf_counter() - self.started) * 1000, 2),
+                'page_p50_ms': percentile(self.page_ms, 50),
+                'page_p95_ms': percentile(self.page_ms, 95),
+                'stages': stages
+            }
+
+    def close(self):
+        """结束批次，把汇总追加到 metrics_summary.jsonl 并返回汇总"""
+        summary = self.summary()
+        if self.log_dir:
+            with open(self.log_dir / "metrics_summary.jsonl", 'a', encoding='utf-8') as f:
+                f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+        slowest = sorted(summary['stages'].items(), key=lambda item: -item[1]['total_ms'])[:3]
+        logging.info(
+            f"批次 {self.batch_id}: {summary['pages']} 个页面（失败 {summary['failed']}），"
+            f"耗时 {summary['wall_ms'] / 1000:.2f}s，最慢阶段: "
+            + ", ".join(f"{name} {stage['total_ms']:.0f}ms" for name, stage in slowest))
+        return summary
+
+
+class CrawlProfiler:
+    """用 cProfile 和 tracemalloc 分析一次爬取或批量任务
+
+    cProfile 只统计调用 start() 的线程（爬取在独立线程的事件循环中运行，
+    正好覆盖整个流程）；tracemalloc 是全进程的，多个任务同时分析时共用。
+    """
+
+    _tracing_users = 0
+    _tracing_lock = threading.Lock()
+
+    def __init__(self, output_dir, key, url=None, top=40, frames=5):
+        self.output_dir = Path(output_dir)
+        self.key = key
+        self.url = url
+        self.top = top
+        self.frames = frames
+        self.profile = None
+        self.start_snapshot = None
+
+    def start(self):
+        """开始分析"""
+        with CrawlProfiler._tracing_lock:
+            if CrawlProfiler._tracing_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            CrawlProfiler._tracing_users += 1
+        tracemalloc.reset_peak()
+        self.start_snapshot = tracemalloc.take_snapshot()
+        self.started = time.perf_counter()
+        self.profile = cProfile.Profile()
+        try:
+            self.profile.enable()
+        except ValueError as e:
+            # 同一线程（Python 3.12 起为整个进程）已有其他分析器在运行
+            logging.warning(f"无法启用 cProfile，只记录内存分配: {e}")
+            self.profile = None
+
+    def stop(self):
+        """结束分析并保存报告，返回保存的文件路径列表"""
+        if self.profile:
+            self.profile.disable()
+        elapsed = time.perf_counter() - self.started
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        with CrawlProfiler._tracing_lock:
+            CrawlProfiler._tracing_users -= 1
+            if CrawlProfiler._tracing_users == 0:
+                tracemalloc.stop()
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        saved = []
+
+        if self.profile:
+            # .prof 可以用 snakeviz、pstats 等工具打开
+            prof_path = self.output_dir / f"{self.key}_profile.prof"
+            self.profile.dump_stats(str(prof_path))
+            saved.append(prof_path)
+
+            text_path = self.output_dir / f"{self.key}_profile.txt"
+            with open(text_path, 'w', encoding='utf-8') as f:
+                f.write(f"URL: {self.url}\n耗时: {elapsed:.3f}s\n\n")
+                stats = pstats.Stats(self.profile, stream=f).strip_dirs()
+                f.write("=== 按累计耗时排序 ===\n")
+                stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+                f.write("\n=== 按自身耗时排序 ===\n")
+                stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top)
+            saved.append(text_path)
+
+        alloc_path = self.output_dir / f"{self.key}_alloc.txt"
+        with open(alloc_path, 'w', encoding='utf-8') as f:
+            f.write(f"URL: {self.url}\n耗时: {elapsed:.3f}s\n")
+            f.write(f"峰值内存: {peak / 1024 / 1024:.2f} MB, 结束时: {current / 1024 / 1024:.2f} MB\n\n")
+            f.write("=== 本次新增的内存分配（按行） ===\n")
+            for stat in snapshot.compare_to(self.start_snapshot, 'lineno')[:self.top]:
+                f.write(f"{stat}\n")
+            f.write("\n=== 占用最多的分配调用栈 ===\n")
+            for stat in snapshot.statistics('traceback')[:5]:
+                f.write(f"\n{stat.count} 个内存块, {stat.size / 1024:.1f} KB\n")
+                for line in stat.traceback.format():
+                    f.write(f"{line}\n")
+        saved.append(alloc_path)
+
+        logging.info(f"性能分析完成: {self.url} 耗时 {elapsed:.2f}s, 峰值内存 {peak / 1024 / 1024:.1f} MB")
+        return saved
+
+
+# 规范化时去掉的跟踪参数
+TRACKING_PARAMS = {'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+                   '_ga', '_gl', '_hsenc', '_hsmi', 'spm', 'ref_src'}
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url, base=None):
+    """把URL规范化为去重用的标准形式
+
+    转为绝对URL，协议和主机名小写，去掉默认端口和片段，解析 . 和 .. 路径段，
+    百分号编码统一大写，删除 utm_* 等跟踪参数并按参数名排序。
+    """
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+
+    netloc = parsed.netloc.lower()
+    if parsed.hostname:
+        host = parsed.hostname
+        if ':' in host:
+            host = f"[{host}]"
+        try:
+            port = parsed.port
+        except ValueError:
+            port = None
+        netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+        if '@' in parsed.netloc:
+            netloc = parsed.netloc.rsplit('@', 1)[0] + '@' + netloc
+
+    # 解析 . 和 .. 路径段
+    segments = []
+    parts = parsed.path.split('/')
+    for segment in parts:
+        if segment == '..':
+            if len(segments) > 1:
+                segments.pop()
+        elif segment != '.':
+            segments.append(segment)
+    if parts[-1] in ('.', '..'):
+        segments.append('')
+    path = '/'.join(segments) or '/'
+    if not path.startswith('/'):
+        path = '/' + path
+    path = re.sub(r'%[0-9a-f]{2}', lambda m: m.group().upper(), path)
+
+    query = ''
+    if parsed.query:
+        pairs = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                 if key not in TRACKING_PARAMS and not key.startswith('utm_')]
+        query = urlencode(sorted(pairs, key=lambda pair: pair[0]), quote_via=url_quote)
+
+    return urlunparse((scheme, netloc, path, parsed.params, query, ''))
+
+
+def clean_url(url, base=None):
+    """把URL整理为实际请求的形式
+
+    转为绝对URL，协议和主机名小写，去掉片段；路径和查询参数保持原样，因为有些服务器
+    把参数顺序或写法不同的URL当作不同的资源。判断是否重复时用 normalize_url。
+    """
+    url = url.strip()
+    if base:
+        url = urljoin(base, url)
+    parsed = urlparse(url)
+    netloc = parsed.netloc
+    if parsed.hostname:
+        userinfo, at, hostport = netloc.rpartition('@')
+        netloc = userinfo + at + hostport.lower()
+    return urlunparse((parsed.scheme.lower(), netloc, parsed.path, parsed.params, parsed.query, ''))
+
+
+class VisitedSet:
+    """紧凑的已访问URL集合
+
+    只保存URL的64位指纹（开放寻址哈希表，存放在 array('Q') 中），每个URL占
+    12～23字节，而字符串集合每个URL要一百多字节。指纹冲突的概率在上亿URL时仍可忽略；
+    需要完全精确时传入 exact_path，在磁盘上的SQLite表中保存完整URL，指纹命中后再确认。
+    """
+
+    MAX_LOAD = 0.7
+
+    def __init__(self, capacity=1024, exact_path=None):
+        size = 16
+        while size * self.MAX_LOAD < capacity:
+            size *= 2
+        self._slots = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+        self._db = None
+        self._pending = 0
+        self._path = Path(exact_path) if exact_path else None
+        if exact_path:
+            import sqlite3
+            self._db = sqlite3.connect(str(exact_path))
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=OFF")
+            self._db.execute("CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    @staticmethod
+    def fingerprint(url):
+        """URL的64位指纹（0 表示空槽，不会作为指纹）"""
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'little') or 1
+
+    def _find(self, fingerprint):
+        """线性探测，返回指纹所在的槽或应插入的空槽"""
+        slots, mask = self._slots, self._mask
+        index = fingerprint & mask
+        while slots[index] and slots[index] != fingerprint:
+            index = (index + 1) & mask
+        return index
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array('Q', bytes(16 * len(old)))
+        self._mask = len(self._slots) - 1
+        for fingerprint in old:
+            if fingerprint:
+                self._slots[self._find(fingerprint)] = fingerprint
+
+    def _store_exact(self, url):
+        """写入磁盘上的精确集合，返回是否为新URL"""
+        added = self._db.execute("INSERT OR IGNORE INTO visited (url) VALUES (?)", (url,)).rowcount == 1
+        self._pending += 1
+        if self._pending >= 1000:
+            self._db.commit()
+            self._pending = 0
+        return added
+
+    def add(self, url):
+        """加入URL，返回是否为新URL"""
+        fingerprint = self.fingerprint(url)
+        index = self._find(fingerprint)
+        if self._slots[index] == fingerprint:
+            # 指纹已存在：没有精确集合时视为重复，否则由精确集合判断是否只是指纹冲突
+            if self._db is None or not self._store_exact(url):
+                return False
+            self._count += 1
+            return True
+        self._slots[index] = fingerprint
+        self._count += 1
+        if self._db is not None:
+            self._store_exact(url)
+        if self._count > len(self._slots) * self.MAX_LOAD:
+            self._grow()
+        return True
+
+    def __contains__(self, url):
+        fingerprint = self.fingerprint(url)
+        if self._slots[self._find(fingerprint)] != fingerprint:
+            return False
+        if self._db is None:
+            return True
+        return self._db.execute("SELECT 1 FROM visited WHERE url = ?", (url,)).fetchone() is not None
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def memory_bytes(self):
+        """指纹表占用的内存"""
+        return self._slots.itemsize * len(self._slots)
+
+    def close(self, remove=False):
+        """关闭磁盘上的精确集合，remove 为真时同时删除数据库文件"""
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
+        if remove and self._path:
+            for path in (self._path, Path(f"{self._path}-wal"), Path(f"{self._path}-shm")):
+                path.unlink(missing_ok=True)
+
+
+class CrawlFrontier:
+    """整站爬取的待爬队列：从起始URL开始按广度优先扩展站内链接
+
+    限制最大深度和最大页数，include/exclude 为正则表达式列表（匹配完整URL），
+    只跟随与起始URL同一主机的链接。队列中保存实际请求的URL（clean_url），visited 用
+    VisitedSet 记录已入队URL的规范形式（normalize_url）；队列中最多保留 max_pages 个URL（广度优先时超出的部分不会被爬取），
+    因此内存占用与站点规模无关。
+    """
+
+    def __init__(self, start_url, max_depth=2, max_pages=50, include=(), exclude=(), exact_path=None, seed=True):
+        self.start_url = clean_url(start_url)
+        self.host = urlparse(self.start_url).hostname
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.include = [re.compile(pattern) for pattern in include]
+        self.exclude = [re.compile(pattern) for pattern in exclude]
+        self.queue = deque()
+        self.visited = VisitedSet(exact_path=exact_path)
+        self.crawled = 0
+        self.skipped = 0
+        self.dropped = 0
+        if seed:
+            self.add(self.start_url, 0)
+
+    def allowed(self, url):
+        """检查URL是否符合协议、主机和包含/排除规则"""
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or parsed.hostname != self.host:
+            return False
+        if self.include and not any(pattern.search(url) for pattern in self.include):
+            return False
+        return not any(pattern.search(url) for pattern in self.exclude)
+
+    def add(self, url, depth):
+        """URL未访问且符合规则时入队，返回是否入队"""
+        key = normalize_url(url)
+        if depth > self.max_depth or key in self.visited:
+            return False
+        # 起始URL总是爬取，不受包含/排除规则影响
+        if depth > 0 and not self.allowed(url):
+            self.skipped += 1
+            return False
+        if self.crawled + len(self.queue) >= self.max_pages:
+            self.dropped += 1
+            return False
+        self.visited.add(key)
+        self.queue.append((url, depth))
+        return True
+
+    def add_links(self, links, base_url, depth):
+        """把爬取结果中的站内链接加入队列，返回新入队的URL列表"""
+        added = []
+        for link in (links or {}).get('internal', []):
+            href = link.get('href') if isinstance(link, dict) else link
+            if not href:
+                continue
+            url = clean_url(href, base_url)
+            if self.add(url, depth):
+                added.append(url)
+        return added
+
+    def restore(self, url, depth, state):
+        """按任务日志恢复：已完成或失败的URL计入已爬取，其余重新入队"""
+        self.visited.add(normalize_url(url))
+        if state in (CrawlJournal.DONE, CrawlJournal.FAILED):
+            self.crawled += 1
+        else:
+            self.queue.append((url, depth))
+
+    def pop(self):
+        """取出下一个要爬取的 (url, depth)，队列为空或达到页数上限时返回 None"""
+        if not self.queue or self.crawled >= self.max_pages:
+            return None
+        self.crawled += 1
+        return self.queue.popleft()
+
+    def requeue(self, url, depth):
+        """把暂时失败（被限流）的URL放回队尾，不占用页数名额"""
+        self.crawled -= 1
+        self.queue.append((url, depth))
+
+    def __len__(self):
+        return len(self.queue)
+
+    def close(self, remove=False):
+        self.visited.close(remove)
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 头（秒数或HTTP日期），返回等待秒数，无法解析时返回 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+            return max(0.0, when.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+async def read_body(response, limit):
+    """读取 aiohttp 响应体直到结束或达到 limit 字节，返回 (数据, 是否被截断)
+
+    StreamReader.read(n) 只返回已缓冲的数据，不能用来读取完整的响应体。
+    """
+    chunks = []
+    size = 0
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > limit:
+            return b"".join(chunks)[:limit], True
+    return b"".join(chunks), False
+
+
+async def gather_or_cancel(*coroutines):
+    """并发运行多个协程，返回各自的结果；任一协程出错时取消其余协程，等它们结束后再抛出该错误
+
+    asyncio.gather 出错时不会取消其余协程，阻塞在有界队列上的生产者会让事件循环无法退出。
+    """
+    tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class HttpStatusError(Exception):
+    """HTTP 错误状态码，由重试策略按状态码分类"""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """主机已熔断，请求没有发出"""
+
+
+class RetryPolicy:
+    """共享的重试策略：按错误类别决定是否重试，按主机熔断
+
+    每类错误有各自的最大重试次数，重试前按指数退避加全抖动等待（有 Retry-After 时
+    至少等待该时长）。某主机连续 failure_threshold 个请求出现说明主机本身有问题的错误
+    （DNS、超时、连接、5xx；同一请求的重试只计一次）后熔断 open_seconds 秒，期间对它
+    的请求直接失败，不再占用工作协程；到期后只放行一个探测请求，成功则恢复，失败则再次熔断。
+    """
+
+    # 错误类别 -> 最大重试次数
+    DEFAULT_RETRIES = {
+        'dns': 1,
+        'timeout': 2,
+        'connection': 2,
+        'server': 3,
+        'rate_limited': 2,
+        'browser': 1,
+        'not_found': 0,
+        'client': 0,
+        'other': 1
+    }
+    LABELS = {
+        'dns': "DNS解析失败",
+        'timeout': "超时",
+        'connection': "连接失败",
+        'server': "服务器错误",
+        'rate_limited': "限流",
+        'browser': "浏览器崩溃",
+        'not_found': "页面不存在",
+        'client': "请求错误",
+        'circuit_open': "主机已熔断",
+        'other': "其他错误"
+    }
+    # 计入熔断的错误类别
+    HOST_FAILURES = {'dns', 'timeout', 'connection', 'server'}
+    # 稍后重试也不会成功的错误类别
+    PERMANENT = {'not_found', 'client'}
+    # 按错误信息匹配类别（浏览器返回的是错误文本而不是异常类型），按顺序匹配
+    MESSAGE_PATTERNS = (
+        ('dns', ('err_name_not_resolved', 'name or service not known', 'nodename nor servname',
+                 'temporary failure in name resolution', 'getaddrinfo', 'no address associated')),
+        ('browser', ('target closed', 'target page, context or browser has been closed',
+                     'browser has been closed', 'browser has disconnected', 'page crashed',
+                     'connection closed while reading from the driver')),
+        ('timeout', ('timeout', 'timed out')),
+        ('connection', ('err_connection', 'connection refused', 'connection reset', 'server disconnected',
+                        'cannot connect', 'err_address_unreachable', 'err_internet_disconnected',
+                        'err_ssl', 'ssl')),
+    )
+
+    def __init__(self, retries=None, base=1.0, cap=60.0, failure_threshold=5, open_seconds=60.0):
+        self.retries = {**self.DEFAULT_RETRIES, **(retries or {})}
+        self.base = base
+        self.cap = cap
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._hosts = {}
+
+    @classmethod
+    def classify(cls, error):
+        """错误类别：dns、timeout、connection、server、rate_limited、browser、not_found、client、other"""
+        if isinstance(error, HttpStatusError):
+            if error.status == 429:
+                return 'rate_limited'
+            if error.status in (404, 410):
+                return 'not_found'
+            return 'server' if error.status >= 500 else 'client'
+        if isinstance(error, CircuitOpenError):
+            return 'circuit_open'
+        import socket
+
+        chain = (error, getattr(error, 'os_error', None), error.__cause__, error.__context__)
+        if any(isinstance(item, socket.gaierror) for item in chain):
+            return 'dns'
+        if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+            return 'timeout'
+        message = str(error).lower()
+        for kind, patterns in cls.MESSAGE_PATTERNS:
+            if any(pattern in message for pattern in patterns):
+                return kind
+        if isinstance(error, (ConnectionError, OSError)):
+            return 'connection'
+        return 'other'
+
+    @classmethod
+    def is_permanent(cls, message):
+        """按"类别名称: 错误"格式的错误信息判断是否为永久性错误（工作进程只报告错误信息）"""
+        return (message or '').startswith(tuple(f"{cls.LABELS[kind]}:" for kind in cls.PERMANENT))
+
+    def delay(self, attempt, retry_after=None):
+        """第 attempt 次重试（从0开始）前的等待秒数"""
+        wait = random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        if retry_after is not None:
+            wait = max(wait, min(self.cap, retry_after))
+        return wait
+
+    def _state(self, url):
+        host = urlparse(url).netloc.lower()
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = {'failures': 0, 'open_until': 0.0, 'probing': False, 'opened': 0}
+        return state
+
+    def allow(self, url):
+        """熔断检查：主机熔断期间返回 False，到期后只放行一个探测请求"""
+        state = self._state(url)
+        if not state['open_until']:
+            return True
+        if state['probing'] or time.monotonic() < state['open_until']:
+            return False
+        state['probing'] = True
+        return True
+
+    def record(self, url, kind=None, count=True):
+        """记录一次请求的结果，kind 为 None 表示成功；count 为 False（重试）时不增加连续失败次数"""
+        state = self._state(url)
+        if kind in self.HOST_FAILURES:
+            if count:
+                state['failures'] += 1
+            if state['probing'] or (not state['open_until'] and state['failures'] >= self.failure_threshold):
+                if not state['probing']:
+                    logging.warning(f"{urlparse(url).netloc} 连续失败 {state['failures']} 次，"
+                                    f"暂停请求 {self.open_seconds:.0f} 秒")
+                state['open_until'] = time.monotonic() + self.open_seconds
+                state['opened'] += 1
+                CIRCUIT_OPENS.inc()
+            state['probing'] = False
+        elif kind is None or kind in ('rate_limited', 'not_found', 'client'):
+            # 主机有响应，说明主机本身可用
+            if state['open_until']:
+                logging.info(f"{urlparse(url).netloc} 已恢复")
+            state.update(failures=0, open_until=0.0, probing=False)
+        else:
+            state['probing'] = False
+
+    async def run(self, url, operation):
+        """执行 operation()，按错误类别重试；主机熔断时抛出 CircuitOpenError"""
+        attempt = 0
+        while True:
+            if not self.allow(url):
+                raise CircuitOpenError(f"{urlparse(url).netloc} 连续失败，已暂停请求")
+            try:
+                result = await operation()
+            except Exception as e:
+                kind = self.classify(e)
+                self.record(url, kind, count=attempt == 0)
+                if attempt >= self.retries.get(kind, 0):
+                    raise
+                wait = self.delay(attempt, getattr(e, 'retry_after', None))
+                attempt += 1
+                RETRIES.inc(kind=kind)
+                logging.warning(f"{self.LABELS.get(kind, kind)}，{wait:.1f} 秒后重试"
+                                f"（第 {attempt}/{self.retries[kind]} 次）: {url}: {e}")
+                await asyncio.sleep(wait)
+            else:
+                self.record(url)
+                return result
+
+    def stats(self):
+        """各主机的连续失败次数和熔断次数"""
+        return {host: {'failures': state['failures'], 'opened': state['opened'],
+                       'open': bool(state['open_until'])}
+                for host, state in self._hosts.items()}
+
+
+# 浏览器资源拦截方案：方案名 -> 拦截的资源类型（Playwright 的 resource_type）
+RESOURCE_PROFILES = {
+    'full': frozenset(),
+    'no-media': frozenset({'image', 'media', 'font'}),
+    'text-only': frozenset({'image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest'})
+}
+
+# 常见的广告和统计域名（含子域名），full 以外的方案都会拦截
+TRACKER_DOMAINS = frozenset({
+    'google-analytics.com', 'googletagmanager.com', 'googletagservices.com', 'doubleclick.net',
+    'googlesyndication.com', 'googleadservices.com', 'adservice.google.com', 'connect.facebook.net',
+    'amazon-adsystem.com', 'adnxs.com', 'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com',
+    'scorecardresearch.com', 'quantserve.com', 'hotjar.com', 'segment.io', 'segment.com',
+    'mixpanel.com', 'newrelic.com', 'nr-data.net', 'clarity.ms', 'bat.bing.com', 'mc.yandex.ru',
+    'hm.baidu.com', 'cnzz.com', 'umeng.com', 'tongji.baidu.com', 'pos.baidu.com', 'cpro.baidustatic.com'
+})
+
+
+class ResourceBlocker:
+    """按拦截方案在浏览器中拦截不需要的请求（图片、字体、媒体、样式表和广告统计脚本）
+
+    只做文本提取时这些资源不影响结果，拦截后页面加载更快、流量更少。页面文档本身
+    永远放行。attach 注册为 crawl4ai 的 on_page_context_created 钩子。
+    """
+
+    def __init__(self, profile='full'):
+        if profile not in RESOURCE_PROFILES:
+            raise ValueError(f"未知的资源拦截方案: {profile}")
+        self.profile = profile
+        self.blocked_types = RESOURCE_PROFILES[profile]
+        self.block_trackers = profile != 'full'
+        self.blocked = 0
+        self.allowed = 0
+        # 已注册拦截的浏览器上下文；钩子在每个新页面上都会调用，同一上下文只注册一次
+        self._contexts = weakref.WeakSet()
+
+    @property
+    def active(self):
+        return bool(self.blocked_types) or self.block_trackers
+
+    @staticmethod
+    def is_tracker(url):
+        """URL 是否属于已知的广告或统计域名"""
+        parts = (urlparse(url).hostname or '').lower().split('.')
+        # 依次检查 a.b.example.com、b.example.com、example.com
+        return any('.'.join(parts[i:]) in TRACKER_DOMAINS for i in range(len(parts) - 1))
+
+    def should_block(self, resource_type, url):
+        if resource_type == 'document' or not url.startswith(('http://', 'https://')):
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        return self.block_trackers and self.is_tracker(url)
+
+    async def route(self, route):
+        """Playwright 的请求拦截回调"""
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            self.blocked += 1
+            BLOCKED_REQUESTS.inc(type=request.resource_type)
+            await route.abort()
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+    async def attach(self, page, context=None, **kwargs):
+        """crawl4ai 钩子：在浏览器上下文中注册请求拦截（复用的上下文不重复注册）"""
+        target = context or page
+        if target not in self._contexts:
+            self._contexts.add(target)
+            await target.route("**/*", self.route)
+        return page
+
+
+class StaticCrawlResult:
+    """HTTP 直接请求得到的爬取结果，字段与 crawl4ai 的 CrawlResult 对应，后续处理流程无需区分"""
+
+    def __init__(self, url, html, status_code, response_headers, page=None):
+        self.url = url
+        self.html = html
+        self.status_code = status_code
+        self.response_headers = response_headers
+        self.success = status_code < 400
+        self.error_message = None if self.success else f"HTTP {status_code}"
+        self.fetched_by = 'http'
+        self.title = page.title.strip() if page else ''
+        self.description = page.meta.get('description') if page else None
+        self.keywords = page.meta.get('keywords') if page else None
+        self.links = page.links if page else {'internal': [], 'external': []}
+        self.media = {'images': page.images} if page and page.images else {}
+
+
+class StaticPageParser(HTMLParser):
+    """一次扫描提取标题、meta、链接、图片、正文长度和 noscript 文本，用于判断页面是否需要浏览器渲染"""
+
+    SKIP_TAGS = frozenset({'script', 'style', 'template', 'noscript', 'svg'})
+
+    def __init__(self, base_url):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.host = urlparse(base_url).netloc.lower()
+        self.title = ''
+        self.meta = {}
+        self.links = {'internal': [], 'external': []}
+        self.images = []
+        self.text_length = 0
+        self.noscript = []
+        self._skip = []
+        self._in_title = False
+        self._in_noscript = False
+        self._seen_links = set()
+        self._last_link = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.SKIP_TAGS:
+            self._skip.append(tag)
+            self._in_noscript = self._in_noscript or tag == 'noscript'
+        elif tag == 'title':
+            self._in_title = True
+        elif tag == 'base' and attrs.get('href'):
+            self.base_url = urljoin(self.base_url, attrs['href'])
+        elif tag == 'meta':
+            name = (attrs.get('name') or attrs.get('property') or '').lower()
+            if name in ('description', 'keywords', 'og:title', 'og:description') and attrs.get('content'):
+                self.meta.setdefault(name.replace('og:', ''), attrs['content'].strip())
+        elif tag == 'a' and attrs.get('href'):
+            href = attrs['href'].strip()
+            if href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                return
+            url = urljoin(self.base_url, href)
+            if url in self._seen_links:
+                return
+            self._seen_links.add(url)
+            kind = 'internal' if urlparse(url).netloc.lower() == self.host else 'external'
+            self._last_link = {'href': url, 'text': '', 'title': attrs.get('title') or ''}
+            self.links[kind].append(self._last_link)
+        elif tag == 'img':
+            src = attrs.get('src') or attrs.get('data-src')
+            if src and not src.startswith('data:'):
+                self.images.append({'src': urljoin(self.base_url, src), 'alt': attrs.get('alt') or ''})
+
+    def handle_endtag(self, tag):
+        if self._skip and self._skip[-1] == tag:
+            self._skip.pop()
+            self._in_noscript = 'noscript' in self._skip
+        elif tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif self._in_noscript:
+            self.noscript.append(data)
+        elif not self._skip:
+            text = data.strip()
+            self.text_length += len(text)
+            if text and self.lasttag == 'a' and self._last_link and not self._last_link['text']:
+                self._last_link['text'] = text
+
+
+class HybridCrawler:
+    """先用连接池直接 GET 页面，只有看起来需要 JavaScript 渲染时才交给浏览器
+
+    大部分新闻和文档站点是服务端渲染的静态页面，直接请求比启动浏览器渲染快一个数量级。
+    以下情况使用浏览器：配置了 js_code、wait_for、session_id、截图等只有浏览器才能完成的选项；
+    正文几乎为空；noscript 中提示需要启用 JavaScript；页面只有空的 SPA 挂载点；
+    返回的不是 HTML、超过 MAX_BODY_SIZE 或被站点拒绝（403）。浏览器在第一次需要时才启动，全部是静态页面时不会启动。
+    用法与 AsyncWebCrawler 相同（async with / arun）。
+    """
+
+    # 这些爬取选项只有浏览器能处理
+    BROWSER_OPTIONS = ('js_code', 'wait_for', 'session_id', 'screenshot', 'js_only',
+                       'simulate_user', 'process_iframes')
+    MIN_TEXT_LENGTH = 200
+    MAX_BODY_SIZE = 10 * 1024 * 1024
+    USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+    # React/Vue/Angular/Svelte 等框架的空挂载点，例如 <div id="root"></div>
+    SPA_MOUNT = re.compile(
+        r'<(div|main|section)\b[^>]*\bid=["\']?(root|app|__next|__nuxt|svelte|application)["\']?[^>]*>\s*</\1>'
+        r'|<(app-root)\b[^>]*>\s*</app-root>', re.IGNORECASE)
+    NOSCRIPT_HINTS = re.compile(r'enable\s+javascript|javascript\s+(is\s+)?(required|disabled)|'
+                                r'启用\s*javascript|开启\s*javascript|需要\s*javascript|支持\s*javascript',
+                                re.IGNORECASE)
+    META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+    def __init__(self, browser_factory, connections=100):
+        self.browser_factory = browser_factory
+        self.connections = connections
+        self.session = None
+        self.browser = None
+        self._browser_lock = asyncio.Lock()
+        self.counts = {'http': 0, 'browser': 0}
+        self.reasons = {}
+
+    async def __aenter__(self):
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit=self.connections, ttl_dns_cache=300, ssl=False)
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            headers={'User-Agent': self.USER_AGENT,
+                     'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+                     'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'})
+        return self
+
+    async def __aexit__(self, *exc):
+        if self.session:
+            await self.session.close()
+        if self.browser:
+            await self.browser.__aexit__(*exc)
+        if self.counts['browser']:
+            logging.info(f"HTTP直接请求 {self.counts['http']} 个页面，浏览器渲染 {self.counts['browser']} 个"
+                         f"（{', '.join(f'{k} {v}' for k, v in self.reasons.items())}）")
+
+    def browser_reason(self, config):
+        """配置中需要浏览器的选项，不需要时返回 None"""
+        return next((option for option in self.BROWSER_OPTIONS if config.get(option)), None)
+
+    def page_reason(self, html, page):
+        """根据页面内容判断是否需要浏览器渲染，不需要时返回 None"""
+        if page.text_length < self.MIN_TEXT_LENGTH:
+            if self.SPA_MOUNT.search(html):
+                return "SPA挂载点为空"
+            if self.NOSCRIPT_HINTS.search(' '.join(page.noscript)):
+                return "noscript提示"
+            return "正文过少"
+        return None
+
+    @classmethod
+    def decode(cls, body, charset):
+        """按响应头或 <meta charset> 解码，都没有时使用 UTF-8"""
+        if not charset:
+            match = cls.META_CHARSET.search(body[:4096])
+            charset = match.group(1).decode('ascii') if match else 'utf-8'
+        try:
+            return body.decode(charset, errors='replace')
+        except LookupError:
+            return body.decode('utf-8', errors='replace')
+
+    async def fetch(self, url, config):
+        """直接请求页面，返回 (结果, 需要浏览器的原因)"""
+        import aiohttp
+        timeout = aiohttp.ClientTimeout(total=config.get('timeout') or 60, connect=10)
+        async with self.session.get(url, timeout=timeout) as response:
+            content_type = response.content_type or ''
+            if response.status == 403:
+                return None, "HTTP 403"
+            if response.status < 400 and 'html' not in content_type:
+                return None, f"非HTML({content_type or '未知'})"
+            body, truncated = await read_body(response, self.MAX_BODY_SIZE)
+            if truncated:
+                return None, "页面过大"
+            final_url = str(response.url)
+            headers = dict(response.headers)
+            html = self.decode(body, response.charset)
+            if response.status >= 400:
+                return StaticCrawlResult(final_url, html, response.status, headers), None
+        page = StaticPageParser(final_url)
+        page.feed(html)
+        page.close()
+        reason = self.page_reason(html, page)
+        if reason:
+            return None, reason
+        if config.get('exclude_external_links'):
+            page.links['external'] = []
+        return StaticCrawlResult(final_url, html, response.status, headers, page), None
+
+    async def _browser(self):
+        async with self._browser_lock:
+            if self.browser is None:
+                browser = self.browser_factory()
+                await browser.__aenter__()
+                self.browser = browser
+        return self.browser
+
+    async def arun(self, url, **config):
+        reason = self.browser_reason(config)
+        if reason is None:
+            result, reason = await self.fetch(url, config)
+            if result is not None:
+                self.counts['http'] += 1
+                FETCHES.inc(mode="http")
+                return result
+        self.counts['browser'] += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        FETCHES.inc(mode="browser")
+        logging.debug(f"使用浏览器渲染 {url}: {reason}")
+        browser = await self._browser()
+        return await browser.arun(url=url, **config)
+
+
+class RobotsCache:
+    """按站点缓存解析后的 robots.txt
+
+    4xx（没有 robots.txt）视为全部允许；5xx 或网络错误视为暂时全部禁止
+    （RFC 9309），并用较短的有效期，稍后重新获取。
+    """
+
+    MAX_SIZE = 500 * 1024
+
+    def __init__(self, user_agent="*", ttl=24 * 3600, error_ttl=300, timeout=10):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        self._entries = {}
+        self._locks = {}
+
+    def _parse_crawl_delay(self, lines):
+        """读取适用于 user_agent 的 Crawl-delay（标准库只接受整数秒，这里支持小数）"""
+        agent = self.user_agent.lower()
+        delays = {}
+        group, in_rules = [], False
+        for line in lines:
+            line = line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            key, value = (part.strip() for part in line.split(':', 1))
+            key = key.lower()
+            if key == 'user-agent':
+                if in_rules:
+                    group, in_rules = [], False
+                group.append(value.lower())
+                continue
+            in_rules = True
+            if key == 'crawl-delay':
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for name in group:
+                    delays.setdefault(name, delay)
+        # 优先使用具体 user-agent 的设置，其次是 *
+        for name, delay in delays.items():
+            if name != '*' and name in agent:
+                return delay
+        return delays.get('*', 0.0)
+
+    async def _fetch(self, origin):
+        """获取并解析 robots.txt，返回 (parser, Crawl-delay, 有效期)"""
+        import aiohttp
+        from urllib.robotparser import RobotFileParser
+
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(f"{origin}/robots.txt", ssl=False) as response:
+                    if response.status >= 500:
+                        raise aiohttp.ClientError(f"HTTP {response.status}")
+                    if response.status >= 400:
+                        parser.allow_all = True
+                        return parser, 0.0, self.ttl
+                    body, truncated = await read_body(response, self.MAX_SIZE)
+            if truncated:
+                # 与主流搜索引擎一样只使用上限以内的规则，丢弃被截断的最后一行
+                body = body[:body.rfind(b"\n") + 1]
+                logging.warning(f"{origin}/robots.txt 超过 {self.MAX_SIZE} 字节，只使用前面的规则")
+            lines = body.decode('utf-8', errors='replace').splitlines()
+            parser.parse(lines)
+            return parser, self._parse_crawl_delay(lines), self.ttl
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.warning(f"获取 robots.txt 失败 {origin}: {e}，暂时禁止爬取该站点")
+            parser.disallow_all = True
+            return parser, 0.0, self.error_ttl
+
+    async def get(self, url):
+        """返回URL所在站点的 (RobotFileParser, Crawl-delay)"""
+        parsed = urlparse(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        entry = self._entries.get(origin)
+        if entry and entry[2] > time.monotonic():
+            CACHE_REQUESTS.inc(cache="robots", result="hit")
+            return entry[:2]
+        lock = self._locks.setdefault(origin, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(origin)
+            if entry and entry[2] > time.monotonic():
+                CACHE_REQUESTS.inc(cache="robots", result="hit")
+                return entry[:2]
+            CACHE_REQUESTS.inc(cache="robots", result="miss")
+            parser, delay, ttl = await self._fetch(origin)
+            self._entries[origin] = (parser, delay, time.monotonic() + ttl)
+            return parser, delay
+
+    async def allowed(self, url):
+        parser, _ = await self.get(url)
+        return parser.can_fetch(self.user_agent, url)
+
+    async def crawl_delay(self, url):
+        """robots.txt 中的 Crawl-delay（秒），没有时返回 0"""
+        _, delay = await self.get(url)
+        return delay
+
+
+class HostScheduler:
+    """按主机调度请求，使多个站点可以并行爬取而不会集中请求同一个站点
+
+    每个主机有独立的并发上限和请求间隔（取设置的间隔、robots.txt 的 Crawl-delay
+    和当前退避时间中的最大值）。请求返回 429/503 时退避时间加倍（有 Retry-After 时
+    至少等待该时长），之后的成功请求让退避时间逐步减半直到恢复。失败请求的重试和
+    按主机的熔断由 retry（RetryPolicy）负责。
+    """
+
+    def __init__(self, concurrency=2, delay=1.0, max_delay=120.0, robots=None, retry=None):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.max_delay = max_delay
+        self.robots = robots
+        self.retry = retry or RetryPolicy()
+        self._hosts = {}
+
+    def _state(self, url):
+        host = urlparse(url).netloc.lower()
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = {
+                'semaphore': asyncio.Semaphore(self.concurrency),
+                'next_start': 0.0,
+                'crawl_delay': 0.0,
+                'backoff': 0.0,
+                'requests': 0,
+                'throttled': 0,
+                'blocked': 0
+            }
+        return state
+
+    async def allowed(self, url):
+        """检查 robots.txt 是否允许爬取，同时记录该站点的 Crawl-delay"""
+        if not self.robots:
+            return True
+        state = self._state(url)
+        state['crawl_delay'] = await self.robots.crawl_delay(url)
+        if await self.robots.allowed(url):
+            return True
+        state['blocked'] += 1
+        return False
+
+    def wait_time(self, url):
+        """距离该主机允许开始下一个请求的秒数，0 表示可以立即开始"""
+        return max(0.0, self._state(url)['next_start'] - time.monotonic())
+
+    def interval(self, url):
+        """当前对该主机的请求间隔（秒）"""
+        state = self._state(url)
+        return max(self.delay, state['crawl_delay'], state['backoff'])
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url):
+        """占用该主机的一个请求名额，必要时等待到允许的开始时间"""
+        state = self._state(url)
+        async with state['semaphore']:
+            now = time.monotonic()
+            start = max(now, state['next_start'])
+            # 先预留下一个请求的开始时间，同一主机上等待的请求依次错开
+            state['next_start'] = start + self.interval(url)
+            if start > now:
+                await asyncio.sleep(start - now)
+            state['requests'] += 1
+            yield
+
+    def report(self, url, status=None, retry_after=None):
+        """根据响应状态调整该主机的退避时间"""
+        state = self._state(url)
+        if status in (429, 503):
+            state['throttled'] += 1
+            backoff = max(1.0, self.delay, state['backoff']) * 2
+            if retry_after is not None:
+                backoff = max(backoff, retry_after)
+            state['backoff'] = min(self.max_delay, backoff)
+            state['next_start'] = max(state['next_start'], time.monotonic() + state['backoff'])
+            logging.warning(f"{urlparse(url).netloc} 返回 {status}，请求间隔退避到 {state['backoff']:.1f} 秒")
+        elif status is not None and status < 400 and state['backoff']:
+            state['backoff'] = state['backoff'] / 2 if state['backoff'] / 2 > self.delay else 0.0
+
+    def stats(self):
+        """各主机的请求数、限流次数、当前间隔和熔断次数"""
+        circuits = self.retry.stats()
+        return {
+            host: {
+                'requests': state['requests'],
+                'throttled': state['throttled'],
+                'robots_blocked': state['blocked'],
+                'crawl_delay': state['crawl_delay'],
+                'interval': max(self.delay, state['crawl_delay'], state['backoff']),
+                'circuit_opened': circuits.get(host, {}).get('opened', 0)
+            }
+            for host, state in self._hosts.items()
+        }
+
+
+class HostQueue:
+    """按主机分开的待爬队列，只把可以立即开始请求的主机的URL交给工作协程
+
+    每个主机有自己的先进先出队列，get() 轮流查看各主机，跳过已达到并发上限或还没到
+    下一次开始时间（请求间隔、Crawl-delay、退避）的主机，因此同一主机的一串URL或
+    被限流的主机不会让工作协程都等在它上面。队列元素是以URL开头的元组；工作协程处理完
+    一个元素后调用 done(url)。所有主机的URL总数不超过 maxsize，put() 在队列满时等待；
+    put(None) 表示不再有新的URL，之后队列取空时 get() 返回 None。
+    """
+
+    def __init__(self, scheduler, maxsize=1000):
+        self.scheduler = scheduler
+        self.maxsize = maxsize
+        self._hosts = OrderedDict()
+        self._active = {}
+        self._size = 0
+        self._closed = False
+        # 队列内容或主机占用变化时唤醒等待的协程
+        self._changed = asyncio.Event()
+
+    @staticmethod
+    def _host(url):
+        return urlparse(url).netloc.lower()
+
+    def __len__(self):
+        return self._size
+
+    async def put(self, item):
+        if item is None:
+            self._closed = True
+            self._changed.set()
+            return
+        while self.maxsize and self._size >= self.maxsize:
+            self._changed.clear()
+            await self._changed.wait()
+        self._hosts.setdefault(self._host(item[0]), deque()).append(item)
+        self._size += 1
+        self._changed.set()
+
+    def _ready(self):
+        """取出一个可以立即开始的URL，没有时返回 (None, 最早可开始的等待秒数或 None)"""
+        wait = None
+        for host, items in self._hosts.items():
+            if self._active.get(host, 0) >= self.scheduler.concurrency:
+                continue
+            delay = self.scheduler.wait_time(items[0][0])
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            item = items.popleft()
+            if items:
+                # 轮流调度：取过的主机排到最后
+                self._hosts.move_to_end(host)
+            else:
+                del self._hosts[host]
+            self._active[host] = self._active.get(host, 0) + 1
+            self._size -= 1
+            self._changed.set()
+            return item, None
+        return None, wait
+
+    async def get(self):
+        while True:
+            item, wait = self._ready()
+            if item is not None:
+                return item
+            if self._closed and not self._size:
+                return None
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def done(self, url):
+        """工作协程处理完该URL，释放主机的占用"""
+        host = self._host(url)
+        self._active[host] -= 1
+        if not self._active[host]:
+            del self._active[host]
+        self._changed.set()
+
+
+def parse_feed_date(value):
+    """解析 sitemap/Atom 的 W3C 日期或 RSS 的 RFC 822 日期，返回UTC时间，无法解析时返回 None"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        when = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.astimezone(timezone.utc)
+
+
+class SitemapReader:
+    """流式解析 sitemap、sitemap 索引和 RSS/Atom 订阅，逐条产出 (url, lastmod)
+
+    响应先写入临时文件，再分块送入 XMLPullParser（gzip 文件用 zlib 边读边解压），
+    每个条目处理完立即从树中删除，几万条的 sitemap 也不会整个保存在内存中。
+    sitemap 索引中的子 sitemap 按顺序依次读取。
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    ENTRY_TAGS = {'url', 'sitemap', 'item', 'entry'}
+
+    def __init__(self, max_urls=50000, max_sitemaps=500, timeout=120):
+        self.max_urls = max_urls
+        self.max_sitemaps = max_sitemaps
+        self.timeout = timeout
+        self.sitemaps_read = 0
+        self.errors = []
+
+    @staticmethod
+    def _local(tag):
+        """去掉命名空间，返回小写的标签名"""
+        return tag.rsplit('}', 1)[-1].lower() if isinstance(tag, str) else ''
+
+    def _entry(self, elem):
+        """把一个条目元素转为 (类型, 地址, lastmod)，没有地址时返回 None"""
+        name = self._local(elem.tag)
+        texts = {}
+        links = []
+        for child in elem:
+            child_name = self._local(child.tag)
+            if child_name == 'link':
+                links.append(child)
+            texts.setdefault(child_name, (child.text or '').strip())
+
+        if name in ('url', 'sitemap'):
+            loc = texts.get('loc')
+            lastmod = texts.get('lastmod')
+        elif name == 'item':
+            # RSS：优先 link，其次是永久链接形式的 guid
+            loc = texts.get('link')
+            if not loc and elem.find('guid') is not None and elem.find('guid').get('isPermaLink') != 'false':
+                loc = texts.get('guid')
+            lastmod = texts.get('pubdate') or texts.get('date') or texts.get('updated')
+        else:
+            # Atom：rel 为空或 alternate 的 link
+            loc = next((link.get('href') for link in links
+                        if link.get('rel', 'alternate') == 'alternate' and link.get('href')), None)
+            lastmod = texts.get('updated') or texts.get('published')
+        if not loc:
+            return None
+        return ('sitemap' if name == 'sitemap' else 'url'), loc, parse_feed_date(lastmod)
+
+    def _drain(self, parser, stack):
+        """处理解析器中已就绪的事件，产出完整的条目"""
+        for event, elem in parser.read_events():
+            if event == 'start':
+                stack.append(elem)
+                continue
+            stack.pop()
+            if self._local(elem.tag) in self.ENTRY_TAGS:
+                entry = self._entry(elem)
+                # 已处理的条目从父元素中删除，避免整棵树留在内存中
+                if stack:
+                    del stack[-1][:]
+                if entry:
+                    yield entry
+
+    def _pieces(self, spool):
+        """从临时文件中分块读取，gzip 内容解压后每块也不超过 CHUNK_SIZE"""
+        decompressor = None
+        first = True
+        while True:
+            chunk = spool.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            if first:
+                first = False
+                # 以 .gz 文件提供、没有 Content-Encoding 的 sitemap
+                if chunk[:2] == b'\x1f\x8b':
+                    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            if not decompressor:
+                yield chunk
+                continue
+            # 压缩率很高时一块可以解压出几十倍的数据，限制每次的输出大小
+            yield decompressor.decompress(chunk, self.CHUNK_SIZE)
+            while decompressor.unconsumed_tail:
+                yield decompressor.decompress(decompressor.unconsumed_tail, self.CHUNK_SIZE)
+        if decompressor:
+            yield decompressor.flush()
+
+    async def _parse(self, session, url):
+        """下载一个 sitemap 或订阅并逐条产出 (类型, 地址, lastmod)"""
+        import tempfile
+        import xml.etree.ElementTree as ET
+
+        with tempfile.TemporaryFile() as spool:
+            # 先落盘再解析，下游爬取较慢时不必一直占用连接
+            async with session.get(url, ssl=False) as response:
+                if response.status != 200:
+                    raise ValueError(f"HTTP {response.status}")
+                async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                    spool.write(chunk)
+            spool.seek(0)
+
+            parser = ET.XMLPullParser(events=('start', 'end'))
+            stack = []
+            for piece in self._pieces(spool):
+                parser.feed(piece)
+                for entry in self._drain(parser, stack):
+                    yield entry
+            parser.close()
+            for entry in self._drain(parser, stack):
+                yield entry
+
+    async def iter_entries(self, url):
+        """从 sitemap、sitemap 索引或订阅地址开始，逐条产出页面的 (url, lastmod)"""
+        import aiohttp
+        import xml.etree.ElementTree as ET
+
+        pending = deque([url])
+        seen = set()
+        count = 0
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            while pending and len(seen) < self.max_sitemaps:
+                sitemap_url = pending.popleft()
+                if sitemap_url in seen:
+                    continue
+                seen.add(sitemap_url)
+                self.sitemaps_read = len(seen)
+                try:
+                    async for kind, loc, lastmod in self._parse(session, sitemap_url):
+                        loc = urljoin(sitemap_url, loc)
+                        if kind == 'sitemap':
+                            pending.append(loc)
+                            continue
+                        yield loc, lastmod
+                        count += 1
+                        if count >= self.max_urls:
+                            return
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, ET.ParseError, zlib.error) as e:
+                    logging.error(f"读取站点地图失败 {sitemap_url}: {e}")
+                    self.errors.append({'url': sitemap_url, 'error': str(e)})
+
+
+class LastmodState:
+    """记录每个URL上次成功爬取时的 lastmod，用于判断页面是否需要重新爬取
+
+    没有记录的URL总是需要爬取；有记录但 sitemap 中没有 lastmod 的URL不再重复爬取。
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"读取lastmod状态失败，将重新爬取所有页面: {e}")
+
+    def needs_crawl(self, url, lastmod):
+        entry = self.entries.get(url)
+        if entry is None:
+            return True
+        if lastmod is None:
+            return False
+        previous = parse_feed_date(entry.get('lastmod'))
+        return previous is None or lastmod > previous
+
+    def mark(self, url, lastmod):
+        self.entries[url] = {
+            'lastmod': lastmod.isoformat() if lastmod else None,
+            'crawled_at': datetime.now().isoformat(timespec='seconds')
+        }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+class CrawlJournal:
+    """批量爬取的任务日志，保存在 SQLite（WAL 模式）中
+
+    记录每个任务中每个URL的状态（pending、in_flight、done、failed）、深度、lastmod、
+    尝试次数和错误信息，每次状态变化都立即提交。程序中断后，以相同来源重新开始的
+    任务会恢复未完成的记录：in_flight 重新变为 pending，已完成的URL不再重复爬取。
+    """
+
+    PENDING = 'pending'
+    IN_FLIGHT = 'in_flight'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, path):
+        import sqlite3
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # WAL 模式下 NORMAL 在断电时最多丢失最后几个事务，进程崩溃不会丢失
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                source TEXT NOT NULL,
+                status TEXT NOT NULL,
+                options TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS urls (
+                id INTEGER PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                state TEXT NOT NULL,
+                depth INTEGER NOT NULL DEFAULT 0,
+                lastmod TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated_at TEXT NOT NULL,
+                UNIQUE (job_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS urls_job_state ON urls (job_id, state);
+        """)
+        self.db.commit()
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat(timespec='seconds')
+
+    def open_job(self, kind, source, resume=True, options=None):
+        """开始任务，resume 时继续同一来源未完成的任务，返回 (job_id, 是否为恢复的任务)"""
+        if resume:
+            row = self.db.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND source = ? AND status = 'running' "
+                "ORDER BY created_at DESC LIMIT 1", (kind, source)).fetchone()
+            if row:
+                with self.db:
+                    self.db.execute("UPDATE urls SET state = ? WHERE job_id = ? AND state = ?",
+                                    (self.PENDING, row[0], self.IN_FLIGHT))
+                    self.db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (self._now(), row[0]))
+                return row[0], True
+        digest = hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]
+        job_id = f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{digest}"
+        with self.db:
+            self.db.execute(
+                "INSERT INTO jobs (id, kind, source, status, options, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'running', ?, ?, ?)",
+                (job_id, kind, source, json.dumps(options or {}, ensure_ascii=False), self._now(), self._now()))
+        return job_id, False
+
+    def close_job(self, job_id, status='finished'):
+        with self.db:
+            self.db.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                            (status, self._now(), job_id))
+
+    def add(self, job_id, urls):
+        """批量加入待爬URL，urls 为 (url, depth, lastmod) 列表，已存在的URL保持原状态"""
+        now = self._now()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO urls (job_id, url, state, depth, lastmod, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(job_id, url, self.PENDING, depth, lastmod, now) for url, depth, lastmod in urls])
+
+    def start(self, job_id, url):
+        """标记为正在爬取，尝试次数加一"""
+        with self.db:
+            self.db.execute(
+                "UPDATE urls SET state = ?, attempts = attempts + 1, updated_at = ? WHERE job_id = ? AND url = ?",
+                (self.IN_FLIGHT, self._now(), job_id, url))
+
+    def finish(self, job_id, url, state, error=None):
+        """记录爬取结果（done、failed，或放回队列时的 pending）"""
+        with self.db:
+            self.db.execute(
+                "UPDATE urls SET state = ?, error = ?, updated_at = ? WHERE job_id = ? AND url = ?",
+                (state, error, self._now(), job_id, url))
+
+    def state(self, job_id, url):
+        row = self.db.execute("SELECT state FROM urls WHERE job_id = ? AND url = ?", (job_id, url)).fetchone()
+        return row[0] if row else None
+
+    def rows(self, job_id):
+        """按深度和加入顺序返回任务中的所有 (url, state, depth)"""
+        return self.db.execute(
+            "SELECT url, state, depth FROM urls WHERE job_id = ? ORDER BY depth, id", (job_id,))
+
+    def counts(self, job_id):
+        return dict(self.db.execute(
+            "SELECT state, COUNT(*) FROM urls WHERE job_id = ? GROUP BY state", (job_id,)).fetchall())
+
+    def close(self):
+        self.db.close()
+
+
+class SQLiteWorkQueue:
+    """单机的共享工作队列，保存在 SQLite 文件中，多个爬取进程可以同时租用
+
+    URL 只会入队一次。lease 把待爬的URL租给一个节点并返回租约标识，在 lease_seconds 内没有
+    ack 或 fail 的租约过期后自动回到待爬状态；fail 达到 max_attempts 次后转入死信。
+    ack 和 fail 必须带上租约标识，租约过期后被其他节点租走的URL不会被原来的节点改动。
+    """
+
+    def __init__(self, path, max_attempts=3):
+        import sqlite3
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        # 手动控制事务：租用时用 BEGIN IMMEDIATE 保证多个进程不会取到同一个URL
+        self.db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS queue (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_until REAL,
+                worker TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS queue_state ON queue (state, lease_until);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def push(self, urls):
+        """加入待爬URL，返回新入队的数量（之前入过队的URL不再重复加入）"""
+        with self._transaction():
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO queue (url, state) VALUES (?, 'pending')",
+                                [(url,) for url in urls])
+            return self.db.total_changes - before
+
+    def lease(self, worker, count=1, lease_seconds=300):
+        """租用最多 count 个URL，返回 [(url, 租约标识)]"""
+        now = time.time()
+        with self._transaction():
+            self.db.execute("UPDATE queue SET state = 'pending', worker = NULL "
+                            "WHERE state = 'leased' AND lease_until < ?", (now,))
+            rows = self.db.execute("SELECT id, url, attempts FROM queue WHERE state = 'pending' "
+                                   "ORDER BY id LIMIT ?", (count,)).fetchall()
+            # 租约标识为 节点名#第几次尝试，同一个节点再次租到同一个URL时也不会相同
+            leases = [(row_id, url, f"{worker}#{attempts + 1}") for row_id, url, attempts in rows]
+            self.db.executemany(
+                "UPDATE queue SET state = 'leased', attempts = attempts + 1, lease_until = ?, worker = ? "
+                "WHERE id = ?", [(now + lease_seconds, token, row_id) for row_id, _, token in leases])
+        return [(url, token) for _, url, token in leases]
+
+    def ack(self, url, token):
+        """确认爬取成功，租约已经不属于 token 时返回 False"""
+        with self._transaction():
+            return self.db.execute(
+                "UPDATE queue SET state = 'done', lease_until = NULL, error = NULL "
+                "WHERE url = ? AND state = 'leased' AND worker = ?", (url, token)).rowcount > 0
+
+    def fail(self, url, token, error, retry=True):
+        """记录失败：未达到最大尝试次数时放回队列，否则转入死信，返回是否转入了死信
+
+        租约已经不属于 token（过期后被回收或被其他节点租走）时不做任何改动。
+        """
+        with self._transaction():
+            row = self.db.execute("SELECT attempts FROM queue WHERE url = ? AND state = 'leased' AND worker = ?",
+                                  (url, token)).fetchone()
+            if not row:
+                return False
+            dead = not retry or row[0] >= self.max_attempts
+            self.db.execute("UPDATE queue SET state = ?, lease_until = NULL, error = ? WHERE url = ?",
+                            ('dead' if dead else 'pending', error, url))
+        return dead
+
+    def dead_letters(self, limit=100):
+        """死信中的 [(url, 尝试次数, 最后的错误)]"""
+        return self.db.execute("SELECT url, attempts, error FROM queue WHERE state = 'dead' "
+                               "ORDER BY id LIMIT ?", (limit,)).fetchall()
+
+    def stats(self):
+        counts = dict(self.db.execute("SELECT state, COUNT(*) FROM queue GROUP BY state").fetchall())
+        return {state: counts.get(state, 0) for state in ('pending', 'leased', 'done', 'dead')}
+
+    def set_config(self, config):
+        """保存爬取节点使用的配置"""
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('config', ?)",
+                        (json.dumps(config, ensure_ascii=False),))
+
+    def get_config(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        self.db.close()
+
+
+class RespError(Exception):
+    """RESP 服务返回的错误"""
+
+
+class RespClient:
+    """Redis 协议（RESP2）的最小同步客户端，只实现工作队列用到的请求/响应"""
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, timeout=30):
+        import socket
+
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    @staticmethod
+    def _encode(args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def execute(self, *args):
+        """发送一条命令并返回解析后的响应"""
+        self.sock.sendall(self._encode(args))
+        return self._read()
+
+    def execute_many(self, commands):
+        """一次发送多条命令（流水线），按顺序返回各自的响应"""
+        if not commands:
+            return []
+        self.sock.sendall(b"".join(self._encode(args) for args in commands))
+        return [self._read() for _ in commands]
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("RESP 连接已关闭")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise RespError(payload.decode('utf-8'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            return self.reader.read(length + 2)[:-2].decode('utf-8')
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise RespError(f"无法解析的响应: {line!r}")
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+class RedisWorkQueue:
+    """多机共享的工作队列，使用 Redis 协议的服务（Redis、Valkey 等）保存
+
+    与 SQLiteWorkQueue 的接口相同。待爬URL在 pending 列表中，租用时用 LMOVE 原子地
+    移到 leased 列表，在 deadlines 有序集合中登记租约到期时间，在 owners 哈希中登记
+    租约标识；到期的租约在下次租用时移回 pending。ack 和 fail 先核对租约标识，
+    LREM 的返回值保证同一个URL只会被确认或回收一次。
+    """
+
+    def __init__(self, client, name="crawl", max_attempts=3):
+        self.client = client
+        self.max_attempts = max_attempts
+        self.keys = {key: f"{name}:{key}" for key in (
+            'pending', 'leased', 'deadlines', 'owners', 'attempts', 'errors', 'seen', 'dead', 'done',
+            'config')}
+
+    def push(self, urls):
+        urls = list(urls)
+        added = self.client.execute_many([('SADD', self.keys['seen'], url) for url in urls])
+        new_urls = [url for url, is_new in zip(urls, added) if is_new]
+        if new_urls:
+            self.client.execute('RPUSH', self.keys['pending'], *new_urls)
+        return len(new_urls)
+
+    def _reap(self, lease_seconds):
+        """回收过期的租约"""
+        now = time.time()
+        leased = self.client.execute('LLEN', self.keys['leased'])
+        if leased > self.client.execute('ZCARD', self.keys['deadlines']):
+            # 节点在 LMOVE 之后、登记到期时间之前退出时，URL 留在 leased 中没有到期时间，
+            # 这里补登一个到期时间，过期后正常回收
+            for url in self.client.execute('LRANGE', self.keys['leased'], 0, -1):
+                self.client.execute('ZADD', self.keys['deadlines'], 'NX', now + lease_seconds, url)
+        for url in self.client.execute('ZRANGEBYSCORE', self.keys['deadlines'], '-inf', now):
+            self.client.execute('ZREM', self.keys['deadlines'], url)
+            if self.client.execute('LREM', self.keys['leased'], 1, url):
+                # 先清除租约标识，原来的节点之后的 ack/fail 不再生效
+                self.client.execute('HDEL', self.keys['owners'], url)
+                self.client.execute('RPUSH', self.keys['pending'], url)
+
+    def lease(self, worker, count=1, lease_seconds=300):
+        self._reap(lease_seconds)
+        deadline = time.time() + lease_seconds
+        leased = []
+        for _ in range(count):
+            url = self.client.execute('LMOVE', self.keys['pending'], self.keys['leased'], 'LEFT', 'RIGHT')
+            if url is None:
+                break
+            self.client.execute('ZADD', self.keys['deadlines'], deadline, url)
+            token = f"{worker}#{self.client.execute('HINCRBY', self.keys['attempts'], url, 1)}"
+            self.client.execute('HSET', self.keys['owners'], url, token)
+            leased.append((url, token))
+        return leased
+
+    def _release(self, url, token):
+        """核对租约标识并从 leased 中移除，返回该节点是否仍持有租约"""
+        if self.client.execute('HGET', self.keys['owners'], url) != token:
+            return False
+        self.client.execute('HDEL', self.keys['owners'], url)
+        self.client.execute('ZREM', self.keys['deadlines'], url)
+        return bool(self.client.execute('LREM', self.keys['leased'], 1, url))
+
+    def ack(self, url, token):
+        if not self._release(url, token):
+            return False
+        self.client.execute('INCR', self.keys['done'])
+        self.client.execute('HDEL', self.keys['errors'], url)
+        return True
+
+    def fail(self, url, token, error, retry=True):
+        if not self._release(url, token):
+            # 租约已过期并被回收，由之后租到它的节点处理
+            return False
+        self.client.execute('HSET', self.keys['errors'], url, error or "")
+        attempts = int(self.client.execute('HGET', self.keys['attempts'], url) or 0)
+        if not retry or attempts >= self.max_attempts:
+            self.client.execute('RPUSH', self.keys['dead'], url)
+            return True
+        self.client.execute('RPUSH', self.keys['pending'], url)
+        return False
+
+    def dead_letters(self, limit=100):
+        return [(url, int(self.client.execute('HGET', self.keys['attempts'], url) or 0),
+                 self.client.execute('HGET', self.keys['errors'], url))
+                for url in self.client.execute('LRANGE', self.keys['dead'], 0, limit - 1)]
+
+    def stats(self):
+        return {
+            'pending': self.client.execute('LLEN', self.keys['pending']),
+            'leased': self.client.execute('LLEN', self.keys['leased']),
+            'done': int(self.client.execute('GET', self.keys['done']) or 0),
+            'dead': self.client.execute('LLEN', self.keys['dead'])
+        }
+
+    def set_config(self, config):
+        self.client.execute('SET', self.keys['config'], json.dumps(config, ensure_ascii=False))
+
+    def get_config(self):
+        value = self.client.execute('GET', self.keys['config'])
+        return json.loads(value) if value else None
+
+    def close(self):
+        self.client.close()
+
+
+def open_work_queue(spec, max_attempts=3):
+    """按地址打开工作队列：redis://[:密码@]主机:端口/库号?name=队列名，其他地址视为 SQLite 文件路径"""
+    parsed = urlparse(spec)
+    if parsed.scheme in ('redis', 'resp'):
+        client = RespClient(parsed.hostname or "127.0.0.1", parsed.port or 6379,
+                            db=int(parsed.path.strip('/') or 0), password=parsed.password)
+        name = dict(parse_qsl(parsed.query)).get('name', "crawl")
+        return RedisWorkQueue(client, name=name, max_attempts=max_attempts)
+    return SQLiteWorkQueue(spec[len("sqlite://"):] if spec.startswith("sqlite://") else spec,
+                           max_attempts=max_attempts)
+
+
+class PromptPrefixCache:
+    """缓存共享提示前缀已评估的KV状态，避免每次调用重复评估相同的前缀"""
+
+    def __init__(self, max_entries=2):
+        # KV状态可能占用上百MB内存，只保留少量最近使用的前缀
+        self.max_entries = max_entries
+        self._states = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """获取前缀状态，命中时将其标记为最近使用"""
+        state = self._states.get(key)
+        if state is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache="prompt_prefix", result="miss")
+            return None
+        self._states.move_to_end(key)
+        self.hits += 1
+        CACHE_REQUESTS.inc(cache="prompt_prefix", result="hit")
+        return state
+
+    def put(self, key, state):
+        """保存前缀状态，超出容量时淘汰最久未使用的条目"""
+        self._states[key] = state
+        self._states.move_to_end(key)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)
+
+    def clear(self):
+        """清空所有缓存的状态"""
+        self._states.clear()
+
+
+def estimate_tokens(text):
+    """在没有分词器时粗略估算token数（中日韩字符按1个token，其余约3.5个字符1个token）"""
+    if not text:
+        return 0
+    cjk = len(re.findall(r'[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]', text))
+    return cjk + math.ceil((len(text) - cjk) / 3.5)
+
+
+class TokenBudgetPlanner:
+    """基于分词器的token预算规划：测量提示长度，决定上下文大小、生成长度以及是否分块"""
+
+    # 本地模型的上下文大小按档位取整，避免因细小差异反复重新加载模型
+    CTX_BUCKETS = (2048, 4096, 8192, 16384, 32768, 65536, 131072)
+
+    def __init__(self, count_tokens, max_ctx, output_ratio=1.3, min_output=256, template_overhead=64):
+        self.count_tokens = count_tokens
+        self.max_ctx = max_ctx
+        # 文本优化的输出长度通常与输入相当，按比例预留生成空间
+        self.output_ratio = output_ratio
+        self.min_output = min_output
+        # 对话模板（角色标记等）额外占用的token
+        self.template_overhead = template_overhead
+
+    def round_ctx(self, needed):
+        """将所需上下文大小向上取整到档位"""
+        for bucket in self.CTX_BUCKETS:
+            if bucket >= needed:
+                return min(bucket, self.max_ctx)
+        return self.max_ctx
+
+    def output_budget(self, text_tokens, max_output=None):
+        """根据文本长度估算需要的生成长度"""
+        budget = max(self.min_output, math.ceil(text_tokens * self.output_ratio))
+        if max_output:
+            budget = min(budget, max_output)
+        return budget
+
+    def split_text(self, text, max_tokens, separators=("\n\n", "\n", "。", ". ", " ")):
+        """按段落、行、句子的顺序切分文本，使每块不超过 max_tokens"""
+        if self.count_tokens(text) <= max_tokens:
+            return [text]
+
+        sep = next((sep for sep in separators if sep in text), None)
+        if sep is None:
+            # 没有可用的分隔符，按字符长度硬切
+            step = max(1, len(text) * max_tokens // (self.count_tokens(text) + 1))
+            chunks = []
+            for i in range(0, len(text), step):
+                piece = text[i:i + step]
+                if step > 1 and self.count_tokens(piece) > max_tokens:
+                    chunks.extend(self.split_text(piece, max_tokens, ()))
+                else:
+                    chunks.append(piece)
+            return chunks
+
+        remaining = separators[separators.index(sep) + 1:]
+        parts = text.split(sep)
+        pieces = [part + sep for part in parts[:-1]] + [parts[-1]]
+
+        chunks, current, current_tokens = [], [], 0
+        for piece in pieces:
+            tokens = self.count_tokens(piece)
+            if tokens > max_tokens:
+                if current:
+                    chunks.append("".join(current))
+                    current, current_tokens = [], 0
+                chunks.extend(self.split_text(piece, max_tokens, remaining))
+                continue
+            if current and current_tokens + tokens > max_tokens:
+                chunks.append("".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += tokens
+        if current:
+            chunks.append("".join(current))
+        return [chunk for chunk in chunks if chunk.strip()]
+
+    def plan(self, prefix, text, system_prompt="", max_output=None):
+        """规划一次优化请求
+
+        返回 n_ctx（所有分块共用的上下文大小）以及每个分块的文本、提示token数和 max_tokens。
+        """
+        overhead = (self.count_tokens(system_prompt) + self.count_tokens(prefix)
+                    + self.template_overhead)
+        text_tokens = self.count_tokens(text)
+
+        if overhead + text_tokens + self.output_budget(text_tokens, max_output) <= self.max_ctx:
+            chunk_texts = [text]
+        else:
+            # 每个分块的文本及其输出都必须放进上下文
+            chunk_budget = int((self.max_ctx - overhead) / (1 + self.output_ratio))
+            if chunk_budget < 32:
+                raise ValueError(f"提示前缀过长({overhead} tokens)，模型上下文({self.max_ctx})无法容纳")
+            chunk_texts = self.split_text(text, chunk_budget)
+
+        chunks = []
+        for chunk_text in chunk_texts:
+            chunk_tokens = text_tokens if len(chunk_texts) == 1 else self.count_tokens(chunk_text)
+            prompt_tokens = overhead + chunk_tokens
+            max_tokens = min(self.output_budget(chunk_tokens, max_output), self.max_ctx - prompt_tokens)
+            chunks.append({
+                'text': chunk_text,
+                'prompt_tokens': prompt_tokens,
+                'max_tokens': max(1, max_tokens)
+            })
+
+        n_ctx = self.round_ctx(max(c['prompt_tokens'] + c['max_tokens'] for c in chunks))
+        return {'n_ctx': n_ctx, 'text_tokens': text_tokens, 'overhead': overhead, 'chunks': chunks}
+
+
+# GGUF 元数据值类型：类型编号 -> struct 格式
+GGUF_SCALAR_TYPES = {
+    0: '<B', 1: '<b', 2: '<H', 3: '<h', 4: '<I', 5: '<i',
+    6: '<f', 7: '<?', 10: '<Q', 11: '<q', 12: '<d'
+}
+GGUF_TYPE_STRING = 8
+GGUF_TYPE_ARRAY = 9
+
+# ggml 张量类型：类型编号 -> (名称, 每块元素数, 每块字节数)
+GGML_TENSOR_TYPES = {
+    0: ('F32', 1, 4), 1: ('F16', 1, 2), 2: ('Q4_0', 32, 18), 3: ('Q4_1', 32, 20),
+    6: ('Q5_0', 32, 22), 7: ('Q5_1', 32, 24), 8: ('Q8_0', 32, 34), 9: ('Q8_1', 32, 36),
+    10: ('Q2_K', 256, 84), 11: ('Q3_K', 256, 110), 12: ('Q4_K', 256, 144),
+    13: ('Q5_K', 256, 176), 14: ('Q6_K', 256, 210), 15: ('Q8_K', 256, 292),
+    16: ('IQ2_XXS', 256, 66), 17: ('IQ2_XS', 256, 74), 18: ('IQ3_XXS', 256, 98),
+    19: ('IQ1_S', 256, 50), 20: ('IQ4_NL', 32, 18), 21: ('IQ3_S', 256, 110),
+    22: ('IQ2_S', 256, 82), 23: ('IQ4_XS', 256, 136), 24: ('I8', 1, 1), 25: ('I16', 1, 2),
+    26: ('I32', 1, 4), 27: ('I64', 1, 8), 28: ('F64', 1, 8), 29: ('IQ1_M', 256, 56),
+    30: ('BF16', 1, 2)
+}
+
+# general.file_type -> 量化类型名称
+GGUF_FILE_TYPES = {
+    0: 'F32', 1: 'F16', 2: 'Q4_0', 3: 'Q4_1', 7: 'Q8_0', 8: 'Q5_0', 9: 'Q5_1',
+    10: 'Q2_K', 11: 'Q3_K_S', 12: 'Q3_K_M', 13: 'Q3_K_L', 14: 'Q4_K_S', 15: 'Q4_K_M',
+    16: 'Q5_K_S', 17: 'Q5_K_M', 18: 'Q6_K', 19: 'IQ2_XXS', 20: 'IQ2_XS', 21: 'Q2_K_S',
+    22: 'IQ3_XS', 23: 'IQ3_XXS', 24: 'IQ1_S', 25: 'IQ4_NL', 26: 'IQ3_S', 27: 'IQ3_M',
+    28: 'IQ2_S', 29: 'IQ2_M', 30: 'IQ4_XS', 31: 'IQ1_M', 32: 'BF16'
+}
+
+
+def read_gguf_info(path):
+    """通过 mmap 解析 GGUF 文件头和张量信息（不读取张量数据）
+
+    返回架构、量化类型、上下文长度、参数量等信息；文件不是有效的GGUF或被截断时抛出 ValueError。
+    """
+    path = Path(path)
+    file_size = path.stat().st_size
+    if file_size < 24:
+        raise ValueError(f"文件过小，不是有效的GGUF模型: {file_size} 字节")
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = 0
+
+        def read(fmt):
+            nonlocal pos
+            values = struct.unpack_from(fmt, mm, pos)
+            pos += struct.calcsize(fmt)
+            return values[0]
+
+        def read_string():
+            nonlocal pos
+            length = read('<Q')
+            if pos + length > file_size:
+                raise ValueError("字符串超出文件范围")
+            value = mm[pos:pos + length].decode('utf-8', errors='replace')
+            pos += length
+            return value
+
+        def read_value(value_type):
+            nonlocal pos
+            if value_type in GGUF_SCALAR_TYPES:
+                return read(GGUF_SCALAR_TYPES[value_type])
+            if value_type == GGUF_TYPE_STRING:
+                return read_string()
+            if value_type == GGUF_TYPE_ARRAY:
+                item_type = read('<I')
+                count = read('<Q')
+                if item_type in GGUF_SCALAR_TYPES:
+                    # 数值数组（如词表分数）直接跳过，只记录长度
+                    pos += struct.calcsize(GGUF_SCALAR_TYPES[item_type]) * count
+                    if pos > file_size:
+                        raise ValueError("数组超出文件范围")
+                else:
+                    for _ in range(count):
+                        read_value(item_type)
+                return count
+            raise ValueError(f"未知的元数据类型: {value_type}")
+
+        try:
+            if mm[0:4] != b'GGUF':
+                raise ValueError("文件头魔数不是 GGUF")
+            pos = 4
+            version = read('<I')
+            if version < 2:
+                raise ValueError(f"不支持的GGUF版本: {version}")
+            tensor_count = read('<Q')
+            kv_count = read('<Q')
+
+            metadata = {}
+            for _ in range(kv_count):
+                key = read_string()
+                metadata[key] = read_value(read('<I'))
+
+            parameter_count = 0
+            data_size = 0
+            size_known = True
+            type_counts = {}
+            for _ in range(tensor_count):
+                read_string()  # 张量名称
+                n_dims = read('<I')
+                elements = 1
+                for _ in range(n_dims):
+                    elements *= read('<Q')
+                tensor_type = read('<I')
+                offset = read('<Q')
+                parameter_count += elements
+                type_counts[tensor_type] = type_counts.get(tensor_type, 0) + elements
+                if tensor_type in GGML_TENSOR_TYPES:
+                    _, block_size, type_size = GGML_TENSOR_TYPES[tensor_type]
+                    data_size = max(data_size, offset + elements // block_size * type_size)
+                else:
+                    size_known = False
+        except struct.error:
+            raise ValueError("GGUF头部被截断")
+
+    alignment = metadata.get('general.alignment', 32) or 32
+    data_start = (pos + alignment - 1) // alignment * alignment
+    if size_known and file_size < data_start + data_size:
+        raise ValueError(f"模型文件被截断: {file_size} / {data_start + data_size} 字节")
+
+    architecture = metadata.get('general.architecture', 'unknown')
+    quantization = GGUF_FILE_TYPES.get(metadata.get('general.file_type'))
+    if not quantization and type_counts:
+        # 没有 file_type 时取元素最多的张量类型
+        main_type = max(type_counts, key=type_counts.get)
+        quantization = GGML_TENSOR_TYPES.get(main_type, (str(main_type),))[0]
+
+    return {
+        'version': version,
+        'name': metadata.get('general.name', path.stem),
+        'architecture': architecture,
+        'quantization': quantization or 'unknown',
+        'context_length': metadata.get(f'{architecture}.context_length'),
+        'parameter_count': parameter_count,
+        'tensor_count': tensor_count,
+        'file_size': file_size
+    }
+
+
+def sha256_file(path, chunk_size=8 * 1024 * 1024):
+    """分块计算文件的 SHA-256"""
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def shard_for_url(url, shards):
+    """按主机名哈希分片：同一主机的URL总在同一个工作进程中爬取，每主机的礼貌爬取限制仍然有效"""
+    host = urlparse(url).netloc.lower()
+    digest = hashlib.blake2b(host.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shards
+
+
+class DetachedValue:
+    """工作进程中代替 tk 变量，保存界面设置快照中的值"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class DetachedWidget:
+    """工作进程中代替根窗口和界面控件，丢弃所有界面更新"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+# 传给工作进程和写入共享队列的界面设置：只包含爬取和内容处理用到的变量，
+# 不包含 API 密钥等大模型设置，避免写入共享的队列服务
+CRAWL_SETTINGS = frozenset({
+    'url_var', 'browser_type', 'headless_var', 'verbose_var', 'resource_profile_var', 'http_first_var',
+    'word_count_var', 'timeout_var', 'delay_var', 'js_only_var', 'simulate_user_var', 'magic_var',
+    'screenshot_var', 'exclude_external_links_var', 'exclude_external_images_var',
+    'exclude_social_media_links_var', 'process_iframes_var', 'remove_overlay_var',
+    'enable_js_code_var', 'enable_wait_for_var', 'enable_session_var', 'enable_media_filter_var',
+    'include_images_var', 'include_videos_var', 'include_audios_var', 'media_score_threshold_var',
+    'enable_css_selector_var', 'enable_domain_exclusion_var', 'enable_tag_exclusion_var',
+    'extraction_strategy_var', 'remove_noise_var', 'smart_extract_var', 'content_relevance_var',
+    'output_format', 'enable_custom_format', 'format_options', 'filter_options',
+    'extract_metadata_var', 'metadata_options', 'enable_content_analysis_var', 'content_analysis_options',
+    'enable_page_clone', 'enable_text_extract', 'text_extract_options',
+    'deep_crawl_var', 'deep_crawl_depth_var', 'deep_crawl_max_pages_var', 'deep_crawl_include_var',
+    'deep_crawl_exclude_var', 'deep_crawl_exact_var', 'deep_crawl_workers_var',
+    'deep_crawl_host_concurrency_var', 'deep_crawl_host_delay_var', 'respect_robots_var',
+    'resume_crawl_var', 'sitemap_changed_only_var', 'sitemap_max_urls_var', 'crawl_processes_var'
+})
+
+
+def make_detached_crawler(base_dir, settings):
+    """按界面设置的快照创建不依赖界面的爬虫实例（工作进程和命令行爬取节点使用）"""
+    host = CrawlerGUI.__new__(CrawlerGUI)
+    host.root = DetachedWidget()
+    host.progress_bus = DetachedWidget()
+    host.base_dir = Path(base_dir)
+    host.ensure_directories()
+    host.saved_files = []
+    host._last_result = None
+    host._last_display = None
+    for name, value in settings.items():
+        if isinstance(value, dict):
+            setattr(host, name, {key: DetachedValue(item) for key, item in value.items()})
+        else:
+            setattr(host, name, DetachedValue(value))
+    host._content_processors = host._make_content_processors()
+    return host
+
+
+def run_crawl_shard(shard, base_dir, settings, crawler_config, crawl_config, inbox, events):
+    """工作进程入口：按界面设置的快照创建无界面的爬虫实例，爬取分到本分片的URL
+
+    页面写入共享的输出目录，每个页面的结果和分片结束都通过 events 报告给协调进程。
+    """
+    host = make_detached_crawler(base_dir, settings)
+    try:
+        stats = asyncio.run(host.crawl_shard(shard, crawler_config, crawl_config, inbox, events))
+        events.put(('done', shard, stats))
+    except Exception as e:
+        logging.exception(f"分片 {shard} 爬取失败")
+        events.put(('failed', shard, str(e)))
+
+
+def run_queue_worker(argv):
+    """命令行爬取节点：python test.py --worker 队列地址 [--name 节点名] [--output 目录]
+
+    从共享工作队列租用URL并爬取，使用推送URL时保存在队列中的界面设置。
+    """
+    import argparse
+    import socket
+
+    parser = argparse.ArgumentParser(prog="test.py --worker", description="从共享工作队列租用URL并爬取")
+    parser.add_argument('--worker', required=True, metavar='QUEUE',
+                        help="队列地址：SQLite 文件路径或 redis://主机:端口/库号?name=队列名")
+    parser.add_argument('--name', default=f"{socket.gethostname()}-{os.getpid()}", help="节点名")
+    parser.add_argument('--output', default="out", help="输出目录")
+    parser.add_argument('--lease-seconds', type=float, default=600, help="租约时长，超时未确认的URL回到队列")
+    parser.add_argument('--idle-timeout', type=float, default=60, help="队列为空超过该秒数后退出，0表示一直等待")
+    parser.add_argument('--max-attempts', type=int, default=3, help="失败达到该次数后转入死信")
+    parser.add_argument('--dead-letters', action='store_true', help="列出死信后退出")
+    args = parser.parse_args(argv)
+
+    work_queue = open_work_queue(args.worker, max_attempts=args.max_attempts)
+    try:
+        if args.dead_letters:
+            for url, attempts, error in work_queue.dead_letters(limit=1000):
+                print(f"{url}\t{attempts}\t{error}")
+            return 0
+        config = work_queue.get_config()
+        if not config:
+            logging.error("队列中没有爬取配置，请先在界面中推送URL")
+            return 1
+        host = make_detached_crawler(args.output, config['settings'])
+        counts = asyncio.run(host.crawl_from_queue(
+            work_queue, args.name, config['crawler_config'], config['crawl_config'],
+            lease_seconds=args.lease_seconds, idle_timeout=args.idle_timeout))
+        logging.info(f"爬取节点 {args.name} 结束: {counts}，队列状态 {work_queue.stats()}")
+        return 0
+    finally:
+        work_queue.close()
+
+
 class CrawlerGUI:
     def __init__(self, root):
         # 配置日志
@@ -114,6 +2817,11 @@ class CrawlerGUI:
         main_frame.columnconfigure(1, weight=1)
         main_frame.rowconfigure(1, weight=1)  # 修改为1，为顶部区域留出空间
 
+        # 底部状态栏，显示爬取、保存等状态消息，不随内容分页变化
+        self.status_var = tk.StringVar(value="就绪")
+        status_bar = ttk.Label(root, textvariable=self.status_var, anchor=tk.W, relief=tk.SUNKEN, padding=(5, 2))
+        status_bar.grid(row=1, column=0, sticky=(tk.E, tk.W))
+
         # === 创建顶部URL和爬取区域 ===
         top_frame = ttk.Frame(main_frame)
         top_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.E, tk.W), padx=5, pady=5)
@@ -161,6 +2869,13 @@ class CrawlerGUI:
                         variable=self.headless_var).pack(side=tk.LEFT, padx=5)
         ttk.Checkbutton(options_frame, text="详细日志",
                         variable=self.verbose_var).pack(side=tk.LEFT, padx=5)
+        self.http_first_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="静态页面直接请求",
+                        variable=self.http_first_var).pack(side=tk.LEFT, padx=5)
+        ttk.Label(options_frame, text="资源拦截:").pack(side=tk.LEFT, padx=(10, 0))
+        self.resource_profile_var = tk.StringVar(value="full")
+        ttk.Combobox(options_frame, textvariable=self.resource_profile_var, state="readonly",
+                     values=list(RESOURCE_PROFILES), width=10).pack(side=tk.LEFT, padx=5)
 
         # === 爬取选项区域 ===
         crawl_frame = ttk.LabelFrame(control_frame, text="爬取选项", padding="5")
@@ -277,6 +2992,23 @@ class CrawlerGUI:
         ttk.Checkbutton(screenshot_frame, text="保存截图",
                         variable=self.screenshot_var).pack(side=tk.LEFT, padx=5)
 
+        # 性能分析模式：每次爬取和批量任务生成 cProfile 和内存分配报告
+        self.profile_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(screenshot_frame, text="性能分析模式",
+                        variable=self.profile_var).pack(side=tk.LEFT, padx=5)
+
+        # 指标接口：在本地端口以 Prometheus 文本格式导出计数器和直方图
+        metrics_frame = ttk.Frame(advanced_frame)
+        metrics_frame.pack(fill=tk.X, pady=2)
+        self.metrics_server = None
+        self.metrics_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(metrics_frame, text="指标接口",
+                        variable=self.metrics_var,
+                        command=self.toggle_metrics_server).pack(side=tk.LEFT, padx=5)
+        ttk.Label(metrics_frame, text="端口:").pack(side=tk.LEFT)
+        self.metrics_port_var = tk.IntVar(value=9108)
+        ttk.Entry(metrics_frame, textvariable=self.metrics_port_var, width=6).pack(side=tk.LEFT, padx=5)
+
         timeout_frame = ttk.Frame(advanced_frame)
         timeout_frame.pack(fill=tk.X, pady=2)
         ttk.Label(timeout_frame, text="页面加载超时 (秒):").pack(side=tk.LEFT)
@@ -294,6 +3026,103 @@ class CrawlerGUI:
         ttk.Checkbutton(detection_frame, text="启用反检测",
                         variable=self.magic_var).pack(side=tk.LEFT, padx=5)
 
+        # === 整站爬取区域 ===
+        deep_crawl_frame = ttk.LabelFrame(control_frame, text="整站爬取", padding="5")
+        deep_crawl_frame.pack(fill=tk.X, pady=5)
+
+        self.deep_crawl_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(deep_crawl_frame, text="从当前URL开始爬取站内链接",
+                        variable=self.deep_crawl_var).pack(anchor=tk.W)
+
+        deep_limits_frame = ttk.Frame(deep_crawl_frame)
+        deep_limits_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(deep_limits_frame, text="最大深度:").pack(side=tk.LEFT)
+        self.deep_crawl_depth_var = tk.IntVar(value=2)
+        ttk.Entry(deep_limits_frame, textvariable=self.deep_crawl_depth_var,
+                  width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(deep_limits_frame, text="最大页数:").pack(side=tk.LEFT)
+        self.deep_crawl_max_pages_var = tk.IntVar(value=50)
+        ttk.Entry(deep_limits_frame, textvariable=self.deep_crawl_max_pages_var,
+                  width=6).pack(side=tk.LEFT, padx=5)
+        # 默认只用64位指纹去重；勾选后在磁盘上另存完整URL，排除指纹冲突
+        self.deep_crawl_exact_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(deep_limits_frame, text="磁盘精确去重",
+                        variable=self.deep_crawl_exact_var).pack(side=tk.LEFT, padx=5)
+        # 每个URL的状态记录在 data/crawl_journal.sqlite 中，中断后重新开始时跳过已完成的页面
+        self.resume_crawl_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(deep_limits_frame, text="断点续爬",
+                        variable=self.resume_crawl_var).pack(side=tk.LEFT, padx=5)
+
+        # 礼貌爬取：总并发数，以及每个主机的并发数和请求间隔
+        deep_pacing_frame = ttk.Frame(deep_crawl_frame)
+        deep_pacing_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(deep_pacing_frame, text="并发数:").pack(side=tk.LEFT)
+        self.deep_crawl_workers_var = tk.IntVar(value=4)
+        ttk.Entry(deep_pacing_frame, textvariable=self.deep_crawl_workers_var,
+                  width=4).pack(side=tk.LEFT, padx=5)
+        ttk.Label(deep_pacing_frame, text="每主机并发:").pack(side=tk.LEFT)
+        self.deep_crawl_host_concurrency_var = tk.IntVar(value=2)
+        ttk.Entry(deep_pacing_frame, textvariable=self.deep_crawl_host_concurrency_var,
+                  width=4).pack(side=tk.LEFT, padx=5)
+        ttk.Label(deep_pacing_frame, text="每主机间隔 (秒):").pack(side=tk.LEFT)
+        self.deep_crawl_host_delay_var = tk.DoubleVar(value=1.0)
+        ttk.Entry(deep_pacing_frame, textvariable=self.deep_crawl_host_delay_var,
+                  width=5).pack(side=tk.LEFT, padx=5)
+        self.respect_robots_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(deep_pacing_frame, text="遵守 robots.txt",
+                        variable=self.respect_robots_var).pack(side=tk.LEFT, padx=5)
+
+        # 站点地图/订阅：批量读取URL（留空时使用当前站点的 /sitemap.xml），按 lastmod 只爬取有更新的页面
+        sitemap_frame = ttk.Frame(deep_crawl_frame)
+        sitemap_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(sitemap_frame, text="站点地图/订阅:").pack(side=tk.LEFT)
+        self.sitemap_url_var = tk.StringVar()
+        ttk.Entry(sitemap_frame, textvariable=self.sitemap_url_var).pack(
+            side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        sitemap_options_frame = ttk.Frame(deep_crawl_frame)
+        sitemap_options_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(sitemap_options_frame, text="最多URL:").pack(side=tk.LEFT)
+        self.sitemap_max_urls_var = tk.IntVar(value=50000)
+        ttk.Entry(sitemap_options_frame, textvariable=self.sitemap_max_urls_var,
+                  width=8).pack(side=tk.LEFT, padx=5)
+        self.sitemap_changed_only_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(sitemap_options_frame, text="只爬取有更新的页面",
+                        variable=self.sitemap_changed_only_var).pack(side=tk.LEFT, padx=5)
+        # 大于1时按主机哈希把URL分给多个进程，每个进程有自己的浏览器和事件循环
+        ttk.Label(sitemap_options_frame, text="进程数:").pack(side=tk.LEFT)
+        self.crawl_processes_var = tk.IntVar(value=1)
+        ttk.Entry(sitemap_options_frame, textvariable=self.crawl_processes_var,
+                  width=4).pack(side=tk.LEFT, padx=5)
+        ttk.Button(sitemap_options_frame, text="从站点地图爬取",
+                   command=self.start_sitemap_crawl).pack(side=tk.RIGHT, padx=5)
+
+        # 共享工作队列：SQLite 文件（单机）或 redis://主机:端口/库号?name=队列名（多机），
+        # 推送后在各节点上运行 python test.py --worker 队列地址
+        work_queue_frame = ttk.Frame(deep_crawl_frame)
+        work_queue_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(work_queue_frame, text="工作队列:").pack(side=tk.LEFT)
+        self.work_queue_var = tk.StringVar(value=str(self.directories['data'] / "work_queue.sqlite"))
+        ttk.Entry(work_queue_frame, textvariable=self.work_queue_var).pack(
+            side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        ttk.Button(work_queue_frame, text="推送到工作队列",
+                   command=self.start_queue_push).pack(side=tk.RIGHT, padx=5)
+
+        # 包含/排除规则为空格分隔的正则表达式，匹配完整URL
+        deep_include_frame = ttk.Frame(deep_crawl_frame)
+        deep_include_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(deep_include_frame, text="包含规则:").pack(side=tk.LEFT)
+        self.deep_crawl_include_var = tk.StringVar()
+        ttk.Entry(deep_include_frame, textvariable=self.deep_crawl_include_var).pack(
+            side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        deep_exclude_frame = ttk.Frame(deep_crawl_frame)
+        deep_exclude_frame.pack(fill=tk.X, pady=2)
+        ttk.Label(deep_exclude_frame, text="排除规则:").pack(side=tk.LEFT)
+        self.deep_crawl_exclude_var = tk.StringVar(value=r"\.(pdf|zip|jpg|jpeg|png|gif)$ /logout")
+        ttk.Entry(deep_exclude_frame, textvariable=self.deep_crawl_exclude_var).pack(
+            side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
         # === 页面交互区域 ===
         interaction_frame = ttk.LabelFrame(control_frame, text="页面交互", padding="5")
         interaction_frame.pack(fill=tk.X, pady=5)
@@ -347,34 +3176,10 @@ class CrawlerGUI:
             ttk.Radiobutton(extraction_frame, text=text, variable=self.extraction_strategy_var,
                             value=value, command=self.toggle_extraction_options).pack(anchor=tk.W)
 
-        # JsonCssExtractionStrategy 配置
-        self.jsoncss_config_frame = ttk.Frame(extraction_frame)
-        self.jsoncss_config_frame.pack(fill=tk.X, pady=2)
-        self.jsoncss_config_frame.pack_forget()
-
-        ttk.Label(self.jsoncss_config_frame, text="Json Schema:").pack(anchor=tk.W)
-        self.jsoncss_schema_text = scrolledtext.ScrolledText(
-            self.jsoncss_config_frame, height=10)
-        self.jsoncss_schema_text.pack(fill=tk.X, pady=2)
-
-        # LLMExtractionStrategy 配置
-        self.llm_config_frame = ttk.Frame(extraction_frame)
-        self.llm_config_frame.pack(fill=tk.X, pady=2)
-        self.llm_config_frame.pack_forget()
-
-        ttk.Label(self.llm_config_frame, text="LLM 提供者:").pack(anchor=tk.W)
-        self.llm_provider_var = tk.StringVar(value="ollama/nemotron")
-        ttk.Entry(self.llm_config_frame, textvariable=self.llm_provider_var).pack(fill=tk.X, pady=2)
-
-        ttk.Label(self.llm_config_frame, text="Pydantic Schema:").pack(anchor=tk.W)
-        self.llm_schema_text = scrolledtext.ScrolledText(
-            self.llm_config_frame, height=10)
-        self.llm_schema_text.pack(fill=tk.X, pady=2)
-
-        ttk.Label(self.llm_config_frame, text="指令 (Instruction):").pack(anchor=tk.W)
-        self.llm_instruction_text = scrolledtext.ScrolledText(
-            self.llm_config_frame, height=5)
-        self.llm_instruction_text.pack(fill=tk.X, pady=2)
+        # 策略配置区域在首次选择对应策略时才创建
+        self._extraction_frame = extraction_frame
+        self.jsoncss_config_frame = None
+        self.llm_config_frame = None
 
         # === 高级参数区域 ===
         advanced_params_frame = ttk.LabelFrame(control_frame, text="高���参数", padding="5")
@@ -410,6 +3215,7 @@ class CrawlerGUI:
 
         # 内容标签页
         self.content_frame, self.content_text = create_scrolled_text(self.notebook)
+        self.content_view = PagedTextView(self.content_frame, self.content_text)
         self.notebook.add(self.content_frame, text="内容")
 
         # 媒体标签页
@@ -418,6 +3224,7 @@ class CrawlerGUI:
 
         # 链接标签页
         self.links_frame, self.links_text = create_scrolled_text(self.notebook)
+        self.links_view = PagedTextView(self.links_frame, self.links_text)
         self.notebook.add(self.links_frame, text="链接")
 
         # 文件查看标签页
@@ -679,16 +3486,24 @@ class CrawlerGUI:
         self.toggle_content_analysis()
 
         # 添加内容处理器存储
-        self._content_processors = {
-            'text': self.process_text_content,
-            'markdown': lambda c, o: self.process_markdown_content(c, o, False),
-            'fit_markdown': lambda c, o: self.process_markdown_content(c, o, True),
-            'html': lambda c, o: self.process_html_content(c, o, False),
-            'cleaned_html': lambda c, o: self.process_html_content(c, o, True)
-        }
+        self._content_processors = self._make_content_processors()
         
         # 添加结果缓存
         self._last_result = None
+        self._last_display = None
+        
+        # GGUF文件头解析结果缓存：路径 -> ((大小, 修改时间), 信息)
+        self._gguf_info_cache = {}
+
+        # 常驻的本地模型及其共享提示前缀的KV状态缓存
+        self._local_llm = None
+        self._local_llm_key = None
+        self._local_llm_lock = threading.Lock()
+        self._prompt_prefix_cache = PromptPrefixCache()
+        # 仅加载词表的模型，用于计数token
+        self._local_tokenizers = {}
+        # llama-cpp 上下文不是线程安全的，本地推理固定在一个专用线程中执行
+        self._llm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-llm")
         
         # 网页克隆选项
         clone_frame = ttk.Frame(browser_frame)
@@ -708,6 +3523,9 @@ class CrawlerGUI:
         )
         self.progress_label = ttk.Label(self.progress_frame, text="")
         
+        # 所有耗时操作的进度都经由进度总线合并后刷新
+        self.progress_bus = ProgressBus(self.root)
+        
         # 进度条和标签默认隐藏
         self.progress_frame.pack_forget()
 
@@ -737,724 +3555,557 @@ class CrawlerGUI:
                                               state=tk.DISABLED)
         self.llm_optimize_cb.pack(side=tk.LEFT)
 
-        # LLM设置框架
-        self.llm_settings_frame = ttk.LabelFrame(text_frame, text="LLM优化设置")
-        
-        # 模型类型选择 (只保留这一处定义)
-        model_type_frame = ttk.Frame(self.llm_settings_frame)
-        model_type_frame.pack(fill=tk.X, padx=5, pady=5)
-        ttk.Label(model_type_frame, text="选择模型类型:").pack(side=tk.LEFT)
-        
-        self.model_type_var = tk.StringVar(value="local")  # 设置初始值
-        ttk.Radiobutton(model_type_frame, text="本地模型", 
-                        variable=self.model_type_var, 
-                        value="local",
-                        command=self.toggle_model_settings).pack(side=tk.LEFT, padx=5)
-        ttk.Radiobutton(model_type_frame, text="API模型", 
-                        variable=self.model_type_var, 
-                        value="api",
-                        command=self.toggle_model_settings).pack(side=tk.LEFT, padx=5)
-
-        # 本地模型设置���架 (只保留这一处定义)
-        self.local_model_frame = ttk.LabelFrame(self.llm_settings_frame, text="本地模型设置")
-        self.local_model_frame.pack(fill=tk.X, padx=5, pady=5)
-
-        # 本地模型选择
-        llm_model_frame = ttk.Frame(self.local_model_frame)
-        llm_model_frame.pack(fill=tk.X, padx=5, pady=5)
-        ttk.Label(llm_model_frame, text="选择模型:").pack(side=tk.LEFT)
-
-        self.llm_model_var = tk.StringVar()
-        self.llm_model_combo = ttk.Combobox(llm_model_frame, 
-                                           textvariable=self.llm_model_var,
-                                           values=self.scan_local_models())
-        self.llm_model_combo.pack(side=tk.LEFT, padx=5)
-
-        # 添加模型管理按钮
-        ttk.Button(llm_model_frame, text="模型管理", 
-                  command=self.show_model_manager).pack(side=tk.LEFT, padx=5)
+        # LLM设置面板较大，首次启用LLM优化时才创建
+        self._text_frame = text_frame
+        self.llm_settings_frame = None
+        self._llm_server_process = None
 
-        # 刷新模型列表按钮
-        ttk.Button(llm_model_frame, text="刷新列表", 
-                  command=lambda: self.refresh_models("local")).pack(side=tk.LEFT, padx=5)
 
-        # API模型设置框架 (只保留这一处定义)
-        self.api_model_frame = ttk.LabelFrame(self.llm_settings_frame, text="API模型设置")
-        self.api_model_frame.pack(fill=tk.X, padx=5, pady=5)
-        self.api_model_frame.pack_forget()  # 默认隐藏
+        # 纯文本提取选项初始化
+        self.text_extract_options = {
+            # 基本设置
+            'remove_ads': tk.BooleanVar(value=True),
+            'remove_menus': tk.BooleanVar(value=True),
+            'remove_headers': tk.BooleanVar(value=True),
+            'remove_footers': tk.BooleanVar(value=True),
+            'remove_comments': tk.BooleanVar(value=True),
+            'remove_social': tk.BooleanVar(value=True),
+            
+            # 内��处理
+            'keep_main_content': tk.BooleanVar(value=True),
+            'keep_images': tk.BooleanVar(value=False),
+            'keep_tables': tk.BooleanVar(value=False),
+            'keep_links': tk.BooleanVar(value=False),
+            'keep_lists': tk.BooleanVar(value=True),
+            'keep_formatting': tk.BooleanVar(value=True),
+            
+            # 文本优化
+            'merge_spaces': tk.BooleanVar(value=True),
+            'smart_paragraphs': tk.BooleanVar(value=True),
+            'normalize_spaces': tk.BooleanVar(value=True),
+            'fix_punctuation': tk.BooleanVar(value=True),
+            'remove_empty_lines': tk.BooleanVar(value=True),
+            'combine_short_lines': tk.BooleanVar(value=True),
+            
+            # 格式选项
+            'save_as_word': tk.BooleanVar(value=True),
+            'add_toc': tk.BooleanVar(value=True),
+            'add_page_numbers': tk.BooleanVar(value=True),
+            'add_header_footer': tk.BooleanVar(value=False),
+            'use_styles': tk.BooleanVar(value=True),
+            
+            # 高级设置
+            'extract_article': tk.BooleanVar(value=True),
+            'extract_title': tk.BooleanVar(value=True),
+            'extract_metadata': tk.BooleanVar(value=True),
+            'clean_boilerplate': tk.BooleanVar(value=True),
+            'detect_language': tk.BooleanVar(value=True),
+            
+            # 数值参数
+            'min_text_length': tk.IntVar(value=20),
+            'max_title_length': tk.IntVar(value=200),
+            'paragraph_threshold': tk.IntVar(value=100),
+            'image_min_size': tk.IntVar(value=100),
+            'max_line_length': tk.IntVar(value=80)
+        }
 
-        # API提供商选择
-        api_provider_frame = ttk.Frame(self.api_model_frame)
-        api_provider_frame.pack(fill=tk.X, padx=5, pady=5)
-        ttk.Label(api_provider_frame, text="API提供商:").pack(side=tk.LEFT)
+        # 创建选项卡式布局
+        text_options_notebook = ttk.Notebook(text_frame)
+        text_options_notebook.pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
 
-        self.api_providers = {
-            "Gitee AI": {
-                "base_url": "https://ai.gitee.com/v1",
-                "models": [
-                    "Qwen2.5-72B-Instruct",
-                    "Qwen2.5-32B-Instruct", 
-                    "Qwen2.5-14B-Instruct",
-                    "Qwen2.5-7B-Instruct",
-                    "Qwen2.5-Coder-32B-Instruct",
-                    "Yi-34B-Chat",
-                    "deepseek-coder-33B-instruct",
-                    "glm-4-9b-chat",
-                    "Qwen2-72B-Instruct",
-                    "Qwen2-7B-Instruct",
-                    "code-raccoon-v1",
-                    "codegeex4-all-9b"
-                ]
-            },
-            "OpenAI": {
-                "base_url": "https://api.openai.com/v1",
-                "models": ["gpt-4", "gpt-3.5-turbo"]
-            },
-            "自定义": {
-                "base_url": "",
-                "models": []
-            }
+        # 在 create_scrollable_frame 函数定义之前添加
+        # 定义选项卡内容
+        tabs = {
+            "基本设置": [
+                ("移除广告", 'remove_ads', "移除网页中的广告内容"),
+                ("移除菜单", 'remove_menus', "移除导航菜单"),
+                ("移除页眉", 'remove_headers', "移除页面顶部内容"),
+                ("移除页脚", 'remove_footers', "移除页面底部内容"),
+                ("移除评论", 'remove_comments', "移除用户评论区"),
+                ("移除社交按钮", 'remove_social', "移除社交媒体分享按钮")
+            ],
+            "内容处理": [
+                ("保留主要内容", 'keep_main_content', "���留页面主要内容区域"),
+                ("保留图片", 'keep_images', "保留文章中的图片"),
+                ("保留表格", 'keep_tables', "保留数据表格"),
+                ("留链接", 'keep_links', "保留超链接"),
+                ("保留列表", 'keep_lists', "保留序和无序列表"),
+                ("保留格式", 'keep_formatting', "保留文本格式化")
+            ],
+            "文本优化": [
+                ("合并空白", 'merge_spaces', "合并多余的空白字符"),
+                ("智能段落", 'smart_paragraphs', "智能识别段落结构"),
+                ("规范化空格", 'normalize_spaces', "统一空格使用"),
+                ("修正标点", 'fix_punctuation', "修正标点符号使用"),
+                ("移除多余行", 'remove_empty_lines', "移除多余的空行"),
+                ("合并短行", 'combine_short_lines', "合并过短的文本行")
+            ],
+            "格式选项": [
+                ("保存为Word", 'save_as_word', "将内容保存为Word文档"),
+                ("添加目录", 'add_toc', "在文档中添加目录"),
+                ("添加页码", 'add_page_numbers', "添加页码"),
+                ("加页眉页脚", 'add_header_footer', "添加页眉和页脚"),
+                ("使用样式", 'use_styles', "应用预定义的样式")
+            ],
+            "高级设置": [
+                ("提取文章", 'extract_article', "智能提取主要文章内容"),
+                ("提取标题", 'extract_title', "提取页面标题"),
+                ("提取元数据", 'extract_metadata', "提取页面元数据"),
+                ("清理样板文本", 'clean_boilerplate', "移除重复的样板文本"),
+                ("检测语言", 'detect_language', "检测文本语言")
+            ],
+            "数值参数": [
+                ("最小文本长度", 'min_text_length', "设置最小文本长度阈值"),
+                ("最大标题长度", 'max_title_length', "设置最大标题长度"),
+                ("段落阈值", 'paragraph_threshold', "设置段落字数阈值"),
+                ("最小图片尺寸", 'image_min_size', "设置��小图片尺寸"),
+                ("最大行长度", 'max_line_length', "设置最大行字符数")
+            ]
         }
 
-        self.api_provider_var = tk.StringVar(value="Gitee AI")
-        self.api_provider_combo = ttk.Combobox(api_provider_frame, 
-                                          textvariable=self.api_provider_var,
-                                          values=list(self.api_providers.keys()))
-        self.api_provider_combo.pack(side=tk.LEFT, padx=5)
-        self.api_provider_combo.bind('<<ComboboxSelected>>', self.on_api_provider_change)
-
-        # API URL输入框
-        api_url_frame = ttk.Frame(self.api_model_frame)
-        api_url_frame.pack(fill=tk.X, padx=5, pady=5)
-        ttk.Label(api_url_frame, text="API URL:").pack(side=tk.LEFT)
-        self.api_url_var = tk.StringVar(value=self.api_providers["Gitee AI"]["base_url"])
-        self.api_url_entry = ttk.Entry(api_url_frame, textvariable=self.api_url_var)
-        self.api_url_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
-
-        # 修改 API Key 输入框部分的布局
-        api_key_frame = ttk.Frame(self.api_model_frame)
-        api_key_frame.pack(fill=tk.X, padx=5, pady=5)
+        # 修改 create_scrollable_frame 函数
+        def create_scrollable_frame(parent):
+            frame = ttk.Frame(parent)
+            
+            # 创建水平和垂直滚动条
+            h_scrollbar = ttk.Scrollbar(frame, orient="horizontal")
+            v_scrollbar = ttk.Scrollbar(frame, orient="vertical")
+            canvas = tk.Canvas(frame, height=150,  # 减小高度使界面更紧凑
+                              xscrollcommand=h_scrollbar.set,
+                              yscrollcommand=v_scrollbar.set)
+            
+            scrollable_frame = ttk.Frame(canvas)
+            
+            # 配置滚动条
+            h_scrollbar.config(command=canvas.xview)
+            v_scrollbar.config(command=canvas.yview)
+            
+            # 绑定框架大小变化事件
+            def configure_scroll_region(event):
+                canvas.configure(scrollregion=canvas.bbox("all"))
+            scrollable_frame.bind("<Configure>", configure_scroll_region)
+            
+            # 创建窗口
+            canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+            
+            # 绑定鼠标滚轮事件
+            def _on_mousewheel(event):
+                if event.state == 0:  # 没有按住Shift键
+                    canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+                else:  # 按住Shift键进行水平滚动
+                    canvas.xview_scroll(int(-1*(event.delta/120)), "units")
+            
+            canvas.bind_all("<MouseWheel>", _on_mousewheel)
+            canvas.bind_all("<Shift-MouseWheel>", _on_mousewheel)
+            
+            # 布局
+            canvas.grid(row=0, column=0, sticky="nsew")
+            v_scrollbar.grid(row=0, column=1, sticky="ns")
+            h_scrollbar.grid(row=1, column=0, sticky="ew")
+            
+            # 配置网格权重
+            frame.grid_rowconfigure(0, weight=1)
+            frame.grid_columnconfigure(0, weight=1)
+            
+            return frame, scrollable_frame
 
-        # 创建左侧框架用于标签和输入框
-        left_frame = ttk.Frame(api_key_frame)
-        left_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        # 选项卡内容在首次切换到该页时才创建
+        built_tabs = set()
 
-        ttk.Label(left_frame, text="API Key:").pack(side=tk.LEFT)
+        def build_tab(tab_name):
+            if tab_name in built_tabs:
+                return
+            built_tabs.add(tab_name)
+            options = tabs[tab_name]
+            scrollable_frame = tab_frames[tab_name]
+            
+            # 使用网格布局来排列选项
+            row = 0
+            col = 0
+            max_cols = 2  # 每行显示的选项数
+            
+            for i, (text, option_name, tooltip) in enumerate(options):
+                option_frame = ttk.Frame(scrollable_frame)
+                option_frame.grid(row=row, column=col, padx=5, pady=2, sticky="w")
+                
+                if tab_name != "数值参数":
+                    # 复选框选项
+                    var = self.text_extract_options[option_name]
+                    cb = ttk.Checkbutton(option_frame, text=text, variable=var)
+                    cb.pack(side=tk.LEFT)
+                    
+                    # 添加工具示标签（使用较短的提示文本）
+                    ttk.Label(option_frame, text=f"({tooltip})", 
+                             foreground="gray", wraplength=200).pack(side=tk.LEFT, padx=5)
+                else:
+                    # 数值输入��项
+                    ttk.Label(option_frame, text=text).pack(side=tk.LEFT)
+                    ttk.Entry(option_frame, textvariable=self.text_extract_options[option_name], 
+                             width=6).pack(side=tk.LEFT, padx=2)
+                    ttk.Label(option_frame, text=f"({tooltip})", 
+                             foreground="gray", wraplength=150).pack(side=tk.LEFT, padx=2)
+                
+                # 更新行列位置
+                col += 1
+                if col >= max_cols:
+                    col = 0
+                    row += 1
 
-        # 修改默认值为两个 key 的组合
-        default_keys = [
-            "99ZE2NVXCNLWIVWC6HQBGV5GMIKCEA9D8FXL16XN",
-            "R6XZ3CRX2ZXWZ5XLCR3CLHDRNNQB6OAHYHTMJCU6"  # 更新为新的 Key
-        ]
-        self.api_key_var = tk.StringVar(value=",".join(default_keys))
-        self.api_key_entry = ttk.Entry(left_frame, textvariable=self.api_key_var, show="*")
-        self.api_key_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        tab_frames = {}
+        for tab_name in tabs:
+            frame, tab_frames[tab_name] = create_scrollable_frame(text_options_notebook)
+            text_options_notebook.add(frame, text=tab_name)
 
-        # 创建右侧框架用于按钮和指示器
-        right_frame = ttk.Frame(api_key_frame)
-        right_frame.pack(side=tk.RIGHT)
+        text_options_notebook.bind(
+            "<<NotebookTabChanged>>",
+            lambda e: build_tab(text_options_notebook.tab(text_options_notebook.select(), "text")))
+        build_tab(next(iter(tabs)))
 
-        # 添加当前使用的 Key 标签
-        self.key_indicator = ttk.Label(right_frame, text="使用: Key 1/2")
-        self.key_indicator.pack(side=tk.LEFT, padx=5)
+        # 设置选项卡整体高度和宽度
+        text_options_notebook.configure(height=180, width=400)  # 减小高度，设置合适的宽度
 
-        # 添加切换 API Key 的按钮
-        ttk.Button(right_frame, text="切换Key", 
-          command=self.switch_api_key).pack(side=tk.LEFT, padx=5)
+    def toggle_js_code(self, *args):
+        if self.enable_js_code_var.get():
+            self.js_code_text.config(state=tk.NORMAL)
+        else:
+            self.js_code_text.delete('1.0', tk.END)
+            self.js_code_text.config(state=tk.DISABLED)
 
-        # API模型选择
-        api_model_select_frame = ttk.Frame(self.api_model_frame)
-        api_model_select_frame.pack(fill=tk.X, padx=5, pady=5)
-        ttk.Label(api_model_select_frame, text="选择模型:").pack(side=tk.LEFT)
-        self.api_model_var = tk.StringVar()
-        self.api_model_combo = ttk.Combobox(api_model_select_frame, 
-                                       textvariable=self.api_model_var,
-                                       values=self.api_providers["Gitee AI"]["models"])
-        self.api_model_combo.pack(side=tk.LEFT, padx=5)
+    def toggle_wait_for(self, *args):
+        if self.enable_wait_for_var.get():
+            self.wait_for_text.config(state=tk.NORMAL)
+        else:
+            self.wait_for_text.delete('1.0', tk.END)
+            self.wait_for_text.config(state=tk.DISABLED)
 
-        # 刷新API模型列表按钮
-        ttk.Button(api_model_select_frame, text="刷新模型列表", 
-                    command=lambda: self.refresh_models("api")).pack(side=tk.LEFT, padx=5)
+    def toggle_session_id(self, *args):
+        if self.enable_session_var.get():
+            self.session_id_entry.config(state=tk.NORMAL)
+        else:
+            self.session_id_var.set("")
+            self.session_id_entry.config(state=tk.DISABLED)
 
-        # 添加提示词设置框架
-        prompt_settings_frame = ttk.LabelFrame(self.api_model_frame, text="提示词设置")
-        prompt_settings_frame.pack(fill=tk.X, padx=5, pady=5)
+    def _ensure_extraction_config_frames(self):
+        """首次使用时创建提取策略的配置区域"""
+        if self.jsoncss_config_frame is not None:
+            return
+        extraction_frame = self._extraction_frame
 
-        # 添加默认提示词
-        self.default_system_prompt = """你是一个专业的文本优化助手。请按照以下要求优化文本:
-1. 保持原文的核心内容和主要信息不变
-2. 优化文本结构, 使段落组织更加合理
-3. 改善表达方式, 使语言更加流畅自然
-4. 纠正语法错误和不准确的表述
-5. 调整格式, 使文本更易阅读
+        # JsonCssExtractionStrategy 配置
+        self.jsoncss_config_frame = ttk.Frame(extraction_frame)
 
-请直接返回优化后的文本, 无需解释修改内容."""
+        ttk.Label(self.jsoncss_config_frame, text="Json Schema:").pack(anchor=tk.W)
+        self.jsoncss_schema_text = scrolledtext.ScrolledText(
+            self.jsoncss_config_frame, height=10)
+        self.jsoncss_schema_text.pack(fill=tk.X, pady=2)
 
-        # 创建提示词编辑区域
-        self.enable_custom_system_prompt = tk.BooleanVar(value=False)
-        ttk.Checkbutton(prompt_settings_frame, text="自定义系统提示词",
-                        variable=self.enable_custom_system_prompt,
-                        command=self.toggle_system_prompt).pack(anchor=tk.W)
+        # LLMExtractionStrategy 配置
+        self.llm_config_frame = ttk.Frame(extraction_frame)
 
-        self.system_prompt_text = scrolledtext.ScrolledText(
-            prompt_settings_frame, height=8, width=50, state=tk.DISABLED)
-        self.system_prompt_text.pack(fill=tk.X, pady=2)
+        ttk.Label(self.llm_config_frame, text="LLM 提供者:").pack(anchor=tk.W)
+        self.llm_provider_var = tk.StringVar(value="ollama/nemotron")
+        ttk.Entry(self.llm_config_frame, textvariable=self.llm_provider_var).pack(fill=tk.X, pady=2)
 
-        # 显示默认提示词（灰色）
-        self.system_prompt_text.configure(state=tk.NORMAL)
-        self.system_prompt_text.insert(tk.END, self.default_system_prompt)
-        self.system_prompt_text.configure(state=tk.DISABLED, fg='gray')
+        ttk.Label(self.llm_config_frame, text="Pydantic Schema:").pack(anchor=tk.W)
+        self.llm_schema_text = scrolledtext.ScrolledText(
+            self.llm_config_frame, height=10)
+        self.llm_schema_text.pack(fill=tk.X, pady=2)
 
-        # 添加重置按钮
-        ttk.Button(prompt_settings_frame, text="重置为默认提示词",
-                   command=self.reset_system_prompt).pack(anchor=tk.E, pady=2)
+        ttk.Label(self.llm_config_frame, text="指令 (Instruction):").pack(anchor=tk.W)
+        self.llm_instruction_text = scrolledtext.ScrolledText(
+            self.llm_config_frame, height=5)
+        self.llm_instruction_text.pack(fill=tk.X, pady=2)
 
-        # API参数设置框架
-        api_params_frame = ttk.LabelFrame(self.api_model_frame, text="API参数设置")
-        api_params_frame.pack(fill=tk.X, padx=5, pady=5)
+    def toggle_extraction_options(self):
+        strategy = self.extraction_strategy_var.get()
+        if strategy != "none":
+            self._ensure_extraction_config_frames()
+        elif self.jsoncss_config_frame is None:
+            return
+        if strategy == "jsoncss":
+            self.jsoncss_config_frame.pack(fill=tk.X, pady=2)
+            self.llm_config_frame.pack_forget()
+        elif strategy == "llm":
+            self.llm_config_frame.pack(fill=tk.X, pady=2)
+            self.jsoncss_config_frame.pack_forget()
+        else:
+            self.jsoncss_config_frame.pack_forget()
+            self.llm_config_frame.pack_forget()
 
-        # API参数变量
-        self.api_params = {
-            'stream': tk.BooleanVar(value=False),
-            'max_tokens': tk.IntVar(value=512),
-            'temperature': tk.DoubleVar(value=0.7),
-            'top_p': tk.DoubleVar(value=0.7),
-            'top_k': tk.IntVar(value=50),
-            'frequency_penalty': tk.IntVar(value=1)
+    def _make_content_processors(self):
+        """输出格式 -> 内容处理器"""
+        return {
+            'text': self.process_text_content,
+            'markdown': lambda c, o: self.process_markdown_content(c, o, False),
+            'fit_markdown': lambda c, o: self.process_markdown_content(c, o, True),
+            'html': lambda c, o: self.process_html_content(c, o, False),
+            'cleaned_html': lambda c, o: self.process_html_content(c, o, True)
         }
 
-        # 创建参数输入界面
-        def create_param_entry(parent, label, var, default_value, tooltip):
-            frame = ttk.Frame(parent)
-            frame.pack(fill=tk.X, pady=2)
-            ttk.Label(frame, text=f"{label}:").pack(side=tk.LEFT)
-            
-            if isinstance(var, tk.BooleanVar):
-                ttk.Checkbutton(frame, variable=var).pack(side=tk.LEFT, padx=5)
-            else:
-                ttk.Entry(frame, textvariable=var, width=10).pack(side=tk.LEFT, padx=5)
-            
-            ttk.Label(frame, text=f"(默认: {default_value})", 
-                     foreground="gray").pack(side=tk.LEFT)
-            ttk.Label(frame, text=f"- {tooltip}", 
-                     foreground="gray").pack(side=tk.LEFT, padx=5)
+    def _settings_snapshot(self):
+        """界面设置的快照（CRAWL_SETTINGS 中的 tk 变量及其字典的当前值），传给工作进程"""
+        snapshot = {}
+        for name, value in vars(self).items():
+            if name not in CRAWL_SETTINGS:
+                continue
+            if isinstance(value, tk.Variable):
+                snapshot[name] = value.get()
+            elif isinstance(value, dict) and value and all(isinstance(v, tk.Variable) for v in value.values()):
+                snapshot[name] = {key: var.get() for key, var in value.items()}
+        return snapshot
 
-        # 参数说明
-        params_info = {
-            'stream': ("流式响应", "False", "启用流式返回生成的文本"),
-            'max_tokens': ("最大生成长度", "512", "生成文本的最大token数量"),
-            'temperature': ("温度系数", "0.7", "控制生成文本的随机性，值越大越随机"),
-            'top_p': ("Top P", "0.7", "控制生成文本的多��性"),
-            'top_k': ("Top K", "50", "从概率最大的K个词中采样"),
-            'frequency_penalty': ("频率惩罚", "1", "降低重复文本的生成概率")
+    def ensure_directories(self):
+        """确保所有必要的目录都存在"""
+        # 创建主要目录
+        directories = {
+            'data': self.base_dir / "data",
+            'content': self.base_dir / "content",
+            'screenshots': self.base_dir / "screenshots",
+            'media': self.base_dir / "media",
+            'links': self.base_dir / "links"
         }
 
-        # 创建参数输入界面
-        for param, var in self.api_params.items():
-            label, default, tooltip = params_info[param]
-            create_param_entry(api_params_frame, label, var, default, tooltip)
-
-        # 添加重置按钮
-        def reset_params():
-            self.api_params['stream'].set(False)
-            self.api_params['max_tokens'].set(512)
-            self.api_params['temperature'].set(0.7)
-            self.api_params['top_p'].set(0.7)
-            self.api_params['top_k'].set(50)
-            self.api_params['frequency_penalty'].set(1)
+        for dir_path in directories.values():
+            dir_path.mkdir(parents=True, exist_ok=True)
 
-        reset_frame = ttk.Frame(api_params_frame)
-        reset_frame.pack(fill=tk.X, pady=5)
-        ttk.Button(reset_frame, text="重置为默认值", 
-                  command=reset_params).pack(side=tk.RIGHT)
+        self.directories = directories
 
-        # 优化选项框架 (共用，只保留这一处定义)
-        optimize_options_frame = ttk.LabelFrame(self.llm_settings_frame, text="优化选项")
-        optimize_options_frame.pack(fill=tk.X, padx=5, pady=5)
+    def get_safe_filename(self, url):
+        """生成安全的文件名"""
+        # 从URL中提取域名
+        domain = urlparse(url).netloc
+        if not domain:
+            domain = 'unknown_domain'
+        # 移除非法字符
+        domain = re.sub(r'[<>:"/\\|?*]', '_', domain)
+        # 生成时间戳
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # 带路径或查询参数的URL加上短哈希，整站爬取时同一秒内的不同页面不会互相覆盖
+        parsed = urlparse(url)
+        if parsed.path.strip('/') or parsed.query:
+            digest = hashlib.sha1(f"{parsed.path}?{parsed.query}".encode('utf-8')).hexdigest()[:8]
+            return f"{domain}_{timestamp}_{digest}"
+        # 组合文件名
+        return f"{domain}_{timestamp}"
 
-        # 定义一次优化选项
-        self.llm_optimize_options = {
-            'improve_readability': tk.BooleanVar(value=True),
-            'enhance_structure': tk.BooleanVar(value=True),
-            'fix_grammar': tk.BooleanVar(value=True),
-            'summarize': tk.BooleanVar(value=False),
-            'translate': tk.BooleanVar(value=False)
-        }
+    def save_content(self, content, url, format_type):
+        """保存内容到文件"""
+        filename = self.get_safe_filename(url)
+        file_path = self.directories['content'] / f"{filename}_{format_type}.txt"
 
-        # 创建优化选项界面
-        for i, (option, var) in enumerate(self.llm_optimize_options.items()):
-            row = i // 2
-            col = i % 2
-            option_frame = ttk.Frame(optimize_options_frame)
-            option_frame.grid(row=row, column=col, padx=5, pady=2, sticky="w")
-            
-            text_map = {
-                'improve_readability': "提升可读性",
-                'enhance_structure': "优化结构",
-                'fix_grammar': "修正语法",
-                'summarize': "生成摘要",
-                'translate': "翻译"
-            }
-            
-            ttk.Checkbutton(option_frame, text=text_map[option],
-                           variable=var).pack(side=tk.LEFT)
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            self.saved_files.append(file_path)
+            return file_path
+        except Exception as e:
+            logging.error(f"保存内容失败: {e}")
+            return None
 
-        # 自定义提示词框架 (共用)
-        prompt_frame = ttk.LabelFrame(self.llm_settings_frame, text="自定义提示词")
-        prompt_frame.pack(fill=tk.X, padx=5, pady=5)
+    def save_links(self, links, url):
+        """保存链接信息"""
+        filename = self.get_safe_filename(url)
+        file_path = self.directories['links'] / f"{filename}_links.json"
 
-        # 添加自定义提示词开关
-        self.enable_custom_prompt = tk.BooleanVar(value=False)
-        ttk.Checkbutton(prompt_frame, text="启用自定义提示词",
-                        variable=self.enable_custom_prompt,
-                        command=self.toggle_custom_prompt).pack(anchor=tk.W)
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(links, f, ensure_ascii=False, indent=2)
+            self.saved_files.append(file_path)
+            return file_path
+        except Exception as e:
+            logging.error(f"保存链接信息失败: {e}")
+            return None
 
-        # 添加提示词输入框
-        self.custom_prompt_text = scrolledtext.ScrolledText(
-            prompt_frame, height=4, state=tk.DISABLED)
-        self.custom_prompt_text.pack(fill=tk.X, pady=2)
+    def save_media_info(self, media, url):
+        """保存媒体信息"""
+        filename = self.get_safe_filename(url)
+        file_path = self.directories['media'] / f"{filename}_media.json"
 
-        # 添加说明标签
-        ttk.Label(prompt_frame, text="不输入则使用默认提示词", 
-                 foreground="gray").pack(anchor=tk.W)
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(media, f, ensure_ascii=False, indent=2)
+            self.saved_files.append(file_path)
+            return file_path
+        except Exception as e:
+            logging.error(f"保存媒体信息失���: {e}")
+            return None
 
-        # 批量处理按钮 (共用)
-        batch_frame = ttk.Frame(self.llm_settings_frame)
-        batch_frame.pack(fill=tk.X, padx=5, pady=5)
-        ttk.Button(batch_frame, text="选择文件进行批量优化",
-                   command=self.batch_optimize_files).pack(side=tk.LEFT)
+    def save_screenshot(self, screenshot_data, url):
+        """保存截图"""
+        if not screenshot_data:
+            logging.warning("截图数据为空")
+            return None
 
-        # 初始状态下隐藏LLM设置框架
-        self.llm_settings_frame.pack_forget()
+        try:
+            filename = self.get_safe_filename(url)
+            screenshot_path = self.directories['screenshots'] / f"{filename}.png"
 
-        # 纯文本提取选项初始化
-        self.text_extract_options = {
-            # 基本设置
-            'remove_ads': tk.BooleanVar(value=True),
-            'remove_menus': tk.BooleanVar(value=True),
-            'remove_headers': tk.BooleanVar(value=True),
-            'remove_footers': tk.BooleanVar(value=True),
-            'remove_comments': tk.BooleanVar(value=True),
-            'remove_social': tk.BooleanVar(value=True),
-            
-            # 内��处理
-            'keep_main_content': tk.BooleanVar(value=True),
-            'keep_images': tk.BooleanVar(value=False),
-            'keep_tables': tk.BooleanVar(value=False),
-            'keep_links': tk.BooleanVar(value=False),
-            'keep_lists': tk.BooleanVar(value=True),
-            'keep_formatting': tk.BooleanVar(value=True),
-            
-            # 文本优化
-            'merge_spaces': tk.BooleanVar(value=True),
-            'smart_paragraphs': tk.BooleanVar(value=True),
-            'normalize_spaces': tk.BooleanVar(value=True),
-            'fix_punctuation': tk.BooleanVar(value=True),
-            'remove_empty_lines': tk.BooleanVar(value=True),
-            'combine_short_lines': tk.BooleanVar(value=True),
-            
-            # 格式选项
-            'save_as_word': tk.BooleanVar(value=True),
-            'add_toc': tk.BooleanVar(value=True),
-            'add_page_numbers': tk.BooleanVar(value=True),
-            'add_header_footer': tk.BooleanVar(value=False),
-            'use_styles': tk.BooleanVar(value=True),
-            
-            # 高级设置
-            'extract_article': tk.BooleanVar(value=True),
-            'extract_title': tk.BooleanVar(value=True),
-            'extract_metadata': tk.BooleanVar(value=True),
-            'clean_boilerplate': tk.BooleanVar(value=True),
-            'detect_language': tk.BooleanVar(value=True),
-            
-            # 数值参数
-            'min_text_length': tk.IntVar(value=20),
-            'max_title_length': tk.IntVar(value=200),
-            'paragraph_threshold': tk.IntVar(value=100),
-            'image_min_size': tk.IntVar(value=100),
-            'max_line_length': tk.IntVar(value=80)
-        }
+            # 检查数据类型并相应处理
+            if isinstance(screenshot_data, str):
+                # 如果是base64字串
+                try:
+                    decoded_data = base64.b64decode(screenshot_data)
+                    with open(screenshot_path, "wb") as f:
+                        f.write(decoded_data)
+                except Exception as e:
+                    logging.error(f"Base64解码失败: {e}")
+                    return None
+            elif isinstance(screenshot_data, bytes):
+                # 如果是字节数据
+                with open(screenshot_path, "wb") as f:
+                    f.write(screenshot_data)
+            else:
+                logging.error(f"不支持的截图数据类型: {type(screenshot_data)}")
+                return None
 
-        # 创建选项卡式布局
-        text_options_notebook = ttk.Notebook(text_frame)
-        text_options_notebook.pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
+            self.saved_files.append(screenshot_path)
+            return screenshot_path
+        except Exception as e:
+            logging.error(f"保存截图失败: {e}")
+            return None
 
-        # 在 create_scrollable_frame 函数定义之前添加
-        # 定义选项卡内容
-        tabs = {
-            "基本设置": [
-                ("移除广告", 'remove_ads', "移除网页中的广告内容"),
-                ("移除菜单", 'remove_menus', "移除导航菜单"),
-                ("移除页眉", 'remove_headers', "移除页面顶部内容"),
-                ("移除页脚", 'remove_footers', "移除页面底部内容"),
-                ("移除评论", 'remove_comments', "移除用户评论区"),
-                ("移除社交按钮", 'remove_social', "移除社交媒体分享按钮")
-            ],
-            "内容处理": [
-                ("保留主要内容", 'keep_main_content', "���留页面主要内容区域"),
-                ("保留图片", 'keep_images', "保留文章中的图片"),
-                ("保留表格", 'keep_tables', "保留数据表格"),
-                ("留链接", 'keep_links', "保留超链接"),
-                ("保留列表", 'keep_lists', "保留序和无序列表"),
-                ("保留格式", 'keep_formatting', "保留文本格式化")
-            ],
-            "文本优化": [
-                ("合并空白", 'merge_spaces', "合并多余的空白字符"),
-                ("智能段落", 'smart_paragraphs', "智能识别段落结构"),
-                ("规范化空格", 'normalize_spaces', "统一空格使用"),
-                ("修正标点", 'fix_punctuation', "修正标点符号使用"),
-                ("移除多余行", 'remove_empty_lines', "移除多余的空行"),
-                ("合并短行", 'combine_short_lines', "合并过短的文本行")
-            ],
-            "格式选项": [
-                ("保存为Word", 'save_as_word', "将内容保存为Word文档"),
-                ("添加目录", 'add_toc', "在文档中添加目录"),
-                ("添加页码", 'add_page_numbers', "添加页码"),
-                ("加页眉页脚", 'add_header_footer', "添加页眉和页脚"),
-                ("使用样式", 'use_styles', "应用预定义的样式")
-            ],
-            "高级设置": [
-                ("提取文章", 'extract_article', "智能提取主要文章内容"),
-                ("提取标题", 'extract_title', "提取页面标题"),
-                ("提取元数据", 'extract_metadata', "提取页面元数据"),
-                ("清理样板文本", 'clean_boilerplate', "移除重复的样板文本"),
-                ("检测语言", 'detect_language', "检测文本语言")
-            ],
-            "数值参数": [
-                ("最小文本长度", 'min_text_length', "设置最小文本长度阈值"),
-                ("最大标题长度", 'max_title_length', "设置最大标题长度"),
-                ("段落阈值", 'paragraph_threshold', "设置段落字数阈值"),
-                ("最小图片尺寸", 'image_min_size', "设置��小图片尺寸"),
-                ("最大行长度", 'max_line_length', "设置最大行字符数")
-            ]
-        }
-
-        # 修改 create_scrollable_frame 函数
-        def create_scrollable_frame(parent):
-            frame = ttk.Frame(parent)
-            
-            # 创建水平和垂直滚动条
-            h_scrollbar = ttk.Scrollbar(frame, orient="horizontal")
-            v_scrollbar = ttk.Scrollbar(frame, orient="vertical")
-            canvas = tk.Canvas(frame, height=150,  # 减小高度使界面更紧凑
-                              xscrollcommand=h_scrollbar.set,
-                              yscrollcommand=v_scrollbar.set)
-            
-            scrollable_frame = ttk.Frame(canvas)
-            
-            # 配置滚动条
-            h_scrollbar.config(command=canvas.xview)
-            v_scrollbar.config(command=canvas.yview)
-            
-            # 绑定框架大小变化事件
-            def configure_scroll_region(event):
-                canvas.configure(scrollregion=canvas.bbox("all"))
-            scrollable_frame.bind("<Configure>", configure_scroll_region)
-            
-            # 创建窗口
-            canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-            
-            # 绑定鼠标滚轮事件
-            def _on_mousewheel(event):
-                if event.state == 0:  # 没有按住Shift键
-                    canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-                else:  # 按住Shift键进行水平滚动
-                    canvas.xview_scroll(int(-1*(event.delta/120)), "units")
-            
-            canvas.bind_all("<MouseWheel>", _on_mousewheel)
-            canvas.bind_all("<Shift-MouseWheel>", _on_mousewheel)
-            
-            # 布局
-            canvas.grid(row=0, column=0, sticky="nsew")
-            v_scrollbar.grid(row=0, column=1, sticky="ns")
-            h_scrollbar.grid(row=1, column=0, sticky="ew")
-            
-            # 配置网格权重
-            frame.grid_rowconfigure(0, weight=1)
-            frame.grid_columnconfigure(0, weight=1)
-            
-            return frame, scrollable_frame
-
-        # 修改选项卡内容的创建部分
-        for tab_name, options in tabs.items():
-            frame, scrollable_frame = create_scrollable_frame(text_options_notebook)
-            text_options_notebook.add(frame, text=tab_name)
-            
-            # 使用网格布局来排列选项
-            row = 0
-            col = 0
-            max_cols = 2  # 每行显示的选项数
-            
-            for i, (text, option_name, tooltip) in enumerate(options):
-                option_frame = ttk.Frame(scrollable_frame)
-                option_frame.grid(row=row, column=col, padx=5, pady=2, sticky="w")
-                
-                if tab_name != "数值参数":
-                    # 复选框选项
-                    var = self.text_extract_options[option_name]
-                    cb = ttk.Checkbutton(option_frame, text=text, variable=var)
-                    cb.pack(side=tk.LEFT)
-                    
-                    # 添加工具示标签（使用较短的提示文本）
-                    ttk.Label(option_frame, text=f"({tooltip})", 
-                             foreground="gray", wraplength=200).pack(side=tk.LEFT, padx=5)
+    def load_url_history(self):
+        """加载URL历史记录"""
+        try:
+            if self.urls_file.exists():
+                with open(self.urls_file, 'r', encoding='utf-8') as f:
+                    urls = json.load(f)
+                self.url_combobox['values'] = urls
+                if urls:
+                    self.url_combobox.set(urls[0])
                 else:
-                    # 数值输入��项
-                    ttk.Label(option_frame, text=text).pack(side=tk.LEFT)
-                    ttk.Entry(option_frame, textvariable=self.text_extract_options[option_name], 
-                             width=6).pack(side=tk.LEFT, padx=2)
-                    ttk.Label(option_frame, text=f"({tooltip})", 
-                             foreground="gray", wraplength=150).pack(side=tk.LEFT, padx=2)
-                
-                # 更新行列位置
-                col += 1
-                if col >= max_cols:
-                    col = 0
-                    row += 1
-
-        # 设置选项卡整体高度和宽度
-        text_options_notebook.configure(height=180, width=400)  # 减小高度，设置合适的宽度
-
-    def toggle_js_code(self, *args):
-        if self.enable_js_code_var.get():
-            self.js_code_text.config(state=tk.NORMAL)
-        else:
-            self.js_code_text.delete('1.0', tk.END)
-            self.js_code_text.config(state=tk.DISABLED)
-
-    def toggle_wait_for(self, *args):
-        if self.enable_wait_for_var.get():
-            self.wait_for_text.config(state=tk.NORMAL)
-        else:
-            self.wait_for_text.delete('1.0', tk.END)
-            self.wait_for_text.config(state=tk.DISABLED)
-
-    def toggle_session_id(self, *args):
-        if self.enable_session_var.get():
-            self.session_id_entry.config(state=tk.NORMAL)
-        else:
-            self.session_id_var.set("")
-            self.session_id_entry.config(state=tk.DISABLED)
+                    self.url_combobox.set("https://example.com")
+            else:
+                self.url_combobox.set("https://example.com")
+        except Exception as e:
+            logging.error(f"加载URL历史记录失败: {e}")
+            self.url_combobox.set("https://example.com")
 
-    def toggle_extraction_options(self):
-        strategy = self.extraction_strategy_var.get()
-        if strategy == "jsoncss":
-            self.jsoncss_config_frame.pack(fill=tk.X, pady=2)
-            self.llm_config_frame.pack_forget()
-        elif strategy == "llm":
-            self.llm_config_frame.pack(fill=tk.X, pady=2)
-            self.jsoncss_config_frame.pack_forget()
-        else:
-            self.jsoncss_config_frame.pack_forget()
-            self.llm_config_frame.pack_forget()
+    def save_url_history(self):
+        """保存URL历史记录"""
+        try:
+            current_url = self.url_var.get()
+            urls = list(self.url_combobox['values'])
 
-    def ensure_directories(self):
-        """确保所有必要的目录都存在"""
-        # 创建主要目录
-        directories = {
-            'data': self.base_dir / "data",
-            'content': self.base_dir / "content",
-            'screenshots': self.base_dir / "screenshots",
-            'media': self.base_dir / "media",
-            'links': self.base_dir / "links"
-        }
+            # 当前URL移到最前面
+            if current_url in urls:
+                urls.remove(current_url)
+            urls.insert(0, current_url)
 
-        for dir_path in directories.values():
-            dir_path.mkdir(parents=True, exist_ok=True)
+            # 限制最多保存20个URL
+            urls = urls[:20]
 
-        self.directories = directories
+            self.url_combobox['values'] = urls
 
-    def get_safe_filename(self, url):
-        """生成安全的文件名"""
-        # 从URL中提取域名
-        domain = urlparse(url).netloc
-        if not domain:
-            domain = 'unknown_domain'
-        # 移除非法字符
-        domain = re.sub(r'[<>:"/\\|?*]', '_', domain)
-        # 生成时间戳
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        # 组合文件名
-        return f"{domain}_{timestamp}"
+            with open(self.urls_file, 'w', encoding='utf-8') as f:
+                json.dump(urls, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logging.error(f"保存URL历史记录失败: {e}")
 
-    def save_content(self, content, url, format_type):
-        """保存内容到文件"""
-        filename = self.get_safe_filename(url)
-        file_path = self.directories['content'] / f"{filename}_{format_type}.txt"
+    def delete_current_url(self):
+        """删除当前选中的URL"""
+        current_url = self.url_var.get()
+        urls = list(self.url_combobox['values'])
+        if current_url in urls:
+            urls.remove(current_url)
+            self.url_combobox['values'] = urls
+            if urls:
+                self.url_combobox.set(urls[0])
+            else:
+                self.url_combobox.set("https://example.com")
+            self.save_url_history()
 
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            self.saved_files.append(file_path)
-            return file_path
-        except Exception as e:
-            logging.error(f"保存内容失败: {e}")
-            return None
+    def start_crawl(self):
+        self.crawl_button.configure(state='disabled')
+        # 开始新的线程来运行异步爬取，以防止阻塞Tkinter主线程
+        threading.Thread(target=self.run_crawl).start()
 
-    def save_links(self, links, url):
-        """保存链接信息"""
-        filename = self.get_safe_filename(url)
-        file_path = self.directories['links'] / f"{filename}_links.json"
+    def run_crawl(self):
+        asyncio.run(self.crawl())
 
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(links, f, ensure_ascii=False, indent=2)
-            self.saved_files.append(file_path)
-            return file_path
-        except Exception as e:
-            logging.error(f"保存链接信息失败: {e}")
-            return None
-
-    def save_media_info(self, media, url):
-        """保存媒体信息"""
-        filename = self.get_safe_filename(url)
-        file_path = self.directories['media'] / f"{filename}_media.json"
-
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(media, f, ensure_ascii=False, indent=2)
-            self.saved_files.append(file_path)
-            return file_path
-        except Exception as e:
-            logging.error(f"保存媒体信息失���: {e}")
-            return None
-
-    def save_screenshot(self, screenshot_data, url):
-        """保存截图"""
-        if not screenshot_data:
-            logging.warning("截图数据为空")
-            return None
-
-        try:
-            filename = self.get_safe_filename(url)
-            screenshot_path = self.directories['screenshots'] / f"{filename}.png"
-
-            # 检查数据类型并相应处理
-            if isinstance(screenshot_data, str):
-                # 如果是base64字串
-                try:
-                    decoded_data = base64.b64decode(screenshot_data)
-                    with open(screenshot_path, "wb") as f:
-                        f.write(decoded_data)
-                except Exception as e:
-                    logging.error(f"Base64解码失败: {e}")
-                    return None
-            elif isinstance(screenshot_data, bytes):
-                # 如果是字节数据
-                with open(screenshot_path, "wb") as f:
-                    f.write(screenshot_data)
-            else:
-                logging.error(f"不支持的截图数据类型: {type(screenshot_data)}")
-                return None
-
-            self.saved_files.append(screenshot_path)
-            return screenshot_path
-        except Exception as e:
-            logging.error(f"保存截图失败: {e}")
-            return None
-
-    def load_url_history(self):
-        """加载URL历史记录"""
-        try:
-            if self.urls_file.exists():
-                with open(self.urls_file, 'r', encoding='utf-8') as f:
-                    urls = json.load(f)
-                self.url_combobox['values'] = urls
-                if urls:
-                    self.url_combobox.set(urls[0])
-                else:
-                    self.url_combobox.set("https://example.com")
-            else:
-                self.url_combobox.set("https://example.com")
-        except Exception as e:
-            logging.error(f"加载URL历史记录失败: {e}")
-            self.url_combobox.set("https://example.com")
-
-    def save_url_history(self):
-        """保存URL历史记录"""
-        try:
-            current_url = self.url_var.get()
-            urls = list(self.url_combobox['values'])
-
-            # 当前URL移到最前面
-            if current_url in urls:
-                urls.remove(current_url)
-            urls.insert(0, current_url)
-
-            # 限制最多保存20个URL
-            urls = urls[:20]
-
-            self.url_combobox['values'] = urls
-
-            with open(self.urls_file, 'w', encoding='utf-8') as f:
-                json.dump(urls, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logging.error(f"保存URL历史记录失败: {e}")
-
-    def delete_current_url(self):
-        """删除当前选中的URL"""
-        current_url = self.url_var.get()
-        urls = list(self.url_combobox['values'])
-        if current_url in urls:
-            urls.remove(current_url)
-            self.url_combobox['values'] = urls
-            if urls:
-                self.url_combobox.set(urls[0])
-            else:
-                self.url_combobox.set("https://example.com")
-            self.save_url_history()
-
-    def start_crawl(self):
-        self.crawl_button.configure(state='disabled')
-        # 开始新的线程来运行异步爬取，以防止阻塞Tkinter主线程
-        threading.Thread(target=self.run_crawl).start()
-
-    def run_crawl(self):
-        asyncio.run(self.crawl())
-
-    async def crawl(self):
-        """优化的爬取方法"""
-        error_message = None
+    async def crawl(self):
+        """优化的爬取方法"""
+        error_message = None
+        # 分阶段计时，每个页面写入 logs/metrics_*.jsonl
+        metrics = PipelineMetrics()
+        page = metrics.start_page(self.url_var.get())
+        profiler = self._start_profiler(self.url_var.get())
+        INFLIGHT.inc(kind="crawl")
         try:
             # 禁用爬取按钮显示状态
-            self.root.after(0, lambda: (
-                self.crawl_button.configure(state='disabled'),
-                self.content_text.insert(tk.END, "爬取中...\n")
-            ))
+            self.root.after(0, lambda: self.crawl_button.configure(state='disabled'))
+            self.show_status("爬取中...")
             
             # 构建配置
-            crawler_config, crawl_config = self._build_configs()
+            with page.span('build_config'):
+                crawler_config, crawl_config = self._build_configs()
             
             # 执行爬取
-            async with AsyncWebCrawler(**crawler_config) as crawler:
+            with page.span('browser_start'):
+                crawler = self._create_crawler(crawler_config)
+                await crawler.__aenter__()
+            try:
                 self.save_url_history()
-                result = await crawler.arun(**crawl_config)
-                
-                # 缓存结果
-                self._last_result = result
-                
-                # 异步处理结果
-                await self._process_result(result)
+                if self.deep_crawl_var.get():
+                    await self._deep_crawl(crawler, crawl_config, metrics, page)
+                else:
+                    async def fetch():
+                        with page.span('arun') as span:
+                            result = await crawler.arun(**crawl_config)
+                            span.bytes_out = len(getattr(result, 'html', None) or '')
+                        self._check_result(result)
+                        return result
+                    
+                    # 临时错误（超时、5xx、限流等）按类别自动重试
+                    result = await RetryPolicy().run(crawl_config['url'], fetch)
+                    
+                    # 缓存结果
+                    self._last_result = result
+                    
+                    # 异步处理结果
+                    await self._process_result(result, page)
+            finally:
+                with page.span('browser_close'):
+                    await crawler.__aexit__(None, None, None)
                 
         except Exception as e:
-            error_message = str(e)
+            error_message = f"{RetryPolicy.LABELS[RetryPolicy.classify(e)]}: {e}"
             logging.exception("爬取过程发生错误")
-            self.root.after(0, lambda: self.content_text.insert(tk.END, f"错误: {error_message}\n"))
+            self.show_status(f"错误（{error_message}）")
             
         finally:
+            INFLIGHT.dec(kind="crawl")
+            page.finish("error" if error_message else "ok", error_message)
+            metrics.close()
+            if profiler:
+                self._finish_profiler(profiler)
             self.root.after(0, lambda: self.crawl_button.configure(state='normal'))
 
-    async def _process_result(self, result):
-        """异步处理爬取结果"""
+    async def _process_result(self, result, page=None, url=None, display=True):
+        """异步处理爬取结果
+
+        page 为该页面的 PageMetrics，用于记录各处理阶段的耗时；
+        url 为结果对应的页面地址，默认使用地址栏中的URL（整站爬取时逐页传入）。
+        display 为 False 时（批量爬取）不更新界面，只记下结果，结束后由 _show_last_page 显示最后一个页面。
+        处理和保存都成功时返回 True，错误已记录日志，调用方据此决定是否算作爬取完成。
+        """
+        url = url or self.url_var.get()
+        if page is None:
+            page = PipelineMetrics(log_dir=None).start_page(url)
         if not result:
-            self.root.after(0, lambda: self.content_text.insert(tk.END, "未获取到结果\n"))
-            return
+            logging.warning(f"未获取到结果: {url}")
+            if display:
+                self.show_status(f"未获取到结果: {url}")
+            return False
+        saved = True
             
         try:
             # 获取内容
-            content = self._extract_content(result)
-            if not content:
-                raise ValueError("未能提取内容")
+            with page.span('extract') as span:
+                content = self._extract_content(result)
+                if not content:
+                    raise ValueError("未能提取内容")
+                span.bytes_out = len(content)
                 
             # 处理内容
             format_type = self.output_format.get()
@@ -1466,10 +4117,12 @@ class CrawlerGUI:
             format_options = {k: v.get() for k, v in self.format_options.items()}
             
             # 处理内容
-            processed_content = processor(content, format_options)
+            with page.span(f'process_{format_type}') as span, PROCESSOR_SECONDS.time(format=format_type):
+                processed_content = processor(content, format_options)
+                span.bytes_in = len(content)
+                span.bytes_out = len(processed_content or '')
             
             # 准备结果数据
-            url = self.url_var.get()
             saved_files = {}
             result_data = {
                 'content': processed_content,
@@ -1481,23 +4134,35 @@ class CrawlerGUI:
             
             try:
                 # 保存主要内容
-                saved_files['content'] = await self._save_content_async(
-                    processed_content, url, format_type)
+                with page.span('save_content') as span:
+                    saved_files['content'] = await self._save_content_async(
+                        processed_content, url, format_type)
+                    if saved_files['content'] is None:
+                        raise OSError("保存内容失败")
+                    span.add_file(saved_files['content'])
                 
                 # 处理媒体信息
+                media_path = None
                 if hasattr(result, 'media') and result.media:
                     result_data['media'] = result.media
-                    media_path = await self._save_json_async(
-                        result.media, 
-                        self.directories['media'] / f"{self.get_safe_filename(url)}_media.json")
+                    with page.span('save_media') as span:
+                        media_path = await self._save_json_async(
+                            result.media, 
+                            self.directories['media'] / f"{self.get_safe_filename(url)}_media.json")
+                        span.items = sum(len(v) for v in result.media.values() if isinstance(v, list))
+                        span.add_file(media_path)
                 saved_files['media'] = media_path
                 
                 # 处理链接信息
+                links_path = None
                 if hasattr(result, 'links') and result.links:
                     result_data['links'] = result.links
-                    links_path = await self._save_json_async(
-                        result.links,
-                        self.directories['links'] / f"{self.get_safe_filename(url)}_links.json")
+                    with page.span('save_links') as span:
+                        links_path = await self._save_json_async(
+                            result.links,
+                            self.directories['links'] / f"{self.get_safe_filename(url)}_links.json")
+                        span.items = sum(len(v) for v in result.links.values() if isinstance(v, list))
+                        span.add_file(links_path)
                 saved_files['links'] = links_path
                 
                 # 处理元数据
@@ -1519,9 +4184,12 @@ class CrawlerGUI:
                     
                     if metadata:  # 只有在有元数据时才保存
                         result_data['metadata'] = metadata
-                        metadata_path = await self._save_json_async(
-                            metadata,
-                            self.directories['data'] / f"{self.get_safe_filename(url)}_metadata.json")
+                        with page.span('save_metadata') as span:
+                            metadata_path = await self._save_json_async(
+                                metadata,
+                                self.directories['data'] / f"{self.get_safe_filename(url)}_metadata.json")
+                            span.items = len(metadata)
+                            span.add_file(metadata_path)
                 saved_files['metadata'] = metadata_path  # 无论是否有元数据，都添加到saved_files中
                 
                 # 处理内容分析
@@ -1539,53 +4207,663 @@ class CrawlerGUI:
                     
                     if analysis:  # 只有在有分析数据时才保存
                         result_data['analysis'] = analysis
-                        analysis_path = await self._save_json_async(
-                            analysis,
-                            self.directories['data'] / f"{self.get_safe_filename(url)}_analysis.json")
+                        with page.span('save_analysis') as span:
+                            analysis_path = await self._save_json_async(
+                                analysis,
+                                self.directories['data'] / f"{self.get_safe_filename(url)}_analysis.json")
+                            span.items = len(analysis)
+                            span.add_file(analysis_path)
                 saved_files['analysis'] = analysis_path  # 无论是否有分析数据，都添加到saved_files中
 
                 # 保存截图（如果启用）
                 screenshot_path = None  # 初始化为 None
                 if self.screenshot_var.get() and hasattr(result, 'screenshot'):
-                    screenshot_path = await self._save_screenshot_async(
-                        result.screenshot,
-                        url)
+                    with page.span('save_screenshot') as span:
+                        screenshot_path = await self._save_screenshot_async(
+                            result.screenshot,
+                            url)
+                        span.bytes_in = len(result.screenshot or '')
+                        span.add_file(screenshot_path)
                 saved_files['screenshot'] = screenshot_path  # 无论是否有截图，都添加到saved_files中
 
                 # 保存可浏览网页
                 if hasattr(result, 'html'):
-                    browsable_page = await self.save_browsable_page(
-                        result.html,
-                        self.url_var.get(),
-                        getattr(result, 'resources', None))
-                    if browsable_page:
-                        self.root.after(0, lambda: self.content_text.insert(
-                            tk.END, 
-                            f"\n\n可浏览网页已保存至: {browsable_page}\n"))
+                    with page.span('clone') as span:
+                        browsable_page = await self.save_browsable_page(
+                            result.html,
+                            url,
+                            getattr(result, 'resources', None))
+                        span.bytes_in = len(result.html or '')
+                        span.items = len(getattr(result, 'resources', None) or [])
+                        if browsable_page:
+                            span.add_file(browsable_page)
+                    if browsable_page and display:
+                        self.show_status(f"可浏览网页已保存至: {browsable_page}")
 
                 # 提取纯文本
                 if hasattr(result, 'html'):
-                    text_path = await self.extract_pure_text(result.html)
-                    if text_path:
-                        self.root.after(0, lambda: self.content_text.insert(
-                            tk.END, 
-                            f"\n\n纯文本已保存至: {text_path}\n"))
+                    with page.span('text_extract') as span:
+                        text_path = await self.extract_pure_text(result.html, url)
+                        span.bytes_in = len(result.html or '')
+                        span.add_file(text_path)
+                    if text_path and display:
+                        self.show_status(f"纯文本已保存至: {text_path}")
 
             except Exception as save_error:
+                saved = False
                 logging.error(f"保存文件时发生错误: {save_error}")
                 
             # 更新GUI显示
-            self.root.after(0, lambda: self._update_display(
-                content=result_data['content'],
-                media=result_data['media'],
-                links=result_data['links'],
-                saved_files=saved_files,
-                metadata=result_data['metadata'],
-                analysis=result_data['analysis']))
+            display_data = dict(result_data, saved_files=saved_files)
+            if display:
+                self.root.after(0, lambda: self._update_display(**display_data))
+            else:
+                self._last_display = display_data
+            return saved
             
         except Exception as e:
             logging.exception("处理结果时发生错误")
-            self.root.after(0, lambda: self.content_text.insert(tk.END, f"处理错误: {str(e)}\n"))
+            page.finish("error", str(e))
+            if display:
+                self.show_status(f"处理错误: {str(e)}")
+            return False
+
+    def _show_last_page(self):
+        """批量爬取结束后显示最后一个处理完的页面"""
+        display_data = self._last_display
+        if display_data:
+            self._last_display = None
+            self.root.after(0, lambda: self._update_display(**display_data))
+
+    def _check_result(self, result):
+        """爬取结果是错误状态码或失败时抛出异常，由重试策略按类别处理"""
+        status_code = getattr(result, 'status_code', None)
+        if status_code and status_code >= 400:
+            headers = getattr(result, 'response_headers', None) or {}
+            retry_after = next((value for key, value in headers.items() if key.lower() == 'retry-after'), None)
+            raise HttpStatusError(status_code, parse_retry_after(retry_after))
+        if not getattr(result, 'success', True):
+            raise RuntimeError(getattr(result, 'error_message', None) or "爬取失败")
+
+    def _make_host_scheduler(self):
+        """按整站爬取面板中的礼貌爬取设置创建主机调度器"""
+        return HostScheduler(
+            concurrency=max(1, self.deep_crawl_host_concurrency_var.get()),
+            delay=max(0.0, self.deep_crawl_host_delay_var.get()),
+            robots=RobotsCache() if self.respect_robots_var.get() else None)
+
+    async def _crawl_page(self, crawler, crawl_config, scheduler, page, url):
+        """在主机调度器的限制下爬取并处理一个页面，返回 (状态, 错误信息, 结果)
+
+        状态为 ok、error、robots（robots.txt 禁止）或 throttled（重试后仍为 429/503，
+        由调用方决定是否稍后再试）。临时错误按调度器的重试策略重试，熔断的主机直接返回 error。
+        """
+        async def fetch():
+            async with scheduler.slot(url):
+                with page.span('arun') as span:
+                    result = await crawler.arun(**{**crawl_config, 'url': url})
+                    span.bytes_out = len(getattr(result, 'html', None) or '')
+            try:
+                self._check_result(result)
+            except HttpStatusError as e:
+                scheduler.report(url, e.status, e.retry_after)
+                raise
+            scheduler.report(url, getattr(result, 'status_code', None))
+            return result
+        
+        try:
+            if not await scheduler.allowed(url):
+                return "robots", "robots.txt 禁止爬取", None
+            result = await scheduler.retry.run(url, fetch)
+            self._last_result = result
+            # 批量爬取时每个页面都刷新界面会占满主线程，结束后只显示最后一个页面
+            if not await self._process_result(result, page, url, display=False):
+                # 处理或保存失败的页面不算完成，续爬和队列重试时会再次爬取
+                return "error", "处理或保存结果失败", result
+            return "ok", None, result
+        except Exception as e:
+            kind = RetryPolicy.classify(e)
+            if isinstance(e, HttpStatusError) and e.status in (429, 503):
+                return "throttled", str(e), None
+            logging.error(f"爬取失败（{RetryPolicy.LABELS[kind]}） {url}: {e}")
+            return "error", f"{RetryPolicy.LABELS[kind]}: {e}", None
+
+    async def _deep_crawl(self, crawler, crawl_config, metrics, first_page):
+        """整站爬取：从起始URL按广度优先爬取站内链接，复用同一个浏览器实例
+
+        每个URL的状态记录在任务日志中，中断后以相同起始URL重新爬取时从中断处继续。
+        """
+        start_url = clean_url(crawl_config['url'])
+        exact_path = None
+        if self.deep_crawl_exact_var.get():
+            exact_path = self.directories['data'] / f"{self.get_safe_filename(start_url)}_visited.sqlite"
+        options = {
+            'max_depth': self.deep_crawl_depth_var.get(),
+            'max_pages': self.deep_crawl_max_pages_var.get(),
+            'include': self.deep_crawl_include_var.get().split(),
+            'exclude': self.deep_crawl_exclude_var.get().split()
+        }
+        journal = CrawlJournal(self.directories['data'] / "crawl_journal.sqlite")
+        job_id, resumed = journal.open_job('deep', start_url, self.resume_crawl_var.get(), options)
+        frontier = CrawlFrontier(start_url, exact_path=exact_path, seed=not resumed, **options)
+        if resumed:
+            for url, state, depth in journal.rows(job_id):
+                frontier.restore(url, depth, state)
+            logging.info(f"恢复整站爬取任务 {job_id}: 已爬取 {frontier.crawled}，待爬 {len(frontier)}")
+            self.show_status(f"恢复未完成的整站爬取: 已爬取 {frontier.crawled} 个页面，待爬 {len(frontier)} 个")
+        else:
+            journal.add(job_id, [(start_url, 0, None)])
+        
+        self.root.after(0, lambda: (
+            self.progress_frame.pack(fill=tk.X, pady=5),
+            self.progress_bar.pack(fill=tk.X),
+            self.progress_label.pack(fill=tk.X)
+        ))
+        
+        scheduler = self._make_host_scheduler()
+        workers = max(1, self.deep_crawl_workers_var.get())
+        
+        report = []
+        # 第一个页面沿用爬取开始时创建的计时记录
+        spare_pages = [first_page]
+        attempts = {}
+        active = 0
+        
+        async def crawl_page(url, depth):
+            page = spare_pages.pop() if spare_pages else metrics.start_page(url)
+            page.url = url
+            added = []
+            journal.start(job_id, url)
+            status, error_message, result = await self._crawl_page(
+                crawler, crawl_config, scheduler, page, url)
+            if status == "throttled" and attempts.get(url, 0) < 2:
+                # 被限流的页面放回队列，等该主机退避结束后重试
+                attempts[url] = attempts.get(url, 0) + 1
+                frontier.requeue(url, depth)
+                journal.finish(job_id, url, CrawlJournal.PENDING, error_message)
+            elif status == "ok":
+                added = frontier.add_links(getattr(result, 'links', None), url, depth + 1)
+                journal.add(job_id, [(link, depth + 1, None) for link in added])
+                journal.finish(job_id, url, CrawlJournal.DONE)
+            else:
+                journal.finish(job_id, url, CrawlJournal.FAILED, error_message)
+            page.finish(status, error_message)
+            report.append({
+                'url': url,
+                'depth': depth,
+                'status': status,
+                'links_added': len(added),
+                'error': error_message
+            })
+        
+        async def worker():
+            nonlocal active
+            while True:
+                item = frontier.pop()
+                if item is None:
+                    if not active:
+                        return
+                    # 其他任务还可能发现新链接
+                    await asyncio.sleep(0.1)
+                    continue
+                active += 1
+                try:
+                    url, depth = item
+                    self.publish_progress(
+                        (frontier.crawled - 1) / frontier.max_pages * 100,
+                        f"[{frontier.crawled}/{frontier.max_pages}] 深度 {depth}，待爬 {len(frontier)}，"
+                        f"进行中 {active}: {url}")
+                    await crawl_page(url, depth)
+                finally:
+                    active -= 1
+        
+        try:
+            await gather_or_cancel(*(worker() for _ in range(workers)))
+            # 正常结束的任务不再恢复；出错中断时保持 running，下次从中断处继续
+            journal.close_job(job_id)
+        finally:
+            journal.close()
+            # 续爬时由任务日志恢复已访问集合，磁盘上的精确去重表不需要保留
+            frontier.close(remove=True)
+        
+        failed = sum(1 for entry in report if entry['status'] == 'error')
+        blocked = sum(1 for entry in report if entry['status'] == 'robots')
+        summary = (f"整站爬取完成{'（恢复的任务）' if resumed else ''}: "
+                   f"本次爬取 {len(report)} 个页面（失败 {failed}，robots.txt 禁止 {blocked}），"
+                   f"未爬取 {len(frontier)}，规则排除 {frontier.skipped}，超出页数上限 {frontier.dropped}，"
+                   f"去重表 {len(frontier.visited)} 个URL / {frontier.visited.memory_bytes / 1024:.0f} KB")
+        logging.info(summary)
+        
+        # 保存爬取记录
+        report_path = await self._save_json_async(
+            {
+                'job_id': job_id,
+                'resumed': resumed,
+                'start_url': frontier.start_url,
+                'max_depth': frontier.max_depth,
+                'max_pages': frontier.max_pages,
+                'pages': report,
+                'pending': [url for url, _ in frontier.queue],
+                'hosts': scheduler.stats()
+            },
+            self.directories['data'] / f"{self.get_safe_filename(frontier.start_url)}_site_crawl.json")
+        
+        self.publish_progress(100, summary)
+        logging.info(f"{summary}，爬取记录已保存至: {report_path}")
+        self._show_last_page()
+        self.show_status(f"{summary}\n爬取记录已保存至: {report_path}")
+        self.root.after(3000, lambda: self.progress_frame.pack_forget())
+
+    def _sitemap_source(self):
+        """站点地图地址，未填写时使用当前站点的 /sitemap.xml，都无效时返回 None"""
+        source_url = self.sitemap_url_var.get().strip()
+        if not source_url:
+            parsed = urlparse(self.url_var.get())
+            if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+                messagebox.showerror("错误", "请填写站点地图地址或有效的URL")
+                return None
+            source_url = f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"
+            self.sitemap_url_var.set(source_url)
+        return source_url
+
+    def start_sitemap_crawl(self):
+        """从站点地图或订阅批量爬取（未填写地址时使用当前站点的 /sitemap.xml）"""
+        source_url = self._sitemap_source()
+        if not source_url:
+            return
+        self.crawl_button.configure(state='disabled')
+        threading.Thread(target=lambda: asyncio.run(self.crawl_sitemap(source_url))).start()
+
+    def start_queue_push(self):
+        """把站点地图或订阅中的URL推送到共享工作队列，由各爬取节点爬取"""
+        source_url = self._sitemap_source()
+        spec = self.work_queue_var.get().strip()
+        if not source_url:
+            return
+        if not spec:
+            messagebox.showerror("错误", "请填写工作队列地址")
+            return
+        self.crawl_button.configure(state='disabled')
+        threading.Thread(target=lambda: asyncio.run(self.push_sitemap_to_queue(source_url, spec))).start()
+
+    async def push_sitemap_to_queue(self, source_url, spec):
+        """读取站点地图并分批推送到工作队列，同时保存爬取节点使用的界面设置"""
+        reader = SitemapReader(max_urls=max(1, self.sitemap_max_urls_var.get()))
+        found = pushed = 0
+        work_queue = None
+        # 按规范形式去掉站点地图中重复的URL，推送的是实际请求的URL
+        seen = VisitedSet()
+        try:
+            work_queue = open_work_queue(spec)
+            crawler_config, crawl_config = self._build_configs(source_url)
+            work_queue.set_config({
+                'settings': self._settings_snapshot(),
+                'crawler_config': crawler_config,
+                'crawl_config': crawl_config
+            })
+            batch = []
+            async for url, _ in reader.iter_entries(source_url):
+                found += 1
+                url = clean_url(url)
+                if url.startswith(('http://', 'https://')) and seen.add(normalize_url(url)):
+                    batch.append(url)
+                if len(batch) >= 500:
+                    pushed += work_queue.push(batch)
+                    batch = []
+                    self.publish_progress(0, f"已推送 {pushed} 个URL到工作队列")
+            pushed += work_queue.push(batch)
+            stats = work_queue.stats()
+            message = (f"已推送到工作队列: 发现 {found} 个URL，新入队 {pushed} 个；"
+                       f"待爬 {stats['pending']}，租用中 {stats['leased']}，完成 {stats['done']}，死信 {stats['dead']}\n"
+                       f"在各爬取节点上运行: python test.py --worker \"{spec}\"\n")
+            logging.info(message.strip())
+            self.show_status(message)
+        except Exception as e:
+            error_message = str(e)
+            logging.exception("推送到工作队列失败")
+            self.root.after(0, lambda: messagebox.showerror("错误", f"推送到工作队列失败: {error_message}"))
+        finally:
+            seen.close()
+            if work_queue:
+                work_queue.close()
+            self.root.after(0, lambda: self.crawl_button.configure(state='normal'))
+
+    async def crawl_from_queue(self, work_queue, worker_id, crawler_config, crawl_config,
+                               lease_seconds=600, idle_timeout=60):
+        """作为爬取节点从工作队列租用URL并爬取：成功时确认，失败时放回队列或转入死信，返回各状态的页面数"""
+        metrics = PipelineMetrics(batch_id=f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{worker_id}")
+        scheduler = self._make_host_scheduler()
+        workers = max(1, self.deep_crawl_workers_var.get())
+        # 租用的URL要在租约到期前处理完，本地只缓冲少量URL
+        queue = HostQueue(scheduler, maxsize=workers * 4)
+        counts = {'ok': 0, 'error': 0, 'robots': 0, 'throttled': 0, 'dead': 0}
+        # 已租用但还没有处理完的URL数
+        holding = 0
+        
+        async def produce():
+            nonlocal holding
+            idle_since = time.monotonic()
+            while True:
+                leased = work_queue.lease(worker_id, workers, lease_seconds)
+                if leased or holding:
+                    # 本节点还在处理（或重试）时不算空闲，失败放回队列的URL还会再被租用
+                    idle_since = time.monotonic()
+                if leased:
+                    holding += len(leased)
+                    for lease in leased:
+                        await queue.put(lease)
+                elif idle_timeout and time.monotonic() - idle_since > idle_timeout:
+                    break
+                else:
+                    await asyncio.sleep(1)
+            # 只在正常结束时发送结束标记；出错时由 gather_or_cancel 取消各协程
+            await queue.put(None)
+        
+        async def worker():
+            nonlocal holding
+            while True:
+                lease = await queue.get()
+                if lease is None:
+                    return
+                url, token = lease
+                page = metrics.start_page(url)
+                try:
+                    status, error_message, _ = await self._crawl_page(
+                        crawler, crawl_config, scheduler, page, url)
+                finally:
+                    queue.done(url)
+                page.finish(status, error_message)
+                counts[status] += 1
+                if status == "ok":
+                    if not work_queue.ack(url, token):
+                        logging.warning(f"{url} 的租约已过期并被重新分配，本次结果不确认")
+                # robots.txt 禁止的页面重试也不会成功，直接转入死信
+                elif work_queue.fail(url, token, error_message, retry=status != "robots"):
+                    counts['dead'] += 1
+                    logging.warning(f"{url} 转入死信: {error_message}")
+                holding -= 1
+        
+        crawler = self._create_crawler(crawler_config)
+        await crawler.__aenter__()
+        try:
+            await gather_or_cancel(produce(), *(worker() for _ in range(workers)))
+        finally:
+            await crawler.__aexit__(None, None, None)
+            metrics.close()
+        return counts
+
+    async def crawl_sitemap(self, source_url):
+        """从站点地图或订阅中流式读取URL并批量爬取，按 lastmod 跳过没有更新的页面
+
+        进程数大于1时，URL按主机哈希分给多个工作进程爬取，本进程只负责读取、分发和记录。
+        """
+        metrics = PipelineMetrics()
+        state = LastmodState(self.directories['data'] / "sitemap_state.json")
+        reader = SitemapReader(max_urls=max(1, self.sitemap_max_urls_var.get()))
+        changed_only = self.sitemap_changed_only_var.get()
+        workers = max(1, self.deep_crawl_workers_var.get())
+        processes = max(1, self.crawl_processes_var.get())
+        # 多进程时由一个分发协程消费队列
+        consumers = 1 if processes > 1 else workers
+        seen = VisitedSet()
+        counts = {'found': 0, 'duplicate': 0, 'unchanged': 0, 'resumed': 0,
+                  'ok': 0, 'error': 0, 'robots': 0, 'throttled': 0}
+        failures = []
+        host_stats = {}
+        # 任务日志：中断后以相同来源重新爬取时，跳过上次已完成的URL
+        journal = CrawlJournal(self.directories['data'] / "crawl_journal.sqlite")
+        job_id, resumed = journal.open_job(
+            'sitemap', source_url, self.resume_crawl_var.get(), {'changed_only': changed_only})
+        INFLIGHT.inc(kind="crawl")
+        try:
+            self.root.after(0, lambda: (
+                self.progress_frame.pack(fill=tk.X, pady=5),
+                self.progress_bar.pack(fill=tk.X),
+                self.progress_label.pack(fill=tk.X)
+            ))
+            self.show_status(f"从站点地图爬取: {source_url}")
+            crawler_config, crawl_config = self._build_configs(source_url)
+            scheduler = self._make_host_scheduler()
+            # 有界队列：爬取跟不上时暂停读取站点地图。单进程时按主机分队列，
+            # 只取可以立即请求的主机；多进程时按主机分片，由工作进程各自调度
+            queue = asyncio.Queue(maxsize=workers * 4) if processes > 1 else HostQueue(scheduler)
+            
+            async def produce():
+                async for url, lastmod in reader.iter_entries(source_url):
+                    counts['found'] += 1
+                    # 按规范形式去重，爬取时使用原来的路径和查询参数
+                    url = clean_url(url)
+                    if not url.startswith(('http://', 'https://')) or not seen.add(normalize_url(url)):
+                        counts['duplicate'] += 1
+                        continue
+                    # 只跳过已完成的URL，上次失败或被限流的URL重新爬取
+                    if resumed and journal.state(job_id, url) == CrawlJournal.DONE:
+                        counts['resumed'] += 1
+                        continue
+                    if changed_only and not state.needs_crawl(url, lastmod):
+                        counts['unchanged'] += 1
+                        continue
+                    journal.add(job_id, [(url, 0, lastmod.isoformat() if lastmod else None)])
+                    await queue.put((url, lastmod))
+                # 只在正常结束时发送结束标记：出错时队列可能已满，由 gather_or_cancel 取消各协程
+                for _ in range(consumers):
+                    await queue.put(None)
+            
+            def record(url, lastmod, status, error_message):
+                """记录一个页面的结果（本进程爬取或工作进程报告的）"""
+                counts[status] += 1
+                if status == "ok":
+                    state.mark(url, lastmod)
+                    journal.finish(job_id, url, CrawlJournal.DONE)
+                else:
+                    failures.append({'url': url, 'status': status, 'error': error_message})
+                    # 与整站爬取一致：被限流和临时错误的页面记为待爬，只有重试也不会成功的记为失败
+                    permanent = status == "robots" or RetryPolicy.is_permanent(error_message)
+                    journal.finish(job_id, url, CrawlJournal.FAILED if permanent else CrawlJournal.PENDING,
+                                   error_message)
+                
+                done = counts['ok'] + counts['error'] + counts['robots'] + counts['throttled']
+                if done % 100 == 0:
+                    state.save()
+                queued = counts['found'] - counts['duplicate'] - counts['unchanged'] - counts['resumed']
+                self.publish_progress(
+                    min(99, done / max(1, queued) * 100),
+                    f"[{done}/{queued}] 发现 {counts['found']}，未更新 {counts['unchanged']}: {url}")
+            
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    url, lastmod = item
+                    page = metrics.start_page(url)
+                    journal.start(job_id, url)
+                    try:
+                        status, error_message, _ = await self._crawl_page(
+                            crawler, crawl_config, scheduler, page, url)
+                    finally:
+                        queue.done(url)
+                    page.finish(status, error_message)
+                    record(url, lastmod, status, error_message)
+            
+            if processes > 1:
+                _, host_stats = await gather_or_cancel(
+                    produce(),
+                    self._crawl_sharded(processes, crawler_config, crawl_config, queue,
+                                        lambda url: journal.start(job_id, url), record))
+                journal.close_job(job_id)
+            else:
+                crawler = self._create_crawler(crawler_config)
+                await crawler.__aenter__()
+                try:
+                    await gather_or_cancel(produce(), *(worker() for _ in range(workers)))
+                    journal.close_job(job_id)
+                finally:
+                    await crawler.__aexit__(None, None, None)
+                    host_stats = scheduler.stats()
+                
+        except Exception as e:
+            error_message = str(e)
+            logging.exception("站点地图爬取发生错误")
+            self.show_status(f"错误: {error_message}")
+            
+        finally:
+            INFLIGHT.dec(kind="crawl")
+            state.save()
+            seen.close()
+            journal.close()
+            metrics.close()
+            
+            summary = (f"站点地图爬取完成: 读取 {reader.sitemaps_read} 个站点地图/订阅，"
+                       f"发现 {counts['found']} 个URL（重复 {counts['duplicate']}，未更新 {counts['unchanged']}，"
+                       f"上次已完成 {counts['resumed']}），"
+                       f"成功 {counts['ok']}，失败 {counts['error']}，robots.txt 禁止 {counts['robots']}，"
+                       f"限流 {counts['throttled']}")
+            logging.info(summary)
+            report_path = await self._save_json_async(
+                {
+                    'job_id': job_id,
+                    'resumed': resumed,
+                    'source': source_url,
+                    'changed_only': changed_only,
+                    'processes': processes,
+                    'counts': counts,
+                    'hosts': host_stats,
+                    'sitemap_errors': reader.errors,
+                    'failures': failures
+                },
+                self.directories['data'] / f"{self.get_safe_filename(source_url)}_sitemap_crawl.json")
+            self.publish_progress(100, summary)
+            logging.info(f"{summary}，爬取记录已保存至: {report_path}")
+            self._show_last_page()
+            self.show_status(f"{summary}\n爬取记录已保存至: {report_path}")
+            self.root.after(0, lambda: self.crawl_button.configure(state='normal'))
+            self.root.after(3000, lambda: self.progress_frame.pack_forget())
+
+    async def crawl_shard(self, shard, crawler_config, crawl_config, inbox, events):
+        """在工作进程中爬取一个分片：从 inbox 读取URL，每个页面的结果写入 events，返回各主机的统计"""
+        metrics = PipelineMetrics(batch_id=f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_shard{shard}")
+        scheduler = self._make_host_scheduler()
+        workers = max(1, self.deep_crawl_workers_var.get())
+        queue = HostQueue(scheduler)
+        
+        async def receive():
+            # 进程间队列的读取是阻塞的，放到线程中执行；带超时读取，取消后线程也能及时结束
+            while True:
+                try:
+                    item = await asyncio.to_thread(inbox.get, True, 1)
+                except Empty:
+                    continue
+                if item is None:
+                    break
+                await queue.put(item)
+            await queue.put(None)
+        
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                url, lastmod = item
+                page = metrics.start_page(url)
+                try:
+                    status, error_message, _ = await self._crawl_page(
+                        crawler, crawl_config, scheduler, page, url)
+                finally:
+                    queue.done(url)
+                page.finish(status, error_message)
+                events.put(('page', shard, url, lastmod, status, error_message))
+        
+        crawler = self._create_crawler(crawler_config)
+        await crawler.__aenter__()
+        try:
+            await gather_or_cancel(receive(), *(worker() for _ in range(workers)))
+        finally:
+            await crawler.__aexit__(None, None, None)
+            metrics.close()
+        return scheduler.stats()
+
+    async def _crawl_sharded(self, processes, crawler_config, crawl_config, queue, dispatched, record):
+        """把队列中的URL按主机哈希分给多个工作进程爬取，汇总各进程报告的结果，返回各主机的统计
+
+        dispatched(url) 在URL发给工作进程后调用，record(url, lastmod, status, error) 在收到结果时调用。
+        """
+        # spawn 方式启动：子进程不继承界面线程、事件循环和已打开的浏览器
+        context = multiprocessing.get_context('spawn')
+        settings = self._settings_snapshot()
+        workers = max(1, self.deep_crawl_workers_var.get())
+        events = context.Queue()
+        inboxes, shards = [], []
+        for shard in range(processes):
+            # 有界队列：某个分片爬取较慢时，分发也随之暂停，不会在内存中堆积URL
+            inbox = context.Queue(maxsize=workers * 4)
+            process = context.Process(
+                target=run_crawl_shard,
+                args=(shard, str(self.base_dir.resolve()), settings, crawler_config, crawl_config, inbox, events),
+                name=f"crawl-shard-{shard}",
+                daemon=True)
+            process.start()
+            inboxes.append(inbox)
+            shards.append(process)
+        logging.info(f"已启动 {processes} 个爬取工作进程")
+        
+        def send(shard, item):
+            # 工作进程退出后不再等待，避免分发阻塞在已满的队列上
+            while True:
+                try:
+                    inboxes[shard].put(item, timeout=1)
+                    return
+                except Full:
+                    if not shards[shard].is_alive():
+                        raise RuntimeError(f"分片 {shard} 的工作进程已退出")
+        
+        async def dispatch():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                # 先记录再发送，工作进程报告的结果总在记录之后
+                dispatched(item[0])
+                await asyncio.to_thread(send, shard_for_url(item[0], processes), item)
+            # 出错取消时不发送结束标记，工作进程在下面的 finally 中终止
+            for shard in range(processes):
+                if shards[shard].is_alive():
+                    await asyncio.to_thread(send, shard, None)
+        
+        host_stats = {}
+        
+        async def collect():
+            running = set(range(processes))
+            while running:
+                try:
+                    event = await asyncio.to_thread(events.get, True, 1)
+                except Empty:
+                    for shard in running:
+                        if not shards[shard].is_alive():
+                            raise RuntimeError(
+                                f"分片 {shard} 的工作进程异常退出（退出码 {shards[shard].exitcode}）")
+                    continue
+                kind, shard = event[:2]
+                if kind == 'page':
+                    url, lastmod, status, error_message = event[2:]
+                    # 页面计数在工作进程中进行，这里同步到本进程的指标
+                    PAGES_CRAWLED.inc(status=status)
+                    record(url, lastmod, status, error_message)
+                elif kind == 'done':
+                    running.discard(shard)
+                    host_stats.update(event[2])
+                else:
+                    raise RuntimeError(f"分片 {shard} 爬取失败: {event[2]}")
+        
+        try:
+            await gather_or_cancel(dispatch(), collect())
+            for process in shards:
+                await asyncio.to_thread(process.join, 10)
+        finally:
+            for process in shards:
+                if process.is_alive():
+                    process.terminate()
+        return host_stats
 
     def _extract_content(self, result):
         """从结果中提取内容"""
@@ -1616,25 +4894,36 @@ class CrawlerGUI:
         # 清空现有内容
         self.clear_texts()
         
-        # 显示内容
+        # 拼接成一个字符串后分页显示
+        parts = []
         if content:
-            self.content_text.insert(tk.END, content)
+            parts.append(content)
         
         # 显示元数据
         if metadata:
             if self.extract_metadata_var.get():
-                self.content_text.insert(tk.END, "\n\n=== 元数据 ===\n")
+                parts.append("\n\n=== 元数据 ===\n")
                 for key, value in metadata.items():
                     if value and self.metadata_options.get(f'extract_{key}', tk.BooleanVar(value=False)).get():
-                        self.content_text.insert(tk.END, f"{key}: {value}\n")
+                        parts.append(f"{key}: {value}\n")
         
         # 显示内容分析结果
         if analysis:
             if self.enable_content_analysis_var.get():
-                self.content_text.insert(tk.END, "\n\n=== 内容分析 ===\n")
+                parts.append("\n\n=== 内容分析 ===\n")
                 for key, value in analysis.items():
                     if value and self.content_analysis_options.get(key, tk.BooleanVar(value=False)).get():
-                        self.content_text.insert(tk.END, f"{key}: {value}\n")
+                        parts.append(f"{key}: {value}\n")
+        
+        # 更新文件列表
+        if saved_files:
+            for file_type, file_path in saved_files.items():
+                if file_path:
+                    self.files_listbox.insert(tk.END, str(file_path))
+                    if file_type == 'content':
+                        parts.append(f"\n\n内容已保存至: {file_path}")
+        
+        self.content_view.set_text(''.join(parts))
         
         # 显示媒体信息
         if media:
@@ -1643,28 +4932,53 @@ class CrawlerGUI:
         # 显示链接信息
         if links:
             self.display_links_info(links)
-        
-        # 更新文件列表
-        if saved_files:
-            for file_type, file_path in saved_files.items():
-                if file_path:
-                    self.files_listbox.insert(tk.END, str(file_path))
-                    if file_type == 'content':
-                        self.content_text.insert(tk.END, f"\n\n内容已保存至: {file_path}")
 
-    def _build_configs(self):
-        """构建爬取配置"""
+    def _create_crawler(self, crawler_config):
+        """创建爬虫：按资源拦截方案注册请求拦截钩子，HTTP优先时用 HybridCrawler 包装"""
+        crawler_config = dict(crawler_config)
+        fetch_mode = crawler_config.pop('fetch_mode', 'browser')
+        blocker = ResourceBlocker(crawler_config.pop('resource_profile', 'full'))
+
+        def create_browser():
+            from crawl4ai import AsyncWebCrawler
+            crawler = AsyncWebCrawler(**crawler_config)
+            if blocker.active:
+                strategy = getattr(crawler, 'crawler_strategy', None)
+                if hasattr(strategy, 'set_hook'):
+                    strategy.set_hook('on_page_context_created', blocker.attach)
+                    logging.info(f"资源拦截方案: {blocker.profile}")
+                else:
+                    logging.warning("当前 crawl4ai 版本不支持页面钩子，资源拦截未生效")
+            return crawler
+
+        if fetch_mode == 'hybrid':
+            return HybridCrawler(create_browser)
+        return create_browser()
+
+    def _build_configs(self, url=None):
+        """构建爬取配置
+
+        url 默认使用地址栏中的URL；批量爬取时传入站点地图地址，地址栏可以为空，
+        各页面的地址在爬取时替换。
+        """
         try:
             # 获取基本配置
             crawler_config = {
                 'browser_type': self.browser_type.get(),
                 'headless': self.headless_var.get(),
-                'verbose': self.verbose_var.get()
+                'verbose': self.verbose_var.get(),
+                'resource_profile': self.resource_profile_var.get(),
+                'fetch_mode': 'hybrid' if self.http_first_var.get() else 'browser'
             }
+            # 截图和网页克隆需要完整的页面资源
+            if crawler_config['resource_profile'] != 'full' and (
+                    self.screenshot_var.get() or self.enable_page_clone.get()):
+                logging.info("已开启截图或网页克隆，资源拦截方案改为 full")
+                crawler_config['resource_profile'] = 'full'
 
             # 构建爬取配置
             crawl_config = {
-                'url': self.url_var.get(),
+                'url': url or self.url_var.get(),
                 'word_count_threshold': self.word_count_var.get(),
                 'exclude_external_links': self.exclude_external_links_var.get(),
                 'exclude_external_images': self.exclude_external_images_var.get(),
@@ -1946,19 +5260,71 @@ class CrawlerGUI:
 
     def clear_texts(self):
         """清空所有文本区域"""
-        self.content_text.delete(1.0, tk.END)
+        self.content_view.clear()
         self.media_text.delete(1.0, tk.END)
-        self.links_text.delete(1.0, tk.END)
+        self.links_view.clear()
         self.files_listbox.delete(0, tk.END)
         self.image_label.config(image='')  # 清空像显示
 
+    def toggle_metrics_server(self):
+        """启动或停止本地指标接口"""
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if not self.metrics_var.get():
+            return
+        try:
+            server = MetricsServer(METRICS, port=self.metrics_port_var.get())
+            server.start()
+            self.metrics_server = server
+            logging.info(f"指标接口已启动: http://{server.host}:{server.port}/metrics")
+            self.show_status(f"指标接口: http://{server.host}:{server.port}/metrics")
+        except (OSError, tk.TclError) as e:
+            self.metrics_var.set(False)
+            messagebox.showerror("错误", f"启动指标接口失败: {str(e)}")
+
+    def _start_profiler(self, url):
+        """性能分析模式开启时开始分析，返回 CrawlProfiler，否则返回 None"""
+        if not self.profile_var.get():
+            return None
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]
+        profiler = CrawlProfiler(self.directories['data'], f"{self.get_safe_filename(url)}_{digest}", url)
+        profiler.start()
+        return profiler
+
+    def _finish_profiler(self, profiler):
+        """结束分析并在界面中提示报告位置"""
+        try:
+            paths = profiler.stop()
+        except Exception as e:
+            logging.error(f"保存性能分析报告失败: {e}")
+            return
+        self.saved_files.extend(paths)
+        report = ", ".join(str(path) for path in paths)
+        logging.info(f"性能分析报告已保存至: {report}")
+        self.show_status(f"性能分析报告已保存至: {report}")
+
+    def show_status(self, message):
+        """在状态栏显示状态消息（可在任意线程调用），多行消息合并为一行"""
+        message = "  ".join(line.strip() for line in str(message).splitlines() if line.strip())
+        self.root.after(0, lambda: self.status_var.set(message))
+
+    def publish_progress(self, percentage, message):
+        """发布主进度条的更新（可在任意线程调用，由进度总线合并刷新）"""
+        self.progress_bus.publish('main', self._set_progress, percentage, message)
+
+    def _set_progress(self, percentage, message):
+        """在主线程中更新主进度条和进度文字"""
+        self.progress_var.set(percentage)
+        self.progress_label.config(text=message)
+
     def update_gui(self, data):
         """更新GUI显示"""
         try:
             # 清空现有内容
-            self.content_text.delete('1.0', tk.END)
+            self.content_view.clear()
             self.media_text.delete('1.0', tk.END)
-            self.links_text.delete('1.0', tk.END)
+            self.links_view.clear()
 
             # 重新启用爬取按钮
             self.crawl_button.configure(state='normal')
@@ -1966,10 +5332,9 @@ class CrawlerGUI:
             if data.get('success'):
                 # 显示内容
                 if data.get('content'):
-                    self.content_text.insert(tk.END, f"【{data['format_type']}格式输出】\n")
-                    self.content_text.insert(tk.END, data['content'])
+                    self.content_view.set_text(f"【{data['format_type']}格式输出】\n{data['content']}")
                 else:
-                    self.content_text.insert(tk.END, "未获取到内容。\n")
+                    self.status_var.set("未获取到内容")
 
                 # 显示媒体信息
                 if any(data.get('media', {}).values()):
@@ -1985,16 +5350,16 @@ class CrawlerGUI:
 
                 # 显示文件保存信息
                 if data.get('content_file'):
-                    self.content_text.insert(tk.END, f"\n\n内容已保存至: {data['content_file']}")
+                    self.status_var.set(f"内容已保存至: {data['content_file']}")
 
             elif data.get('error'):
-                self.content_text.insert(tk.END, f"发生错误: {data['error']}")
+                self.status_var.set(f"发生错误: {data['error']}")
             else:
-                self.content_text.insert(tk.END, "未知错误: 未能获取到任何结果")
+                self.status_var.set("未知错误: 未能获取到任何结果")
 
         except Exception as e:
             logging.error(f"GUI更新时发生错误: {str(e)}")
-            self.content_text.insert(tk.END, f"GUI更新错误: {str(e)}")
+            self.status_var.set(f"GUI更新错误: {str(e)}")
 
     def display_media_info(self, media_data):
         """显示媒体信息"""
@@ -2028,26 +5393,32 @@ class CrawlerGUI:
             self.media_text.insert(tk.END, "未找到媒体内容\n")
 
     def display_links_info(self, links_data):
-        """显示链接信息"""
+        """显示链接信息（拼接后一次性分页显示）"""
+        links_info = []
+        
         if links_data.get('internal'):
-            self.links_text.insert(tk.END, "内部链接:\n")
+            links_info.append("内部链接:")
             for link in links_data['internal']:
                 if isinstance(link, dict):
-                    self.links_text.insert(tk.END, f"- {link.get('href', 'N/A')}\n")
+                    links_info.append(f"- {link.get('href', 'N/A')}")
                     if link.get('text'):
-                        self.links_text.insert(tk.END, f"  文本: {link['text']}\n")
+                        links_info.append(f"  文本: {link['text']}")
                 else:
-                    self.links_text.insert(tk.END, f"- {link}\n")
+                    links_info.append(f"- {link}")
 
         if links_data.get('external'):
-            self.links_text.insert(tk.END, "\n外部链接:\n")
+            links_info.append("\n外部链接:")
             for link in links_data['external']:
                 if isinstance(link, dict):
-                    self.links_text.insert(tk.END, f"- {link.get('href', 'N/A')}\n")
+                    links_info.append(f"- {link.get('href', 'N/A')}")
                     if link.get('text'):
-                        self.links_text.insert(tk.END, f"  文本: {link['text']}\n")
+                        links_info.append(f"  文本: {link['text']}")
                 else:
-                    self.links_text.insert(tk.END, f"- {link}\n")
+                    links_info.append(f"- {link}")
+
+        if links_info:
+            links_info.append("")
+            self.links_view.set_text("\n".join(links_info))
 
     def open_file(self, event):
         """打开选中的文件"""
@@ -2076,6 +5447,7 @@ class CrawlerGUI:
             # 检查文件是否为图像文件（以 .png 结尾）
             if file_path.suffix.lower() in ['.png', '.jpg', '.jpeg', '.gif', '.bmp']:
                 try:
+                    from PIL import Image, ImageTk
                     image = Image.open(file_path)
                     image.thumbnail((400, 400))  # 调整图像大小
                     self.photo = ImageTk.PhotoImage(image)
@@ -2284,6 +5656,8 @@ class CrawlerGUI:
 
     async def save_browsable_page(self, html_content, url, resources=None):
         """保存完整的可浏览网页"""
+        import aiohttp
+
         if not self.enable_page_clone.get():
             return None
             
@@ -2298,10 +5672,7 @@ class CrawlerGUI:
             ))
             
             def update_progress(percentage, message):
-                self.root.after(0, lambda: (
-                    self.progress_var.set(percentage),
-                    self.progress_label.config(text=message)
-                ))
+                self.publish_progress(percentage, message)
             
             update_progress(0, "准备克隆网页...")
             
@@ -2368,6 +5739,9 @@ class CrawlerGUI:
                 total_resources = 1
             
             resources_processed = 0
+            # 资源下载的重试次数比页面少，熔断也更快：一个页面的资源通常集中在少数几个主机上
+            retry_policy = RetryPolicy(retries={'timeout': 1, 'connection': 1, 'server': 2},
+                                       base=0.5, cap=10.0, failure_threshold=3, open_seconds=30.0)
             
             async def download_resource(resource_type, element, attr, url_part=None):
                 """下载并保存资源文件"""
@@ -2379,10 +5753,8 @@ class CrawlerGUI:
                     if not resource_url:
                         return None
                     
-                    # 设置超和重试参数
+                    # 设置超时参数
                     timeout = aiohttp.ClientTimeout(total=30, connect=10)
-                    max_retries = 3
-                    retry_delay = 1  # 重试延迟（秒）
 
                     # 检查是否是 data URI
                     if resource_url.startswith('data:'):
@@ -2402,10 +5774,12 @@ class CrawlerGUI:
                             
                             # 检查是否已下载
                             if file_path.exists():
+                                CACHE_REQUESTS.inc(cache="clone_resource", result="hit")
                                 resources_processed += 1
                                 progress = 10 + (resources_processed / total_resources * 80)
                                 update_progress(progress, f"使用缓存: {file_name}")
                                 return relative_path
+                            CACHE_REQUESTS.inc(cache="clone_resource", result="miss")
                             
                             # 解码并保存数据
                             if ';base64,' in header:
@@ -2417,6 +5791,7 @@ class CrawlerGUI:
                             
                             async with aiofiles.open(file_path, 'wb') as f:
                                 await f.write(decoded_data)
+                            RESOURCE_REQUESTS.inc(type=resource_type, result="data_uri")
                             
                             resources_processed += 1
                             progress = 10 + (resources_processed / total_resources * 80)
@@ -2449,38 +5824,43 @@ class CrawlerGUI:
                     
                     # 检查是否已下载
                     if file_path.exists():
+                        CACHE_REQUESTS.inc(cache="clone_resource", result="hit")
                         resources_processed += 1
                         progress = 10 + (resources_processed / total_resources * 80)
                         update_progress(progress, f"使用缓存: {file_name}")
                         return relative_path
+                    CACHE_REQUESTS.inc(cache="clone_resource", result="miss")
                     
                     # 如果资源已存在于resources字典中
                     if resources and absolute_url in resources:
                         async with aiofiles.open(file_path, 'wb') as f:
                             await f.write(resources[absolute_url])
+                        RESOURCE_REQUESTS.inc(type=resource_type, result="preloaded")
                     else:
-                        # 添加重试逻辑
-                        for retry in range(max_retries):
-                            try:
-                                async with aiohttp.ClientSession(timeout=timeout) as session:
-                                    async with session.get(absolute_url, ssl=False) as response:  # 禁用SSL验证
-                                        if response.status == 200:
-                                            content = await response.read()
-                                            async with aiofiles.open(file_path, 'wb') as f:
-                                                await f.write(content)
-                                            break  # 下载成功，跳出重试循环
-                                        elif response.status == 404:
-                                            logging.warning(f"资源不存在: {absolute_url}")
-                                            break  # 资源不存在，不需要重试
-                                        else:
-                                            raise aiohttp.ClientError(f"HTTP {response.status}")
-                            except Exception as e:
-                                if retry < max_retries - 1:
-                                    logging.warning(f"下载失败，正在重试 ({retry + 1}/{max_retries}): {absolute_url}")
-                                    await asyncio.sleep(retry_delay * (retry + 1))  # 递增延迟
-                                else:
-                                    logging.error(f"下载失败 {absolute_url}: {str(e)}")
-                                    return None
+                        async def fetch():
+                            async with aiohttp.ClientSession(timeout=timeout) as session:
+                                async with session.get(absolute_url, ssl=False) as response:  # 禁用SSL验证
+                                    if response.status != 200:
+                                        raise HttpStatusError(
+                                            response.status, parse_retry_after(response.headers.get('Retry-After')))
+                                    return await response.read()
+                        
+                        try:
+                            # 按错误类别重试，资源所在主机连续失败时熔断，不再等待它的其他资源
+                            content = await retry_policy.run(absolute_url, fetch)
+                        except Exception as e:
+                            kind = RetryPolicy.classify(e)
+                            if kind == 'not_found':
+                                logging.warning(f"资源不存在: {absolute_url}")
+                            else:
+                                logging.error(f"下载失败（{RetryPolicy.LABELS[kind]}） {absolute_url}: {e}")
+                            RESOURCE_REQUESTS.inc(type=resource_type, result=kind)
+                            resources_processed += 1
+                            return None
+                        async with aiofiles.open(file_path, 'wb') as f:
+                            await f.write(content)
+                        RESOURCE_BYTES.inc(len(content), type=resource_type)
+                        RESOURCE_REQUESTS.inc(type=resource_type, result="ok")
                     
                     resources_processed += 1
                     progress = 10 + (resources_processed / total_resources * 80)
@@ -2498,7 +5878,8 @@ class CrawlerGUI:
             
             async def controlled_download(*args):
                 async with semaphore:
-                    return await download_resource(*args)
+                    with INFLIGHT.track(kind="resource_download"):
+                        return await download_resource(*args)
 
             # 修改任务创建部分
             tasks = []
@@ -2524,7 +5905,11 @@ class CrawlerGUI:
                 if len(item) == 4:  # srcset或style中的URL
                     resource_type, element, attr, url_part = item
                     if attr == 'style':
-                        element['style'] = element['style'].replace(url_part, str(path))
+                        if element.name == 'style':
+                            # <style> 标签中的URL在标签内容里，而不是 style 属性
+                            element.string = element.string.replace(url_part, str(path))
+                        else:
+                            element['style'] = element['style'].replace(url_part, str(path))
                     elif attr == 'srcset':
                         srcset = element['srcset'].split(',')
                         new_srcset = []
@@ -2580,7 +5965,7 @@ class CrawlerGUI:
             self.root.after(3000, lambda: self.progress_frame.pack_forget())
             return None
 
-    async def extract_pure_text(self, html_content):
+    async def extract_pure_text(self, html_content, url=None):
         """提取网页纯文本内容"""
         if not self.enable_text_extract.get():
             return None
@@ -2595,209 +5980,545 @@ class CrawlerGUI:
             import io
             from PIL import Image
 
-            # 显示进度条
-            self.root.after(0, lambda: (
-                self.progress_frame.pack(fill=tk.X, pady=5),
-                self.progress_bar.pack(fill=tk.X),
-                self.progress_label.pack(fill=tk.X)
-            ))
+            # 显示进度条
+            self.root.after(0, lambda: (
+                self.progress_frame.pack(fill=tk.X, pady=5),
+                self.progress_bar.pack(fill=tk.X),
+                self.progress_label.pack(fill=tk.X)
+            ))
+
+            def update_progress(percentage, message):
+                self.publish_progress(percentage, message)
+
+            update_progress(0, "准备提取纯文本...")
+
+            # 解析HTML
+            soup = BeautifulSoup(html_content, 'html.parser')
+            
+            update_progress(20, "移除无用元素...")
+            
+            # 移除脚本和样式
+            for element in soup(['script', 'style', 'noscript']):
+                element.decompose()
+
+            # 根据选项移除元素
+            if self.text_extract_options['remove_ads'].get():
+                for element in soup.find_all(class_=re.compile(r'ad|banner|sponsor|commercial', re.I)):
+                    element.decompose()
+
+            if self.text_extract_options['remove_menus'].get():
+                for element in soup.find_all(['nav', 'menu']):
+                    element.decompose()
+                for element in soup.find_all(class_=re.compile(r'menu|nav|navigation', re.I)):
+                    element.decompose()
+
+            if self.text_extract_options['remove_headers'].get():
+                for element in soup.find_all(['header']):
+                    element.decompose()
+                for element in soup.find_all(class_=re.compile(r'header|top-bar', re.I)):
+                    element.decompose()
+
+            if self.text_extract_options['remove_footers'].get():
+                for element in soup.find_all(['footer']):
+                    element.decompose()
+                for element in soup.find_all(class_=re.compile(r'footer|bottom', re.I)):
+                    element.decompose()
+
+            # 识别主要内容区域
+            if self.text_extract_options['keep_main_content'].get():
+                main_content = None
+                # 尝试找到主要内容区域
+                for selector in ['main', 'article', '#content', '.content', '#main', '.main']:
+                    main_content = soup.select_one(selector)
+                    if main_content:
+                        soup = BeautifulSoup(str(main_content), 'html.parser')
+                        break
+
+            update_progress(40, "提取内容...")
+
+            # 创建Word文档
+            doc = Document()
+            
+            # 设置文档标题
+            if hasattr(soup.find('title'), 'text'):
+                title = soup.find('title').text.strip()
+                heading = doc.add_heading(title, 0)
+                heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+            # 处理内容
+            elements = []
+            for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'img', 'table', 'a', 'ul', 'ol']):
+                if element.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+                    level = int(element.name[1])
+                    text = element.get_text(strip=True)
+                    if text:
+                        elements.append(('heading', level, text))
+                
+                elif element.name == 'p':
+                    text = element.get_text(strip=True)
+                    if text and len(text) > 20:
+                        elements.append(('paragraph', text))
+                
+                elif element.name == 'img' and self.text_extract_options['keep_images'].get():
+                    src = element.get('src', '')
+                    alt = element.get('alt', '图片')
+                    if src:
+                        elements.append(('image', src, alt))
+                
+                elif element.name == 'table' and self.text_extract_options['keep_tables'].get():
+                    elements.append(('table', element))
+                
+                elif element.name == 'a' and self.text_extract_options['keep_links'].get():
+                    text = element.get_text(strip=True)
+                    href = element.get('href', '')
+                    if text and href:
+                        elements.append(('link', text, href))
+                
+                elif element.name in ['ul', 'ol']:
+                    items = []
+                    for li in element.find_all('li'):
+                        text = li.get_text(strip=True)
+                        if text:
+                            items.append(text)
+                    if items:
+                        elements.append(('list', element.name, items))
+
+            update_progress(60, "处理格式...")
+
+            # 处理元素
+            for element in elements:
+                if element[0] == 'heading':
+                    heading = doc.add_heading('', element[1])
+                    heading.add_run(element[2])
+                
+                elif element[0] == 'paragraph':
+                    para = doc.add_paragraph()
+                    para.add_run(element[1])
+                
+                elif element[0] == 'image':
+                    try:
+                        response = await self.download_image(element[1])
+                        if response:
+                            doc.add_picture(io.BytesIO(response), width=Pt(300))
+                            if element[2]:
+                                doc.add_paragraph(element[2], style='Caption')
+                    except Exception as e:
+                        logging.error(f"图片处理失败: {e}")
+                
+                elif element[0] == 'table':
+                    rows = element[1].find_all('tr')
+                    if rows:
+                        table = doc.add_table(rows=len(rows), cols=len(rows[0].find_all(['td', 'th'])))
+                        for i, row in enumerate(rows):
+                            for j, cell in enumerate(row.find_all(['td', 'th'])):  # 添加缺少的右括号
+                                table.cell(i, j).text = cell.get_text(strip=True)
+                
+                elif element[0] == 'link':
+                    para = doc.add_paragraph()
+                    run = para.add_run(f"{element[1]} ({element[2]})")
+                    run.font.color.rgb = RGBColor(0, 0, 255)
+                
+                elif element[0] == 'list':
+                    for item in element[2]:
+                        para = doc.add_paragraph()
+                        para.style = 'List Bullet' if element[1] == 'ul' else 'List Number'
+                        para.add_run(item)
+
+            update_progress(80, "保存文件...")
+
+            # 保存文件
+            file_name = self.get_safe_filename(url or self.url_var.get())
+            if self.text_extract_options['save_as_word'].get():
+                file_path = self.base_dir / "text" / f"{file_name}_content.docx"
+                doc.save(str(file_path))
+            else:
+                # 保存为纯文本
+                file_path = self.base_dir / "text" / f"{file_name}_content.txt"
+                text_content = []
+                for element in elements:
+                    if element[0] == 'heading':
+                        text_content.append(f"\n{'#' * element[1]} {element[2]}\n")
+                    elif element[0] == 'paragraph':
+                        text_content.append(element[1])
+                    elif element[0] == 'link':
+                        text_content.append(f"{element[1]} <{element[2]}>")
+                    elif element[0] == 'list':
+                        for i, item in enumerate(element[2], 1):
+                            text_content.append(f"{'*' if element[1] == 'ul' else str(i)+'.'} {item}")
+                
+                async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
+                    await f.write('\n\n'.join(text_content))
+
+            update_progress(100, "提取完成!")
+            self.root.after(3000, lambda: self.progress_frame.pack_forget())
+            
+            self.saved_files.append(file_path)
+            return file_path
+
+        except ImportError as e:
+            logging.error(f"导入所需模块失败: {e}")
+            return None
+        except Exception as e:
+            logging.error(f"提取纯文本失败: {e}")
+            update_progress(100, f"提取失败: {str(e)}")
+            self.root.after(3000, lambda: self.progress_frame.pack_forget())
+            return None
+
+    async def download_image(self, url):
+        """下载图片"""
+        import aiohttp
+
+        try:
+            if url.startswith('data:'):
+                # 处理 base64 图片
+                header, data = url.split(',', 1)
+                return base64.b64decode(data)
+            else:
+                # 下载网络图片
+                async with aiohttp.ClientSession() as session:
+                    async with session.get(url, ssl=False) as response:
+                        if response.status == 200:
+                            return await response.read()
+        except Exception as e:
+            logging.error(f"下载图片失败 {url}: {e}")
+            return None
+
+    def _ensure_llm_settings(self):
+        """首次使用时创建LLM优化设置面板"""
+        if self.llm_settings_frame is not None:
+            return
+        text_frame = self._text_frame
+
+        # LLM设置框架
+        self.llm_settings_frame = ttk.LabelFrame(text_frame, text="LLM优化设置")
+        
+        # 模型类型选择 (只保留这一处定义)
+        model_type_frame = ttk.Frame(self.llm_settings_frame)
+        model_type_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(model_type_frame, text="选择模型类型:").pack(side=tk.LEFT)
+        
+        self.model_type_var = tk.StringVar(value="local")  # 设置初始值
+        ttk.Radiobutton(model_type_frame, text="本地模型", 
+                        variable=self.model_type_var, 
+                        value="local",
+                        command=self.toggle_model_settings).pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(model_type_frame, text="API模型", 
+                        variable=self.model_type_var, 
+                        value="api",
+                        command=self.toggle_model_settings).pack(side=tk.LEFT, padx=5)
+
+        # 本地模型设置���架 (只保留这一处定义)
+        self.local_model_frame = ttk.LabelFrame(self.llm_settings_frame, text="本地模型设置")
+        self.local_model_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        # 本地模型选择
+        llm_model_frame = ttk.Frame(self.local_model_frame)
+        llm_model_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(llm_model_frame, text="选择模型:").pack(side=tk.LEFT)
+
+        self.llm_model_var = tk.StringVar()
+        self.llm_model_combo = ttk.Combobox(llm_model_frame, 
+                                           textvariable=self.llm_model_var,
+                                           values=self.scan_local_models())
+        self.llm_model_combo.pack(side=tk.LEFT, padx=5)
+
+        # 添加模型管理按钮
+        ttk.Button(llm_model_frame, text="模型管理", 
+                  command=self.show_model_manager).pack(side=tk.LEFT, padx=5)
+
+        # 刷新模型列表按钮
+        ttk.Button(llm_model_frame, text="刷新列表", 
+                  command=lambda: self.refresh_models("local")).pack(side=tk.LEFT, padx=5)
+
+        # 上下文大小上限：实际大小根据提示长度自动规划
+        llm_ctx_frame = ttk.Frame(self.local_model_frame)
+        llm_ctx_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(llm_ctx_frame, text="最大上下文:").pack(side=tk.LEFT)
+        self.local_max_ctx_var = tk.IntVar(value=8192)
+        ttk.Entry(llm_ctx_frame, textvariable=self.local_max_ctx_var,
+                  width=8).pack(side=tk.LEFT, padx=5)
+        ttk.Label(llm_ctx_frame, text="(根据提示长度自动选择上下文和生成长度，超出时自动分块)",
+                  foreground="gray").pack(side=tk.LEFT)
+
+        # 本地推理服务：在独立进程中常驻模型，供批量优化、爬取等共享
+        llm_server_frame = ttk.Frame(self.local_model_frame)
+        llm_server_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.llm_server_button = ttk.Button(llm_server_frame, text="启动本地推理服务",
+                                            command=self.toggle_local_llm_server)
+        self.llm_server_button.pack(side=tk.LEFT)
+        self.llm_server_status = ttk.Label(llm_server_frame, text="未运行", foreground="gray")
+        self.llm_server_status.pack(side=tk.LEFT, padx=5)
+
+        # API模型设置框架 (只保留这一处定义)
+        self.api_model_frame = ttk.LabelFrame(self.llm_settings_frame, text="API模型设置")
+        self.api_model_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.api_model_frame.pack_forget()  # 默认隐藏
+
+        # API提供商选择
+        api_provider_frame = ttk.Frame(self.api_model_frame)
+        api_provider_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(api_provider_frame, text="API提供商:").pack(side=tk.LEFT)
+
+        self.api_providers = {
+            "Gitee AI": {
+                "base_url": "https://ai.gitee.com/v1",
+                "models": [
+                    "Qwen2.5-72B-Instruct",
+                    "Qwen2.5-32B-Instruct", 
+                    "Qwen2.5-14B-Instruct",
+                    "Qwen2.5-7B-Instruct",
+                    "Qwen2.5-Coder-32B-Instruct",
+                    "Yi-34B-Chat",
+                    "deepseek-coder-33B-instruct",
+                    "glm-4-9b-chat",
+                    "Qwen2-72B-Instruct",
+                    "Qwen2-7B-Instruct",
+                    "code-raccoon-v1",
+                    "codegeex4-all-9b"
+                ]
+            },
+            "OpenAI": {
+                "base_url": "https://api.openai.com/v1",
+                "models": ["gpt-4", "gpt-3.5-turbo"]
+            },
+            "本地推理服务": {
+                "base_url": "http://127.0.0.1:8765/v1",
+                "models": []
+            },
+            "自定义": {
+                "base_url": "",
+                "models": []
+            }
+        }
+
+        self.api_provider_var = tk.StringVar(value="Gitee AI")
+        self.api_provider_combo = ttk.Combobox(api_provider_frame, 
+                                          textvariable=self.api_provider_var,
+                                          values=list(self.api_providers.keys()))
+        self.api_provider_combo.pack(side=tk.LEFT, padx=5)
+        self.api_provider_combo.bind('<<ComboboxSelected>>', self.on_api_provider_change)
+
+        # API URL输入框
+        api_url_frame = ttk.Frame(self.api_model_frame)
+        api_url_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(api_url_frame, text="API URL:").pack(side=tk.LEFT)
+        self.api_url_var = tk.StringVar(value=self.api_providers["Gitee AI"]["base_url"])
+        self.api_url_entry = ttk.Entry(api_url_frame, textvariable=self.api_url_var)
+        self.api_url_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+        # 修改 API Key 输入框部分的布局
+        api_key_frame = ttk.Frame(self.api_model_frame)
+        api_key_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        # 创建左侧框架用于标签和输入框
+        left_frame = ttk.Frame(api_key_frame)
+        left_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        ttk.Label(left_frame, text="API Key:").pack(side=tk.LEFT)
+
+        # 修改默认值为两个 key 的组合
+        default_keys = [
+            "99ZE2NVXCNLWIVWC6HQBGV5GMIKCEA9D8FXL16XN",
+            "R6XZ3CRX2ZXWZ5XLCR3CLHDRNNQB6OAHYHTMJCU6"  # 更新为新的 Key
+        ]
+        self.api_key_var = tk.StringVar(value=",".join(default_keys))
+        self.api_key_entry = ttk.Entry(left_frame, textvariable=self.api_key_var, show="*")
+        self.api_key_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+
+        # 创建右侧框架用于按钮和指示器
+        right_frame = ttk.Frame(api_key_frame)
+        right_frame.pack(side=tk.RIGHT)
+
+        # 添加当前使用的 Key 标签
+        self.key_indicator = ttk.Label(right_frame, text="使用: Key 1/2")
+        self.key_indicator.pack(side=tk.LEFT, padx=5)
+
+        # 添加切换 API Key 的按钮
+        ttk.Button(right_frame, text="切换Key", 
+          command=self.switch_api_key).pack(side=tk.LEFT, padx=5)
+
+        # API模型选择
+        api_model_select_frame = ttk.Frame(self.api_model_frame)
+        api_model_select_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(api_model_select_frame, text="选择模型:").pack(side=tk.LEFT)
+        self.api_model_var = tk.StringVar()
+        self.api_model_combo = ttk.Combobox(api_model_select_frame, 
+                                       textvariable=self.api_model_var,
+                                       values=self.api_providers["Gitee AI"]["models"])
+        self.api_model_combo.pack(side=tk.LEFT, padx=5)
+
+        # 刷新API模型列表按钮
+        ttk.Button(api_model_select_frame, text="刷新模型列表", 
+                    command=lambda: self.refresh_models("api")).pack(side=tk.LEFT, padx=5)
+
+        # 添加提示词设置框架
+        prompt_settings_frame = ttk.LabelFrame(self.api_model_frame, text="提示词设置")
+        prompt_settings_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        # 添加默认提示词
+        self.default_system_prompt = """你是一个专业的文本优化助手。请按照以下要求优化文本:
+1. 保持原文的核心内容和主要信息不变
+2. 优化文本结构, 使段落组织更加合理
+3. 改善表达方式, 使语言更加流畅自然
+4. 纠正语法错误和不准确的表述
+5. 调整格式, 使文本更易阅读
+
+请直接返回优化后的文本, 无需解释修改内容."""
+
+        # 创建提示词编辑区域
+        self.enable_custom_system_prompt = tk.BooleanVar(value=False)
+        ttk.Checkbutton(prompt_settings_frame, text="自定义系统提示词",
+                        variable=self.enable_custom_system_prompt,
+                        command=self.toggle_system_prompt).pack(anchor=tk.W)
+
+        self.system_prompt_text = scrolledtext.ScrolledText(
+            prompt_settings_frame, height=8, width=50, state=tk.DISABLED)
+        self.system_prompt_text.pack(fill=tk.X, pady=2)
 
-            def update_progress(percentage, message):
-                self.root.after(0, lambda: (
-                    self.progress_var.set(percentage),
-                    self.progress_label.config(text=message)
-                ))
+        # 显示默认提示词（灰色）
+        self.system_prompt_text.configure(state=tk.NORMAL)
+        self.system_prompt_text.insert(tk.END, self.default_system_prompt)
+        self.system_prompt_text.configure(state=tk.DISABLED, fg='gray')
 
-            update_progress(0, "准备提取纯文本...")
+        # 添加重置按钮
+        ttk.Button(prompt_settings_frame, text="重置为默认提示词",
+                   command=self.reset_system_prompt).pack(anchor=tk.E, pady=2)
 
-            # 解析HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
+        # API参数设置框架
+        api_params_frame = ttk.LabelFrame(self.api_model_frame, text="API参数设置")
+        api_params_frame.pack(fill=tk.X, padx=5, pady=5)
+
+        # API参数变量
+        self.api_params = {
+            'stream': tk.BooleanVar(value=False),
+            'max_tokens': tk.IntVar(value=512),
+            'temperature': tk.DoubleVar(value=0.7),
+            'top_p': tk.DoubleVar(value=0.7),
+            'top_k': tk.IntVar(value=50),
+            'frequency_penalty': tk.IntVar(value=1),
+            'auto_max_tokens': tk.BooleanVar(value=True),
+            'context_window': tk.IntVar(value=32768),
+            'max_retries': tk.IntVar(value=3)
+        }
+
+        # 创建参数输入界面
+        def create_param_entry(parent, label, var, default_value, tooltip):
+            frame = ttk.Frame(parent)
+            frame.pack(fill=tk.X, pady=2)
+            ttk.Label(frame, text=f"{label}:").pack(side=tk.LEFT)
             
-            update_progress(20, "移除无用元素...")
+            if isinstance(var, tk.BooleanVar):
+                ttk.Checkbutton(frame, variable=var).pack(side=tk.LEFT, padx=5)
+            else:
+                ttk.Entry(frame, textvariable=var, width=10).pack(side=tk.LEFT, padx=5)
             
-            # 移除脚本和样式
-            for element in soup(['script', 'style', 'noscript']):
-                element.decompose()
+            ttk.Label(frame, text=f"(默认: {default_value})", 
+                     foreground="gray").pack(side=tk.LEFT)
+            ttk.Label(frame, text=f"- {tooltip}", 
+                     foreground="gray").pack(side=tk.LEFT, padx=5)
 
-            # 根据选项移除元素
-            if self.text_extract_options['remove_ads'].get():
-                for element in soup.find_all(class_=re.compile(r'ad|banner|sponsor|commercial', re.I)):
-                    element.decompose()
+        # 参数说明
+        params_info = {
+            'stream': ("流式响应", "False", "启用流式返回生成的文本"),
+            'max_tokens': ("最大生成长度", "512", "生成文本的最大token数量"),
+            'temperature': ("温度系数", "0.7", "控制生成文本的随机性，值越大越随机"),
+            'top_p': ("Top P", "0.7", "控制生成文本的多��性"),
+            'top_k': ("Top K", "50", "从概率最大的K个词中采样"),
+            'frequency_penalty': ("频率惩罚", "1", "降低重复文本的生成概率"),
+            'auto_max_tokens': ("自动生成长度", "True", "根据提示长度规划生成长度，超长时自动分块"),
+            'context_window': ("上下文窗口", "32768", "模型支持的最大上下文token数"),
+            'max_retries': ("最大重试次数", "3", "遇到429限流或5xx错误时按 Retry-After 等待后重试")
+        }
 
-            if self.text_extract_options['remove_menus'].get():
-                for element in soup.find_all(['nav', 'menu']):
-                    element.decompose()
-                for element in soup.find_all(class_=re.compile(r'menu|nav|navigation', re.I)):
-                    element.decompose()
+        # 创建参数输入界面
+        for param, var in self.api_params.items():
+            label, default, tooltip = params_info[param]
+            create_param_entry(api_params_frame, label, var, default, tooltip)
 
-            if self.text_extract_options['remove_headers'].get():
-                for element in soup.find_all(['header']):
-                    element.decompose()
-                for element in soup.find_all(class_=re.compile(r'header|top-bar', re.I)):
-                    element.decompose()
+        # 添加重置按钮
+        def reset_params():
+            self.api_params['stream'].set(False)
+            self.api_params['max_tokens'].set(512)
+            self.api_params['temperature'].set(0.7)
+            self.api_params['top_p'].set(0.7)
+            self.api_params['top_k'].set(50)
+            self.api_params['frequency_penalty'].set(1)
+            self.api_params['auto_max_tokens'].set(True)
+            self.api_params['context_window'].set(32768)
+            self.api_params['max_retries'].set(3)
 
-            if self.text_extract_options['remove_footers'].get():
-                for element in soup.find_all(['footer']):
-                    element.decompose()
-                for element in soup.find_all(class_=re.compile(r'footer|bottom', re.I)):
-                    element.decompose()
+        reset_frame = ttk.Frame(api_params_frame)
+        reset_frame.pack(fill=tk.X, pady=5)
+        ttk.Button(reset_frame, text="重置为默认值", 
+                  command=reset_params).pack(side=tk.RIGHT)
 
-            # 识别主要内容区域
-            if self.text_extract_options['keep_main_content'].get():
-                main_content = None
-                # 尝试找到主要内容区域
-                for selector in ['main', 'article', '#content', '.content', '#main', '.main']:
-                    main_content = soup.select_one(selector)
-                    if main_content:
-                        soup = BeautifulSoup(str(main_content), 'html.parser')
-                        break
+        # 优化选项框架 (共用，只保留这一处定义)
+        optimize_options_frame = ttk.LabelFrame(self.llm_settings_frame, text="优化选项")
+        optimize_options_frame.pack(fill=tk.X, padx=5, pady=5)
 
-            update_progress(40, "提取内容...")
+        # 定义一次优化选项
+        self.llm_optimize_options = {
+            'improve_readability': tk.BooleanVar(value=True),
+            'enhance_structure': tk.BooleanVar(value=True),
+            'fix_grammar': tk.BooleanVar(value=True),
+            'summarize': tk.BooleanVar(value=False),
+            'translate': tk.BooleanVar(value=False)
+        }
 
-            # 创建Word文档
-            doc = Document()
+        # 创建优化选项界面
+        for i, (option, var) in enumerate(self.llm_optimize_options.items()):
+            row = i // 2
+            col = i % 2
+            option_frame = ttk.Frame(optimize_options_frame)
+            option_frame.grid(row=row, column=col, padx=5, pady=2, sticky="w")
             
-            # 设置文档标题
-            if hasattr(soup.find('title'), 'text'):
-                title = soup.find('title').text.strip()
-                heading = doc.add_heading(title, 0)
-                heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-            # 处理内容
-            elements = []
-            for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'img', 'table', 'a', 'ul', 'ol']):
-                if element.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                    level = int(element.name[1])
-                    text = element.get_text(strip=True)
-                    if text:
-                        elements.append(('heading', level, text))
-                
-                elif element.name == 'p':
-                    text = element.get_text(strip=True)
-                    if text and len(text) > 20:
-                        elements.append(('paragraph', text))
-                
-                elif element.name == 'img' and self.text_extract_options['keep_images'].get():
-                    src = element.get('src', '')
-                    alt = element.get('alt', '图片')
-                    if src:
-                        elements.append(('image', src, alt))
-                
-                elif element.name == 'table' and self.text_extract_options['keep_tables'].get():
-                    elements.append(('table', element))
-                
-                elif element.name == 'a' and self.text_extract_options['keep_links'].get():
-                    text = element.get_text(strip=True)
-                    href = element.get('href', '')
-                    if text and href:
-                        elements.append(('link', text, href))
-                
-                elif element.name in ['ul', 'ol']:
-                    items = []
-                    for li in element.find_all('li'):
-                        text = li.get_text(strip=True)
-                        if text:
-                            items.append(text)
-                    if items:
-                        elements.append(('list', element.name, items))
+            text_map = {
+                'improve_readability': "提升可读性",
+                'enhance_structure': "优化结构",
+                'fix_grammar': "修正语法",
+                'summarize': "生成摘要",
+                'translate': "翻译"
+            }
+            
+            ttk.Checkbutton(option_frame, text=text_map[option],
+                           variable=var).pack(side=tk.LEFT)
 
-            update_progress(60, "处理格式...")
+        # 自定义提示词框架 (共用)
+        prompt_frame = ttk.LabelFrame(self.llm_settings_frame, text="自定义提示词")
+        prompt_frame.pack(fill=tk.X, padx=5, pady=5)
 
-            # 处理元素
-            for element in elements:
-                if element[0] == 'heading':
-                    heading = doc.add_heading('', element[1])
-                    heading.add_run(element[2])
-                
-                elif element[0] == 'paragraph':
-                    para = doc.add_paragraph()
-                    para.add_run(element[1])
-                
-                elif element[0] == 'image':
-                    try:
-                        response = await self.download_image(element[1])
-                        if response:
-                            doc.add_picture(io.BytesIO(response), width=Pt(300))
-                            if element[2]:
-                                doc.add_paragraph(element[2], style='Caption')
-                    except Exception as e:
-                        logging.error(f"图片处理失败: {e}")
-                
-                elif element[0] == 'table':
-                    rows = element[1].find_all('tr')
-                    if rows:
-                        table = doc.add_table(rows=len(rows), cols=len(rows[0].find_all(['td', 'th'])))
-                        for i, row in enumerate(rows):
-                            for j, cell in enumerate(row.find_all(['td', 'th'])):  # 添加缺少的右括号
-                                table.cell(i, j).text = cell.get_text(strip=True)
-                
-                elif element[0] == 'link':
-                    para = doc.add_paragraph()
-                    run = para.add_run(f"{element[1]} ({element[2]})")
-                    run.font.color.rgb = RGBColor(0, 0, 255)
-                
-                elif element[0] == 'list':
-                    for item in element[2]:
-                        para = doc.add_paragraph()
-                        para.style = 'List Bullet' if element[1] == 'ul' else 'List Number'
-                        para.add_run(item)
+        # 添加自定义提示词开关
+        self.enable_custom_prompt = tk.BooleanVar(value=False)
+        ttk.Checkbutton(prompt_frame, text="启用自定义提示词",
+                        variable=self.enable_custom_prompt,
+                        command=self.toggle_custom_prompt).pack(anchor=tk.W)
 
-            update_progress(80, "保存文件...")
+        # 添加提示词输入框
+        self.custom_prompt_text = scrolledtext.ScrolledText(
+            prompt_frame, height=4, state=tk.DISABLED)
+        self.custom_prompt_text.pack(fill=tk.X, pady=2)
 
-            # 保存文件
-            file_name = self.get_safe_filename(self.url_var.get())
-            if self.text_extract_options['save_as_word'].get():
-                file_path = self.base_dir / "text" / f"{file_name}_content.docx"
-                doc.save(str(file_path))
-            else:
-                # 保存为纯文本
-                file_path = self.base_dir / "text" / f"{file_name}_content.txt"
-                text_content = []
-                for element in elements:
-                    if element[0] == 'heading':
-                        text_content.append(f"\n{'#' * element[1]} {element[2]}\n")
-                    elif element[0] == 'paragraph':
-                        text_content.append(element[1])
-                    elif element[0] == 'link':
-                        text_content.append(f"{element[1]} <{element[2]}>")
-                    elif element[0] == 'list':
-                        for i, item in enumerate(element[2], 1):
-                            text_content.append(f"{'*' if element[1] == 'ul' else str(i)+'.'} {item}")
-                
-                async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                    await f.write('\n\n'.join(text_content))
+        # 添加说明标签
+        ttk.Label(prompt_frame, text="不输入则使用默认提示词", 
+                 foreground="gray").pack(anchor=tk.W)
 
-            update_progress(100, "提取完成!")
-            self.root.after(3000, lambda: self.progress_frame.pack_forget())
-            
-            self.saved_files.append(file_path)
-            return file_path
+        # 批量处理按钮 (共用)
+        batch_frame = ttk.Frame(self.llm_settings_frame)
+        batch_frame.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Button(batch_frame, text="选择文件进行批量优化",
+                   command=self.batch_optimize_files).pack(side=tk.LEFT)
 
-        except ImportError as e:
-            logging.error(f"导入所需模块失败: {e}")
-            return None
-        except Exception as e:
-            logging.error(f"提取纯文本失败: {e}")
-            update_progress(100, f"提取失败: {str(e)}")
-            self.root.after(3000, lambda: self.progress_frame.pack_forget())
-            return None
+        # 逐文件处理选项：每个文件独立读取、优化、保存，失败不影响其他文件
+        self.batch_per_file_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(batch_frame, text="逐文件独立处理",
+                        variable=self.batch_per_file_var).pack(side=tk.LEFT, padx=5)
+        ttk.Label(batch_frame, text="并发数:").pack(side=tk.LEFT)
+        self.batch_workers_var = tk.IntVar(value=2)
+        ttk.Entry(batch_frame, textvariable=self.batch_workers_var,
+                  width=4).pack(side=tk.LEFT, padx=2)
 
-    async def download_image(self, url):
-        """下载图片"""
-        try:
-            if url.startswith('data:'):
-                # 处理 base64 图片
-                header, data = url.split(',', 1)
-                return base64.b64decode(data)
-            else:
-                # 下载网络图片
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, ssl=False) as response:
-                        if response.status == 200:
-                            return await response.read()
-        except Exception as e:
-            logging.error(f"下载图片失败 {url}: {e}")
-            return None
+        # 初始状态下隐藏LLM设置框架
+        self.llm_settings_frame.pack_forget()
 
     def toggle_llm_optimize(self):
         """切换LLM优化选项的状态"""
@@ -2806,15 +6527,17 @@ class CrawlerGUI:
         else:
             self.enable_llm_optimize.set(False)
             self.llm_optimize_cb.configure(state=tk.DISABLED)
-            self.llm_settings_frame.pack_forget()
+            if self.llm_settings_frame is not None:
+                self.llm_settings_frame.pack_forget()
 
     def toggle_llm_settings(self):
         """切换LLM设置框架的��示状态"""
         if self.enable_llm_optimize.get():
+            self._ensure_llm_settings()
             self.llm_settings_frame.pack(fill=tk.X, pady=5)
             # 根据当前选择的模型类型显示对应设置
             self.toggle_model_settings()
-        else:
+        elif self.llm_settings_frame is not None:
             self.llm_settings_frame.pack_forget()
 
     def toggle_model_settings(self):
@@ -2977,8 +6700,10 @@ class CrawlerGUI:
         dialog.destroy()  # 关闭提示对话框
         asyncio.create_task(self._download_model(model_name, model_path))  # 启动下载
 
-    async def _download_model(self, model_name, model_path):
-        """下载模型文件"""
+    async def _download_model(self, model_name, model_path, segments=4):
+        """下载模型文件，支持断点续传和多段并行下载"""
+        import aiohttp
+
         try:
             logging.info(f"开始下载模型: {model_name}")
             logging.debug(f"目标路径: {model_path}")
@@ -3029,11 +6754,11 @@ class CrawlerGUI:
             progress_bar.pack(pady=10)
             
             # 添加取消按钮
-            cancel_var = tk.BooleanVar(value=False)
+            cancel_event = threading.Event()
             cancel_button = ttk.Button(
                 progress_window,
                 text="取消下载",
-                command=lambda: cancel_var.set(True)
+                command=cancel_event.set
             )
             cancel_button.pack(pady=10)
             
@@ -3079,82 +6804,120 @@ class CrawlerGUI:
                 raise ValueError(error_msg)
             
             logging.info(f"下载URL: {model_url}")
-            info_label.config(text=f"正在连接到服务器...\n{model_url}")
             
-            # 创建临时文件
+            def set_info(text):
+                self.progress_bus.publish('download-info', info_label.config, {'text': text})
+            
+            set_info(f"正在连接到服务器...\n{model_url}")
+            
+            # 临时文件和分段进度记录，失败或取消时保留，下次下载从断点继续
             temp_path = model_path.with_suffix('.tmp')
+            state_path = model_path.with_suffix('.tmp.json')
             logging.debug(f"临时文件路径: {temp_path}")
             
+            start_time = datetime.now()
+            
+            def report_progress(downloaded, total_size, resumed):
+                """更新下载进度，速度只按本次会话下载的字节计算"""
+                progress = (downloaded / total_size) * 100 if total_size else 0
+                downloaded_mb = downloaded / (1024 * 1024)
+                total_size_mb = total_size / (1024 * 1024)
+                
+                # 计算下载速度
+                elapsed_time = (datetime.now() - start_time).total_seconds()
+                session_bytes = downloaded - resumed
+                if elapsed_time > 0 and session_bytes > 0:
+                    speed = session_bytes / (1024 * 1024 * elapsed_time)  # MB/s
+                    eta = (total_size - downloaded) / (session_bytes / elapsed_time) if total_size else 0
+                    eta_str = str(timedelta(seconds=int(eta)))
+                    
+                    # 更新界面（由进度总线合并后在主线程刷新）
+                    self.progress_bus.publish('download', lambda: (
+                        progress_var.set(progress),
+                        speed_label.config(text=f"下载速度: {speed:.2f} MB/s\n预计剩余时间: {eta_str}"),
+                        size_label.config(text=f"已下载: {downloaded_mb:.2f} MB / {total_size_mb:.2f} MB")
+                    ))
+            
+            def check_cancelled():
+                if cancel_event.is_set():
+                    raise Exception("用户取消下载")
+            
             try:
                 logging.info("创建下载会话...")
-                async with aiohttp.ClientSession() as session:
-                    logging.info("开始下载请求...")
-                    async with session.get(model_url) as response:
-                        if response.status != 200:
-                            error_msg = f"下载失败: HTTP {response.status}"
-                            logging.error(error_msg)
-                            raise aiohttp.ClientError(error_msg)
-                        
-                        total_size = int(response.headers.get('content-length', 0))
-                        total_size_mb = total_size / (1024 * 1024)
-                        logging.info(f"文件大小: {total_size_mb:.2f} MB")
-                        
-                        size_label.config(text=f"文件大小: {total_size_mb:.2f} MB")
-                        info_label.config(text=f"正在下载模型: {model_name}")
-                        
-                        # 下载并显示进度
-                        chunk_size = 1024 * 1024  # 1MB
-                        downloaded = 0
-                        start_time = datetime.now()
-                        
-                        async with aiofiles.open(temp_path, 'wb') as f:
-                            async for chunk in response.content.iter_chunked(chunk_size):
-                                if cancel_var.get():
-                                    raise Exception("用户取消下载")
-                                
-                                await f.write(chunk)
-                                downloaded += len(chunk)
-                                
-                                # 计算进度
-                                progress = (downloaded / total_size) * 100
-                                downloaded_mb = downloaded / (1024 * 1024)
-                                
-                                # 计算下载速度
-                                elapsed_time = (datetime.now() - start_time).total_seconds()
-                                if elapsed_time > 0:
-                                    speed = downloaded / (1024 * 1024 * elapsed_time)  # MB/s
-                                    eta = (total_size - downloaded) / (downloaded / elapsed_time)
-                                    eta_str = str(timedelta(seconds=int(eta)))
-                                    
-                                    # 更新界面
-                                    progress_var.set(progress)
-                                    speed_label.config(text=f"下载速度: {speed:.2f} MB/s\n预计剩余时间: {eta_str}")
-                                    size_label.config(text=f"已下载: {downloaded_mb:.2f} MB / {total_size_mb:.2f} MB")
-                                
-                                # 更新日志
-                                if downloaded % (50 * chunk_size) == 0:  # 每50MB记录一次日志
-                                    logging.info(f"下载进度: {progress:.1f}% ({downloaded_mb:.1f} MB / {total_size_mb:.1f} MB)")
-                                
-                                # 处理GUI事件
-                                progress_window.update()
+                # 大文件下载耗时很长，只限制连接和单次读取的超时
+                timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=120)
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    total_size, accepts_ranges, server_sha256 = await self._probe_download(session, model_url)
+                    total_size_mb = total_size / (1024 * 1024)
+                    logging.info(f"文件大小: {total_size_mb:.2f} MB, 支持断点续传: {accepts_ranges}")
+                    
+                    self.progress_bus.publish('download', size_label.config,
+                                              {'text': f"文件大小: {total_size_mb:.2f} MB"})
+                    set_info(f"正在下载模型: {model_name}")
+                    
+                    # 只有单连接下载留下的 .tmp（没有分段进度文件）时继续单连接续传，
+                    # 否则分段下载会把已下载的部分当作无效文件重新开始
+                    segmented = state_path.exists() or (segments > 1 and not temp_path.exists())
+                    if accepts_ranges and total_size and segmented:
+                        await self._download_segmented(
+                            session, model_url, temp_path, state_path, total_size, segments,
+                            report_progress, check_cancelled)
+                        # 分段乱序到达，完成后顺序读取一遍计算摘要
+                        set_info("正在校验文件...")
+                        digest = await asyncio.to_thread(sha256_file, temp_path)
+                    else:
+                        digest = await self._download_single(
+                            session, model_url, temp_path, total_size, accepts_ranges,
+                            report_progress, check_cancelled)
                 
-                # 下载���成后重命名文件
+                if total_size and temp_path.stat().st_size != total_size:
+                    raise Exception(f"文件大小不匹配: {temp_path.stat().st_size} / {total_size}")
+                
+                # 校验 SHA-256：优先使用清单中的值，其次使用服务器提供的值
+                manifest = self.load_model_manifest()
+                expected_sha256 = (manifest.get(model_path.name) or {}).get('sha256') or server_sha256
+                logging.info(f"SHA-256: {digest} (期望: {expected_sha256 or '未知'})")
+                if expected_sha256 and digest != expected_sha256:
+                    # 内容已损坏，续传无法修复，删除后需重新下载
+                    temp_path.unlink()
+                    if state_path.exists():
+                        state_path.unlink()
+                    raise Exception(f"SHA-256 校验失败: {digest} != {expected_sha256}")
+                
+                # 校验GGUF文件头
+                gguf_info = read_gguf_info(temp_path)
+                logging.info(f"GGUF信息: {gguf_info}")
+                
+                # 下载完成后重命名文件
                 logging.info("下载完成，重命名临时文件...")
-                temp_path.rename(model_path)
+                temp_path.replace(model_path)
+                if state_path.exists():
+                    state_path.unlink()
                 logging.info(f"模型文件已保存到: {model_path}")
                 
+                # 记录到清单，之后扫描模型时据此检查文件是否被改动
+                manifest[model_path.name] = {
+                    'sha256': digest,
+                    'size': gguf_info['file_size'],
+                    'url': model_url,
+                    'verified_at': datetime.now().isoformat(),
+                    'architecture': gguf_info['architecture'],
+                    'quantization': gguf_info['quantization'],
+                    'context_length': gguf_info['context_length'],
+                    'parameter_count': gguf_info['parameter_count']
+                }
+                self.save_model_manifest(manifest)
+                
                 # 关闭进度窗口
                 self.root.after(1000, progress_window.destroy)
                 
             except Exception as e:
                 logging.error(f"下载失败: {e}")
                 if temp_path.exists():
-                    logging.info("删除临时文件...")
-                    temp_path.unlink()
+                    logging.info(f"保留临时文件 {temp_path}，再次下载时将从断点继续")
                 
                 # 显示错误信息
-                info_label.config(text=f"下载失败: {str(e)}")
-                progress_window.update()
+                set_info(f"下载失败: {str(e)}\n再次下载将从断点继续")
                 
                 # 3秒后关闭窗口
                 self.root.after(3000, progress_window.destroy)
@@ -3169,16 +6932,249 @@ class CrawlerGUI:
             ))
             raise
 
+    async def _probe_download(self, session, url):
+        """探测下载文件的大小、服务器是否支持 Range 请求以及服务器提供的 SHA-256"""
+        import aiohttp
+
+        async with session.get(url, headers={'Range': 'bytes=0-0'}) as response:
+            # Hugging Face 在重定向响应的 X-Linked-Etag 中给出LFS文件的 SHA-256
+            expected_sha256 = None
+            for r in (*response.history, response):
+                etag = r.headers.get('X-Linked-Etag', '').strip('"').lower()
+                if re.fullmatch(r'[0-9a-f]{64}', etag):
+                    expected_sha256 = etag
+            if response.status == 206:
+                content_range = response.headers.get('Content-Range', '')
+                total = content_range.rsplit('/', 1)[-1]
+                return (int(total) if total.isdigit() else 0), True, expected_sha256
+            if response.status == 200:
+                # 服务器忽略了 Range，不读取响应体直接关闭连接
+                return int(response.headers.get('content-length', 0)), False, expected_sha256
+            error_msg = f"下载失败: HTTP {response.status}"
+            logging.error(error_msg)
+            raise aiohttp.ClientError(error_msg)
+
+    async def _download_single(self, session, url, temp_path, total_size, accepts_ranges,
+                               report_progress, check_cancelled, max_retries=5):
+        """单连接下载，连接中断时从已下载的位置继续
+
+        下载过程中增量计算 SHA-256，返回完整文件的摘要。
+        """
+        import aiohttp
+
+        chunk_size = 1024 * 1024  # 1MB
+        resumed = temp_path.stat().st_size if temp_path.exists() and accepts_ranges else 0
+        if total_size and resumed > total_size:
+            resumed = 0
+        if resumed:
+            logging.info(f"从断点继续下载: {resumed / 1024 / 1024:.1f} MB")
+        
+        hasher, hashed = hashlib.sha256(), 0
+        attempts = 0
+        while True:
+            downloaded = temp_path.stat().st_size if temp_path.exists() and accepts_ranges else 0
+            if hashed != downloaded:
+                # 续传时先对已有的部分计算摘要
+                hasher = await asyncio.to_thread(self._sha256_prefix, temp_path, downloaded)
+                hashed = downloaded
+            if total_size and downloaded == total_size:
+                return hasher.hexdigest()
+            headers = {'Range': f'bytes={downloaded}-'} if downloaded else {}
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 200:
+                        # 服务器返回完整内容，从头写入
+                        downloaded, mode = 0, 'wb'
+                        hasher, hashed = hashlib.sha256(), 0
+                    elif response.status == 206:
+                        mode = 'ab'
+                    else:
+                        raise aiohttp.ClientError(f"下载失败: HTTP {response.status}")
+                    
+                    async with aiofiles.open(temp_path, mode) as f:
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            check_cancelled()
+                            await f.write(chunk)
+                            hasher.update(chunk)
+                            downloaded += len(chunk)
+                            hashed = downloaded
+                            report_progress(downloaded, total_size, resumed)
+                            
+                            # 更新日志
+                            if downloaded % (50 * chunk_size) < len(chunk):  # 每50MB记录一次日志
+                                logging.info(f"下载进度: {downloaded / 1024 / 1024:.1f} MB")
+                if not total_size or downloaded >= total_size:
+                    return hasher.hexdigest()
+                raise aiohttp.ClientPayloadError("连接提前结束")
+            except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+                attempts += 1
+                if not accepts_ranges or attempts > max_retries:
+                    raise
+                delay = min(30, 2 ** attempts)
+                logging.warning(f"下载中断 ({e})，{delay} 秒后从断点重试 ({attempts}/{max_retries})")
+                await asyncio.sleep(delay)
+
+    def _sha256_prefix(self, path, length, chunk_size=8 * 1024 * 1024):
+        """计算文件前 length 字节的 SHA-256，返回可继续更新的 hasher"""
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        return hasher
+
+    def _load_download_state(self, state_path, url, total_size, temp_path):
+        """加载分段下载进度，与当前文件不匹配时返回 None"""
+        try:
+            if state_path.exists() and temp_path.exists():
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                if (state.get('url') == url and state.get('total_size') == total_size
+                        and temp_path.stat().st_size == total_size):
+                    return state
+        except Exception as e:
+            logging.warning(f"读取分段下载进度失败: {e}")
+        return None
+
+    def _fsync_file(self, path):
+        """把文件已写入系统缓存的数据同步到磁盘"""
+        with open(path, 'r+b') as f:
+            os.fsync(f.fileno())
+
+    def _save_download_state(self, state_path, state):
+        """原子地保存分段下载进度"""
+        temp_state = state_path.with_suffix('.swap')
+        with open(temp_state, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_state, state_path)
+
+    async def _download_segmented(self, session, url, temp_path, state_path, total_size, segments,
+                                  report_progress, check_cancelled, max_retries=5):
+        """多段并行下载到预分配的文件中，各段进度记录在状态文件里以便续传"""
+        import aiohttp
+
+        chunk_size = 1024 * 1024  # 1MB
+        state = self._load_download_state(state_path, url, total_size, temp_path)
+        if state is None:
+            # 预分配完整大小的文件，各段直接写入自己的偏移位置
+            with open(temp_path, 'wb') as f:
+                f.truncate(total_size)
+            segment_size = math.ceil(total_size / max(1, segments))
+            state = {
+                'url': url,
+                'total_size': total_size,
+                'segments': [
+                    {'start': start, 'end': min(start + segment_size, total_size) - 1, 'done': 0}
+                    for start in range(0, total_size, segment_size)
+                ]
+            }
+            self._save_download_state(state_path, state)
+        
+        resumed = sum(seg['done'] for seg in state['segments'])
+        downloaded = resumed
+        if resumed:
+            logging.info(f"从断点继续分段下载: {resumed / 1024 / 1024:.1f} MB")
+        unsaved = 0
+        # 各段正在写入的文件对象
+        handles = set()
+        
+        async def persist():
+            """先把数据刷到磁盘再保存进度，崩溃后状态文件不会记录还没有落盘的数据"""
+            # 先记下进度再刷盘：刷盘期间其他分段继续写入，这些数据留到下次保存
+            snapshot = {**state, 'segments': [dict(seg) for seg in state['segments']]}
+            for handle in list(handles):
+                with contextlib.suppress(ValueError):
+                    # 期间关闭的文件在关闭时已经刷新
+                    await handle.flush()
+            await asyncio.to_thread(self._fsync_file, temp_path)
+            self._save_download_state(state_path, snapshot)
+        
+        async def fetch_segment(seg):
+            nonlocal downloaded, unsaved
+            attempts = 0
+            while seg['start'] + seg['done'] <= seg['end']:
+                position = seg['start'] + seg['done']
+                headers = {'Range': f"bytes={position}-{seg['end']}"}
+                try:
+                    async with session.get(url, headers=headers) as response:
+                        if response.status != 206:
+                            raise aiohttp.ClientError(f"分段请求失败: HTTP {response.status}")
+                        async with aiofiles.open(temp_path, 'r+b') as f:
+                            handles.add(f)
+                            try:
+                                await f.seek(position)
+                                async for chunk in response.content.iter_chunked(chunk_size):
+                                    check_cancelled()
+                                    # 防止服务器返回超出本段范围的数据
+                                    chunk = chunk[:seg['end'] + 1 - (seg['start'] + seg['done'])]
+                                    if not chunk:
+                                        break
+                                    await f.write(chunk)
+                                    seg['done'] += len(chunk)
+                                    downloaded += len(chunk)
+                                    unsaved += len(chunk)
+                                    report_progress(downloaded, total_size, resumed)
+                                    
+                                    # 每16MB保存一次进度
+                                    if unsaved >= 16 * chunk_size:
+                                        unsaved = 0
+                                        await persist()
+                            finally:
+                                handles.discard(f)
+                    if seg['start'] + seg['done'] == position:
+                        raise aiohttp.ClientPayloadError("分段请求没有返回数据")
+                    attempts = 0
+                except (aiohttp.ClientError, asyncio.TimeoutError, ConnectionError) as e:
+                    attempts += 1
+                    if attempts > max_retries:
+                        raise
+                    await persist()
+                    delay = min(30, 2 ** attempts)
+                    logging.warning(f"分段 {seg['start']}-{seg['end']} 中断 ({e})，"
+                                    f"{delay} 秒后重试 ({attempts}/{max_retries})")
+                    await asyncio.sleep(delay)
+        
+        tasks = [asyncio.create_task(fetch_segment(seg)) for seg in state['segments']
+                 if seg['start'] + seg['done'] <= seg['end']]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await persist()
+
     def batch_optimize_files(self):
         """启动批量优化文件的异步操作"""
+        try:
+            workers = self.batch_workers_var.get()
+            if workers < 1:
+                raise ValueError
+        except (tk.TclError, ValueError):
+            messagebox.showerror("错误", "并发数必须是大于0的整数")
+            return
+        
         def run_async():
-            asyncio.run(self._batch_optimize_files())
+            asyncio.run(self._batch_optimize_files(workers))
         
         # 在新线程中运行异步操作
         threading.Thread(target=run_async).start()
 
-    async def _batch_optimize_files(self):
-        """批量优化文件的异步实现"""
+    async def _batch_optimize_files(self, workers=2):
+        """批量优化文件的异步实现，workers 为逐文件模式的并发数"""
+        profiler = self._start_profiler("batch://optimize")
+        try:
+            await self._run_batch_optimize(workers)
+        finally:
+            if profiler:
+                self._finish_profiler(profiler)
+
+    async def _run_batch_optimize(self, workers=2):
+        """选择文件并执行批量优化"""
         try:
             logging.info("开始批量文件优化")
             from tkinter import filedialog
@@ -3207,12 +7203,14 @@ class CrawlerGUI:
             self.progress_label.pack(fill=tk.X)
             
             def update_progress(percentage, message):
-                self.root.after(0, lambda: (
-                    self.progress_var.set(percentage),
-                    self.progress_label.config(text=message)
-                ))
+                self.publish_progress(percentage, message)
                 logging.info(f"进度: {percentage}% - {message}")
 
+            # 逐文件独立处理模式
+            if self.batch_per_file_var.get():
+                await self._batch_optimize_per_file(file_paths, update_progress, workers)
+                return
+
             # 读取所有文件内容
             all_content = []
             total_size = 0
@@ -3224,16 +7222,7 @@ class CrawlerGUI:
                 logging.info(f"处理文件 {file_path}, 大小: {file_size/1024:.2f} KB")
                 
                 try:
-                    if file_path.endswith('.docx'):
-                        from docx import Document
-                        doc = Document(file_path)
-                        content = "\n".join(paragraph.text for paragraph in doc.paragraphs)
-                        logging.info(f"成功读取Word文档，段落数: {len(doc.paragraphs)}")
-                    else:
-                        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                            content = await f.read()
-                        logging.info(f"成功读取文本文件，字符数: {len(content)}")
-                    
+                    content = await self._read_document_text(file_path)
                     all_content.append(content)
                 except Exception as e:
                     logging.error(f"读取文件失败 {file_path}: {e}", exc_info=True)
@@ -3260,27 +7249,8 @@ class CrawlerGUI:
             output_path = self.base_dir / "text" / f"optimized_{timestamp}.docx"
             
             try:
-                # 创建新的Word文档
-                doc = Document()
-                doc.add_heading('LLM优化后的文档', 0)
-                
-                # 添加优化信息
-                doc.add_paragraph(f"优化时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                doc.add_paragraph(f"使用模型: {self.llm_model_var.get()}")
-                
-                enabled_options = [name for name, var in self.llm_optimize_options.items() if var.get()]
-                doc.add_paragraph("优化选项: " + ", ".join(enabled_options))
-                
-                # 添加源文件信息
-                doc.add_paragraph("源文件:")
-                for path in file_paths:
-                    doc.add_paragraph(f"  - {Path(path).name}")
-                
-                # 添加优化后的内容
-                doc.add_paragraph("\n" + optimized_content)
-                
-                # 保存文档
-                doc.save(str(output_path))
+                await asyncio.to_thread(
+                    self._write_optimized_docx, output_path, optimized_content, file_paths)
                 logging.info(f"文档已保存: {output_path}")
                 
             except Exception as e:
@@ -3291,7 +7261,7 @@ class CrawlerGUI:
             self.root.after(3000, lambda: self.progress_frame.pack_forget())
             
             # 显示完成消息
-            self.content_text.insert(tk.END, f"\n\nLLM优化完成，文件已保存至: {output_path}")
+            self.show_status(f"LLM优化完成，文件已保存至: {output_path}")
             
             # 添加到文件列表
             self.saved_files.append(output_path)
@@ -3301,10 +7271,177 @@ class CrawlerGUI:
 
         except Exception as e:
             logging.error("批量优化失败", exc_info=True)
-            self.content_text.insert(tk.END, f"\n\n批量优化失败: {str(e)}")
+            self.show_status(f"批量优化失败: {str(e)}")
             update_progress(100, f"优化失败: {str(e)}")
             self.root.after(3000, lambda: self.progress_frame.pack_forget())
 
+    async def _read_document_text(self, file_path):
+        """读取Word或文本文件的内容"""
+        if str(file_path).endswith('.docx'):
+            def read_docx():
+                from docx import Document
+                doc = Document(file_path)
+                logging.info(f"成功读取Word文档，段落数: {len(doc.paragraphs)}")
+                return "\n".join(paragraph.text for paragraph in doc.paragraphs)
+
+            # python-docx 解析是同步的，放到线程中避免阻塞事件循环
+            return await asyncio.to_thread(read_docx)
+
+        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
+            content = await f.read()
+        logging.info(f"成功读取文本文件，字符数: {len(content)}")
+        return content
+
+    def _write_optimized_docx(self, output_path, optimized_content, source_paths):
+        """将优化后的内容写入Word文档"""
+        from docx import Document
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 创建新的Word文档
+        doc = Document()
+        doc.add_heading('LLM优化后的文档', 0)
+        
+        # 添加优化信息
+        doc.add_paragraph(f"优化时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        doc.add_paragraph(f"使用模型: {self.llm_model_var.get()}")
+        
+        enabled_options = [name for name, var in self.llm_optimize_options.items() if var.get()]
+        doc.add_paragraph("优化选项: " + ", ".join(enabled_options))
+        
+        # 添加源文件信息
+        doc.add_paragraph("源文件:")
+        for path in source_paths:
+            doc.add_paragraph(f"  - {Path(path).name}")
+        
+        # 添加优化后的内容
+        doc.add_paragraph("\n" + optimized_content)
+        
+        # 先写临时文件再替换，避免中断时留下损坏的输出
+        temp_path = output_path.with_suffix('.tmp')
+        doc.save(str(temp_path))
+        os.replace(temp_path, output_path)
+
+    def _load_batch_state(self, state_path):
+        """加载批量优化的进度记录"""
+        try:
+            if state_path.exists():
+                with open(state_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"加载批量优化进度失败: {e}")
+        return {}
+
+    def _save_batch_state(self, state_path, state):
+        """原子地保存批量优化的进度记录"""
+        temp_path = state_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, state_path)
+
+    async def _batch_optimize_per_file(self, file_paths, update_progress, workers=2):
+        """逐文件独立优化：每个文件作为单独任务读取、优化并保存
+
+        任务在有界的并发池中运行，单个文件失败只记录错误，不会中断整个批次，
+        也不逐个弹出错误对话框，全部完成后汇总显示。
+        已完成的文件记录在 batch_state.json 中，重新运行时会跳过未变化的文件。
+        """
+        output_dir = self.base_dir / "text" / "optimized"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        state_path = output_dir / "batch_state.json"
+        state = self._load_batch_state(state_path)
+        state_lock = asyncio.Lock()
+
+        workers = max(1, workers)
+        io_semaphore = asyncio.Semaphore(workers)
+        # 本地模型占用大量内存且不能并发推理，LLM阶段串行执行
+        llm_workers = 1 if self.model_type_var.get() == "local" else workers
+        llm_semaphore = asyncio.Semaphore(llm_workers)
+
+        total = len(file_paths)
+        finished = 0
+        succeeded, skipped, failed = [], [], []
+
+        def file_signature(file_path):
+            stat = Path(file_path).stat()
+            return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+        async def record(file_path, entry):
+            nonlocal finished
+            async with state_lock:
+                state[str(file_path)] = entry
+                await asyncio.to_thread(self._save_batch_state, state_path, dict(state))
+                finished += 1
+                update_progress(finished / total * 100,
+                                f"[{finished}/{total}] {Path(file_path).name}: {entry['status']}")
+
+        async def process_file(file_path):
+            name = Path(file_path).name
+            # 不同目录中的同名文件（或 x.txt 与 x.docx）按完整路径区分输出文件
+            digest = hashlib.sha1(str(Path(file_path).resolve()).encode('utf-8')).hexdigest()[:8]
+            output_path = output_dir / f"{Path(file_path).stem}_{digest}_optimized.docx"
+            try:
+                signature = file_signature(file_path)
+                previous = state.get(str(file_path))
+                if (previous and previous.get('status') == 'done'
+                        and previous.get('size') == signature['size']
+                        and previous.get('mtime') == signature['mtime']
+                        and Path(previous.get('output', '')).exists()):
+                    logging.info(f"跳过已完成的文件: {name}")
+                    CACHE_REQUESTS.inc(cache="batch_state", result="hit")
+                    skipped.append(file_path)
+                    await record(file_path, previous)
+                    return
+                CACHE_REQUESTS.inc(cache="batch_state", result="miss")
+
+                async with io_semaphore:
+                    with INFLIGHT.track(kind="batch_file"):
+                        content = await self._read_document_text(file_path)
+                        async with llm_semaphore:
+                            logging.info(f"开始优化文件: {name}")
+                            optimized_content = await self.optimize_with_llm(
+                                content, self.llm_model_var.get(), interactive=False)
+                        await asyncio.to_thread(
+                            self._write_optimized_docx, output_path, optimized_content, [file_path])
+
+                logging.info(f"文件优化完成: {name} -> {output_path}")
+                succeeded.append(output_path)
+                await record(file_path, {
+                    'status': 'done',
+                    'output': str(output_path),
+                    'finished_at': datetime.now().isoformat(),
+                    **signature
+                })
+
+            except Exception as e:
+                logging.error(f"文件优化失败 {file_path}: {e}", exc_info=True)
+                failed.append((file_path, str(e)))
+                await record(file_path, {
+                    'status': 'failed',
+                    'error': str(e),
+                    'attempts': (state.get(str(file_path)) or {}).get('attempts', 0) + 1
+                })
+
+        update_progress(0, f"开始逐文件优化，共 {total} 个文件")
+        await asyncio.gather(*(process_file(path) for path in file_paths))
+
+        summary = f"逐文件优化完成: 成功 {len(succeeded)}, 跳过 {len(skipped)}, 失败 {len(failed)}"
+        logging.info(summary)
+        update_progress(100, summary)
+
+        def show_summary():
+            self.progress_frame.pack_forget()
+            self.status_var.set(f"{summary}  输出目录: {output_dir}")
+            for output_path in succeeded:
+                self.saved_files.append(output_path)
+                self.files_listbox.insert(tk.END, str(output_path))
+            if failed:
+                details = "\n".join(f"{Path(file_path).name}: {error}" for file_path, error in failed[:10])
+                more = f"\n... 另有 {len(failed) - 10} 个文件失败" if len(failed) > 10 else ""
+                messagebox.showerror("部分文件优化失败", f"{summary}\n\n{details}{more}")
+
+        self.root.after(3000, show_summary)
+
     def setup_logging(self):
         """配置日志系统"""
         # 创建logs目录
@@ -3340,15 +7477,69 @@ class CrawlerGUI:
         logging.info("日志系统初始化完成")
 
     def scan_local_models(self):
-        """扫描本地已下载的模型文件"""
+        """扫描本地已下载的模型文件，跳过文件头损坏或被截断的模型"""
+        return [name for name, info, error in self.inspect_local_models() if info]
+
+    def inspect_local_models(self):
+        """检查本地所有模型文件，返回 (文件名, GGUF信息, 错误信息) 列表"""
         models_dir = Path("models")
         if not models_dir.exists():
             models_dir.mkdir(parents=True, exist_ok=True)
             return []
         
         # 查找所有.gguf文件
-        model_files = list(models_dir.glob("*.gguf"))
-        return [model.name for model in model_files]
+        results = []
+        for model in sorted(models_dir.glob("*.gguf")):
+            try:
+                results.append((model.name, self.verify_model_file(model), None))
+            except Exception as e:
+                logging.warning(f"模型文件无效 {model.name}: {e}")
+                results.append((model.name, None, str(e)))
+        return results
+
+    def load_model_manifest(self):
+        """加载模型清单（记录各模型文件的 SHA-256 和大小）"""
+        manifest_path = Path("models") / "manifest.json"
+        try:
+            if manifest_path.exists():
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"加载模型清单失败: {e}")
+        return {}
+
+    def save_model_manifest(self, manifest):
+        """保存模型清单"""
+        manifest_path = Path("models") / "manifest.json"
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    def verify_model_file(self, model_path, full_hash=False):
+        """校验模型文件，返回GGUF信息
+
+        默认只解析文件头并与清单中的大小比对（毫秒级）；full_hash 为 True 时
+        额外计算完整的 SHA-256 与清单比对。
+        """
+        model_path = Path(model_path)
+        stat = model_path.stat()
+        signature = (stat.st_size, stat.st_mtime)
+        cached = self._gguf_info_cache.get(str(model_path))
+        if cached and cached[0] == signature:
+            info = cached[1]
+        else:
+            info = read_gguf_info(model_path)
+            self._gguf_info_cache[str(model_path)] = (signature, info)
+        
+        entry = self.load_model_manifest().get(model_path.name)
+        if entry:
+            if entry.get('size') and entry['size'] != stat.st_size:
+                raise ValueError(f"文件大小与清单不符: {stat.st_size} / {entry['size']}")
+            if full_hash and entry.get('sha256'):
+                digest = sha256_file(model_path)
+                if digest != entry['sha256']:
+                    raise ValueError(f"SHA-256 与清单不符: {digest}")
+        return info
 
     def show_model_manager(self):
         """显示模型管理器"""
@@ -3378,11 +7569,39 @@ class CrawlerGUI:
         model_list.configure(yscrollcommand=scrollbar.set)
         
         # 刷新本地模型列��
+        local_model_info = {}
+        
         def refresh_model_list():
             model_list.delete(0, tk.END)
-            local_models = self.scan_local_models()
-            for model in local_models:
-                model_list.insert(tk.END, model)
+            local_model_info.clear()
+            for name, info, error in self.inspect_local_models():
+                local_model_info[name] = (info, error)
+                model_list.insert(tk.END, name)
+                if error:
+                    model_list.itemconfig(tk.END, foreground="red")
+        
+        # 显示选中的已安装模型的GGUF信息
+        def show_installed_model_info(event=None):
+            selection = model_list.curselection()
+            if not selection:
+                return
+            name = model_list.get(selection[0])
+            info, error = local_model_info.get(name, (None, None))
+            info_text.delete(1.0, tk.END)
+            info_text.insert(tk.END, f"模型文件: {name}\n")
+            if error:
+                info_text.insert(tk.END, f"文件无效: {error}\n")
+                return
+            info_text.insert(tk.END, f"架构: {info['architecture']}\n")
+            info_text.insert(tk.END, f"量化类型: {info['quantization']}\n")
+            info_text.insert(tk.END, f"上下文长度: {info['context_length']}\n")
+            info_text.insert(tk.END, f"参数量: {info['parameter_count'] / 1e9:.2f}B\n")
+            info_text.insert(tk.END, f"文件大小: {info['file_size'] / 1024 / 1024 / 1024:.2f} GB\n")
+            entry = self.load_model_manifest().get(name)
+            if entry:
+                info_text.insert(tk.END, f"SHA-256: {entry.get('sha256')}\n")
+        
+        model_list.bind('<<ListboxSelect>>', show_installed_model_info)
         
         # 创建可用模型列表
         available_models = {
@@ -3449,6 +7668,16 @@ class CrawlerGUI:
         
         model_var.trace('w', update_model_info)
         
+        # 并行下载分段数
+        segments_frame = ttk.Frame(info_frame)
+        segments_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(segments_frame, text="并行下载分段数:").pack(side=tk.LEFT)
+        segments_var = tk.IntVar(value=4)
+        ttk.Spinbox(segments_frame, from_=1, to=16, textvariable=segments_var,
+                    width=5).pack(side=tk.LEFT, padx=5)
+        ttk.Label(segments_frame, text="(中断后再次下载会从断点继续)",
+                  foreground="gray").pack(side=tk.LEFT)
+        
         # 创建按钮框架
         button_frame = ttk.Frame(info_frame)
         button_frame.pack(fill=tk.X, pady=10)
@@ -3477,10 +7706,12 @@ class CrawlerGUI:
         def start_download():
             model = available_models.get(model_var.get())
             if model:
+                segments = max(1, segments_var.get())
                 manager_window.destroy()
                 self.start_async_download(
                     model['name'].split('.')[0],
-                    Path("models") / model['name']
+                    Path("models") / model['name'],
+                    segments
                 )
         
         ttk.Button(button_frame, text="自动下载", 
@@ -3504,6 +7735,28 @@ class CrawlerGUI:
         ttk.Button(button_frame, text="删除选中模型", 
                   command=delete_model).pack(side=tk.LEFT, padx=5)
         
+        # 完整校验按钮：计算 SHA-256 并与清单比对
+        def verify_selected_model():
+            selection = model_list.curselection()
+            if not selection:
+                return
+            model_name = model_list.get(selection[0])
+            
+            def run_verify():
+                try:
+                    self.verify_model_file(Path("models") / model_name, full_hash=True)
+                    entry = self.load_model_manifest().get(model_name)
+                    message = "校验通过" if entry and entry.get('sha256') else "文件头有效（清单中没有该模型的 SHA-256）"
+                    self.root.after(0, lambda: messagebox.showinfo("校验结果", f"{model_name}: {message}"))
+                except Exception as e:
+                    error = str(e)
+                    self.root.after(0, lambda: messagebox.showerror("校验失败", f"{model_name}: {error}"))
+            
+            threading.Thread(target=run_verify, daemon=True).start()
+        
+        ttk.Button(button_frame, text="校验模型", 
+                  command=verify_selected_model).pack(side=tk.LEFT, padx=5)
+        
         # 刷新按钮
         ttk.Button(button_frame, text="刷新列表", 
                   command=refresh_model_list).pack(side=tk.LEFT, padx=5)
@@ -3513,13 +7766,51 @@ class CrawlerGUI:
         if model_combo['values']:
             model_combo.set(model_combo['values'][0])
 
-    def start_async_download(self, model_name, model_path):
+    def start_async_download(self, model_name, model_path, segments=4):
         """启动异步下载的辅助方法"""
         def run_async():
-            asyncio.run(self._download_model(model_name, model_path))
+            asyncio.run(self._download_model(model_name, model_path, segments))
         
         threading.Thread(target=run_async).start()
 
+    def toggle_local_llm_server(self):
+        """启动或停止本地推理服务进程"""
+        if self._llm_server_process and self._llm_server_process.poll() is None:
+            self._llm_server_process.terminate()
+            self._llm_server_process = None
+            self.llm_server_button.config(text="启动本地推理服务")
+            self.llm_server_status.config(text="未运行", foreground="gray")
+            logging.info("本地推理服务已停止")
+            return
+
+        model_name = self.llm_model_var.get()
+        model_path = Path("models") / model_name
+        if not model_name or not model_path.exists():
+            messagebox.showerror("错误", "请先选择已下载的本地模型")
+            return
+
+        server_script = Path(__file__).with_name("llm_server.py")
+        # 选中本地推理服务时使用地址栏中（可能修改过端口的）地址，否则使用默认地址
+        base_url = self.api_providers["本地推理服务"]["base_url"]
+        if self.api_provider_var.get() == "本地推理服务" and self.api_url_var.get().strip():
+            base_url = self.api_url_var.get().strip()
+        try:
+            port = urlparse(base_url).port or 8765
+        except ValueError:
+            messagebox.showerror("错误", f"无效的端口: {base_url}")
+            return
+        try:
+            self._llm_server_process = subprocess.Popen(
+                [sys.executable, str(server_script), "--model", str(model_path), "--port", str(port)])
+        except Exception as e:
+            logging.error(f"启动本地推理服务失败: {e}")
+            messagebox.showerror("错误", f"启动本地推理服务失败: {str(e)}")
+            return
+
+        logging.info(f"本地推理服务已启动: {base_url} (PID {self._llm_server_process.pid})")
+        self.llm_server_button.config(text="停止本地推理服务")
+        self.llm_server_status.config(text=f"运行中: {base_url}", foreground="green")
+
     def toggle_custom_prompt(self):
         """切换自定义提示词输入框的状态"""
         if self.enable_custom_prompt.get():
@@ -3536,6 +7827,10 @@ class CrawlerGUI:
         if provider == "自定义":
             self.api_url_entry.config(state="normal")
             self.api_url_var.set("")
+        elif provider == "本地推理服务":
+            # 允许修改端口
+            self.api_url_entry.config(state="normal")
+            self.api_url_var.set(provider_config["base_url"])
         else:
             self.api_url_entry.config(state="readonly")
             self.api_url_var.set(provider_config["base_url"])
@@ -3555,9 +7850,9 @@ class CrawlerGUI:
                 self.llm_model_var.set(models[0])
         else:
             provider = self.api_provider_var.get()
-            if provider == "自定义":
+            if provider in ("自定义", "本地推理服务"):
                 # 尝试从自定义API获取模型列表
-                self.fetch_api_models()
+                threading.Thread(target=lambda: asyncio.run(self.fetch_api_models())).start()
             else:
                 # 使用预定义的模型列表
                 models = self.api_providers[provider]["models"]
@@ -3567,11 +7862,13 @@ class CrawlerGUI:
 
     async def fetch_api_models(self):
         """从API获取可用模型列表"""
+        import aiohttp
+
         try:
             url = self.api_url_var.get()
             api_key = self.api_key_var.get()
             
-            if not url or not api_key:
+            if not url or (not api_key and self.api_provider_var.get() != "本地推理服务"):
                 raise ValueError("请填写API URL和API Key")
             
             headers = {"Authorization": f"Bearer {api_key}"}
@@ -3598,29 +7895,132 @@ class CrawlerGUI:
             logging.error(f"获取模型列表失败: {e}")
             messagebox.showerror("错误", f"获取模型列表失败: {str(e)}")
 
-    async def optimize_with_llm(self, text, model_name):
-        """使用LLM优化文本"""
+    async def optimize_with_llm(self, text, model_name, interactive=True):
+        """使用LLM优化文本，interactive 为 False 时（批量任务）失败只抛出异常，不弹出错误对话框"""
         try:
-            # 构建提示词
-            prompt = self.build_prompt(text)
+            # 构建提示词前缀，并按token预算规划上下文、生成长度和分块
+            prefix = self.build_prompt_prefix()
             
             if self.model_type_var.get() == "local":
-                # 使用本地模型
-                return await self.optimize_with_local_model(prompt, model_name)
+                model_path = self._resolve_local_model_path(model_name)
+                # 加载词表可能需要数秒，同样放到线程中执行
+                planner = await asyncio.to_thread(self._local_budget_planner, model_path)
+                system_prompt = self._local_chat_messages("")[0]['content']
+                plan = await asyncio.to_thread(planner.plan, prefix, text, system_prompt)
             else:
-                # 使用API模型
-                return await self.optimize_with_api_model(prompt)
+                planner = self._api_budget_planner()
+                system_prompt = self._api_system_prompt()
+                max_output = None
+                if not self.api_params['auto_max_tokens'].get():
+                    max_output = self.api_params['max_tokens'].get()
+                plan = await asyncio.to_thread(planner.plan, prefix, text, system_prompt, max_output)
+
+            chunks = plan['chunks']
+            logging.info(f"token预算: 文本 {plan['text_tokens']} tokens, 前缀 {plan['overhead']} tokens, "
+                         f"n_ctx={plan['n_ctx']}, 分块数 {len(chunks)}")
+
+            results = []
+            for i, chunk in enumerate(chunks, 1):
+                if len(chunks) > 1:
+                    logging.info(f"处理分块 {i}/{len(chunks)}: {chunk['prompt_tokens']} tokens, "
+                                 f"max_tokens={chunk['max_tokens']}")
+                prompt = prefix + chunk['text']
+                if self.model_type_var.get() == "local":
+                    # 使用本地模型，共享的指令前缀可复用已评估的KV状态
+                    results.append(await self.optimize_with_local_model(
+                        prompt, model_name, prefix=prefix, n_ctx=plan['n_ctx'],
+                        max_tokens=chunk['max_tokens'], interactive=interactive))
+                else:
+                    # 使用API模型
+                    results.append(await self.optimize_with_api_model(
+                        prompt, max_tokens=chunk['max_tokens'], interactive=interactive))
+
+            return "\n\n".join(results)
                 
         except Exception as e:
             logging.error(f"LLM处理失败: {e}", exc_info=True)
             raise
 
-    def build_prompt(self, text):
-        """构建提示词"""
+    def _resolve_local_model_path(self, model_name):
+        """根据模型名称查找本地模型文件"""
+        models_dir = Path("models")
+        model_paths = {
+            "chatglm3-6b": models_dir / "chatglm3-6b.Q4_K_M.gguf",
+            "llama-2-7b": models_dir / "llama-2-7b.Q4_K_M.gguf",
+            "qwen-7b": models_dir / "qwen-7b.Q4_K_M.gguf",
+            "yi-6b": models_dir / "yi-6b.Q4_K_M.gguf",
+            "mistral-7b": models_dir / "mistral-7b.Q4_K_M.gguf",
+            "neural-7b": models_dir / "neural-7b.Q4_K_M.gguf"
+        }
+        
+        # 规范化模型名称并获取模型路径
+        normalized_model_name = model_name.lower().replace('_', '-').split('.')[0]
+        model_path = next((path for key, path in model_paths.items() 
+                          if key in normalized_model_name), None)
+        
+        if not model_path or not model_path.exists():
+            raise FileNotFoundError(f"找不到模型文件: {model_path}")
+        return model_path
+
+    def _get_local_tokenizer(self, model_path):
+        """获取本地模型的分词器（只加载词表，不加载权重），返回 (分词器, 使用时需持有的锁)
+
+        模型已常驻内存时直接使用它分词。常驻模型同时在推理线程中生成，
+        llama-cpp 上下文不是线程安全的，分词时必须持有 _local_llm_lock。
+        """
+        from llama_cpp import Llama
+
+        key = str(model_path)
+        with self._local_llm_lock:
+            if self._local_llm is not None and self._local_llm_key[0] == key:
+                return self._local_llm, self._local_llm_lock
+        if key not in self._local_tokenizers:
+            self.verify_model_file(model_path)
+            self._local_tokenizers[key] = Llama(model_path=key, vocab_only=True, verbose=False)
+        return self._local_tokenizers[key], contextlib.nullcontext()
+
+    def _local_budget_planner(self, model_path):
+        """创建基于本地模型分词器的token预算规划器"""
+        tokenizer, lock = self._get_local_tokenizer(model_path)
+
+        def count_tokens(text):
+            if not text:
+                return 0
+            with lock:
+                return len(tokenizer.tokenize(text.encode('utf-8'), add_bos=False))
+
+        try:
+            with lock:
+                n_ctx_train = tokenizer.n_ctx_train()
+        except Exception:
+            n_ctx_train = 4096
+        max_ctx = min(n_ctx_train, max(512, self.local_max_ctx_var.get()))
+        return TokenBudgetPlanner(count_tokens, max_ctx)
+
+    def _api_budget_planner(self):
+        """创建API模型的token预算规划器（有 tiktoken 时精确计数，否则估算）"""
+        try:
+            import tiktoken
+            encoding = tiktoken.get_encoding("cl100k_base")
+            count_tokens = lambda text: len(encoding.encode(text)) if text else 0
+        except ImportError:
+            count_tokens = estimate_tokens
+        return TokenBudgetPlanner(count_tokens, max(512, self.api_params['context_window'].get()))
+
+    def _api_system_prompt(self):
+        """获取API模型使用的系统提示词"""
+        if self.enable_custom_system_prompt.get():
+            system_prompt = self.system_prompt_text.get('1.0', tk.END).strip()
+            if system_prompt:
+                return system_prompt
+        return self.default_system_prompt
+
+    def build_prompt_prefix(self):
+        """构建提示词中与具体文本无关的指令前缀"""
         if self.enable_custom_prompt.get():
             custom_prompt = self.custom_prompt_text.get('1.0', tk.END).strip()
             if custom_prompt:
-                return custom_prompt + "\n\n" + text
+                return custom_prompt + "\n\n"
         
         prompts = []
         if self.llm_optimize_options['improve_readability'].get():
@@ -3634,13 +8034,20 @@ class CrawlerGUI:
         if self.llm_optimize_options['translate'].get():
             prompts.append("将文本翻译成英文")
         
-        prompt = "请" + "、".join(prompts) + "。以下是原文：\n\n" + text
-        return prompt
+        return "请" + "、".join(prompts) + "。以下是原文：\n\n"
+
+    def build_prompt(self, text):
+        """构建提示词"""
+        return self.build_prompt_prefix() + text
 
-    async def optimize_with_api_model(self, prompt):
-        """使用API模型优化文本"""
+    async def optimize_with_api_model(self, prompt, max_tokens=None, interactive=True):
+        """使用API模型优化文本，interactive 为 False 时（批量任务）不显示结果、错误信息和对话框"""
+        import aiohttp
+
+        provider = self.api_provider_var.get()
+        started = time.perf_counter()
+        INFLIGHT.inc(kind="llm")
         try:
-            provider = self.api_provider_var.get()
             url = self.api_url_var.get()
             api_key = self.api_key_var.get()
             model = self.api_model_var.get()
@@ -3648,9 +8055,12 @@ class CrawlerGUI:
             # 修改验证逻辑
             if not url:
                 raise ValueError("请填写API URL")
-            if not api_key:
+            if not api_key and provider != "本地推理服务":
                 raise ValueError("请填写API Key")
-            if not model and provider != "自定义":
+            if not model and provider == "本地推理服务":
+                # 本地推理服务只加载了一个模型，模型名仅用于显示
+                model = "local"
+            elif not model and provider != "自定义":
                 # 如果没有选择模型，使用默认的第一个模型
                 available_models = self.api_providers[provider]["models"]
                 if available_models:
@@ -3670,12 +8080,7 @@ class CrawlerGUI:
             }
             
             # 获取系统提示词
-            if self.enable_custom_system_prompt.get():
-                system_prompt = self.system_prompt_text.get('1.0', tk.END).strip()
-                if not system_prompt:
-                    system_prompt = self.default_system_prompt
-            else:
-                system_prompt = self.default_system_prompt
+            system_prompt = self._api_system_prompt()
 
             # 构建API请求数据
             data = {
@@ -3685,7 +8090,7 @@ class CrawlerGUI:
                     {"role": "user", "content": prompt}
                 ],
                 "stream": False,
-                "max_tokens": self.api_params['max_tokens'].get(),
+                "max_tokens": max_tokens or self.api_params['max_tokens'].get(),
                 "temperature": self.api_params['temperature'].get(),
                 "top_p": self.api_params['top_p'].get(),
                 "frequency_penalty": self.api_params['frequency_penalty'].get()
@@ -3699,54 +8104,70 @@ class CrawlerGUI:
                 })
 
             # 显示处理提示
-            self.content_text.delete('1.0', tk.END)
-            self.content_text.insert(tk.END, f"正在使用 {provider} 的 {model} 模型处理文本...\n")
-            self.root.update()
+            self.show_status(f"正在使用 {provider} 的 {model} 模型处理文本...")
 
+            max_retries = self.api_params['max_retries'].get()
             async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{url}/chat/completions",
-                    headers=headers,
-                    json=data,
-                    timeout=aiohttp.ClientTimeout(total=300)
-                ) as response:
-                    if response.status != 200:
-                        error_data = await response.text()
-                        raise Exception(f"API请求失败: {response.status}\n{error_data}")
-
-                    result = await response.json()
-                    if 'choices' in result and result['choices']:
-                        content = result['choices'][0]['message']['content']
-                        
-                        # 清空处理提示
-                        self.content_text.delete('1.0', tk.END)
-                        
-                        # 显示优化后的内容
-                        self.content_text.insert(tk.END, "=== 优化结果 ===\n\n", "title")
-                        self.content_text.insert(tk.END, content)
-                        
-                        # 配置标题样式
-                        self.content_text.tag_configure("title", font=("Arial", 12, "bold"))
-                        
-                        return content
-                    else:
-                        raise Exception("API响应格式错误")
+                for attempt in range(max_retries + 1):
+                    async with session.post(
+                        f"{url}/chat/completions",
+                        headers=headers,
+                        json=data,
+                        timeout=aiohttp.ClientTimeout(total=300)
+                    ) as response:
+                        if response.status in (429, 500, 502, 503, 504) and attempt < max_retries:
+                            # 限流或服务暂时不可用，等待后重试
+                            LLM_RETRIES.inc(provider=provider)
+                            delay = self._retry_delay(response, attempt)
+                            logging.warning(f"API返回 {response.status}，{delay:.1f}秒后重试 "
+                                            f"({attempt + 1}/{max_retries})")
+                            await response.read()
+                        elif response.status != 200:
+                            error_data = await response.text()
+                            raise Exception(f"API请求失败: {response.status}\n{error_data}")
+                        else:
+                            result = await response.json()
+                            break
+                    await asyncio.sleep(delay)
+
+                if 'choices' in result and result['choices']:
+                    content = result['choices'][0]['message']['content']
+                    usage = result.get('usage') or {}
+                    LLM_TOKENS.inc(usage.get('prompt_tokens', 0), provider=provider, kind="prompt")
+                    LLM_TOKENS.inc(usage.get('completion_tokens', 0), provider=provider, kind="completion")
+                    LLM_REQUESTS.inc(provider=provider, status="ok")
+                    
+                    if interactive:
+                        # 在主线程中显示优化后的内容（较长的结果分页显示）
+                        self.root.after(0, lambda: self.content_view.set_text(f"=== 优化结果 ===\n\n{content}"))
+                    
+                    return content
+                else:
+                    raise Exception("API响应格式错误")
 
         except Exception as e:
+            LLM_REQUESTS.inc(provider=provider, status="error")
             error_msg = f"API处理失败: {str(e)}"
             logging.error(error_msg, exc_info=True)
             
-            # 显示错误信息
-            self.content_text.delete('1.0', tk.END)
-            self.content_text.insert(tk.END, error_msg + "\n", "error")
-            self.content_text.tag_configure("error", foreground="red")
-            
-            # 显示错误对话框
-            self.root.after(0, lambda: messagebox.showerror(
-                "API处理失败",
-                error_msg
-            ))
+            if interactive:
+                # 显示错误信息和错误对话框
+                self.show_status(error_msg)
+                self.root.after(0, lambda: messagebox.showerror(
+                    "API处理失败",
+                    error_msg
+                ))
             raise
+        finally:
+            INFLIGHT.dec(kind="llm")
+            LLM_SECONDS.observe(time.perf_counter() - started, provider=provider)
+
+    def _retry_delay(self, response, attempt, base=1.0, cap=60.0):
+        """计算重试前的等待时间：优先使用 Retry-After，否则指数退避并加随机抖动"""
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        if retry_after is not None:
+            return min(cap, retry_after)
+        return min(cap, base * 2 ** attempt) * random.uniform(0.5, 1.0)
 
     def toggle_system_prompt(self):
         """切换系统提示词编辑状态"""
@@ -3767,29 +8188,78 @@ class CrawlerGUI:
         else:
             self.system_prompt_text.configure(fg='black')
 
-    async def optimize_with_local_model(self, prompt, model_name):
-        """使用本地模型优化文本"""
+    def _get_local_llm(self, model_path, n_ctx=4096):
+        """获取常驻内存的本地模型，切换模型或需要更大上下文时才重新加载"""
+        from llama_cpp import Llama
+
+        cache_key = (str(model_path), n_ctx)
+        if (self._local_llm is not None and self._local_llm_key[0] == cache_key[0]
+                and self._local_llm_key[1] >= n_ctx):
+            return self._local_llm
+
+        # 切换模型时释放旧模型及其前缀状态
+        self._local_llm = None
+        self._local_llm_key = None
+        self._prompt_prefix_cache.clear()
+
+        # 先校验文件头，损坏的模型立即报错而不是在漫长的加载后失败
+        info = self.verify_model_file(model_path)
+        logging.info(f"加载本地模型: {model_path} (n_ctx={n_ctx}, {info['architecture']}, "
+                     f"{info['quantization']}, {info['parameter_count'] / 1e9:.1f}B 参数)")
+        self._local_llm = Llama(
+            model_path=str(model_path),
+            n_ctx=n_ctx,  # 上下文窗口大小
+            n_threads=max(1, os.cpu_count() // 2)  # 使用一半的CPU核心
+        )
+        self._local_llm_key = cache_key
+        return self._local_llm
+
+    def _local_chat_messages(self, prompt):
+        """构建本地模型的对话上下文"""
+        return [
+            {
+                "role": "system",
+                "content": "你是一个专业的文本优化助手，擅长提高文本的可读性、结构性和准确性。"
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+
+    def _restore_prompt_prefix(self, llm, prefix):
+        """恢复共享提示前缀的KV状态，使本次调用只需评估文本部分
+
+        首次遇到某个前缀时只评估前缀并保存状态；之后直接加载该状态，
+        llama-cpp 会与新提示的token比较最长公共前缀，跳过已评估的部分。
+        """
+        key = (self._local_llm_key, self._local_chat_messages(prefix)[0]['content'], prefix)
+        state = self._prompt_prefix_cache.get(key)
+        if state is not None:
+            llm.load_state(state)
+            logging.debug("命中提示前缀缓存，跳过前缀评估")
+            return
+
+        logging.info("评估共享提示前缀并缓存KV状态...")
+        llm.reset()
+        llm.create_chat_completion(
+            messages=self._local_chat_messages(prefix),
+            max_tokens=1,
+            temperature=0.0
+        )
+        state = llm.save_state()
+        self._prompt_prefix_cache.put(key, state)
+        logging.info(f"提示前缀状态已缓存: {llm.n_tokens} tokens, "
+                     f"{state.llama_state_size / 1024 / 1024:.1f} MB")
+
+    async def optimize_with_local_model(self, prompt, model_name, prefix=None, n_ctx=4096, max_tokens=None,
+                                        interactive=True):
+        """使用本地模型优化文本，interactive 为 False 时失败不弹出错误对话框"""
+        started = time.perf_counter()
+        INFLIGHT.inc(kind="llm")
         try:
-            from llama_cpp import Llama
-            
             # 获取模型路径
-            models_dir = Path("models")
-            model_paths = {
-                "chatglm3-6b": models_dir / "chatglm3-6b.Q4_K_M.gguf",
-                "llama-2-7b": models_dir / "llama-2-7b.Q4_K_M.gguf",
-                "qwen-7b": models_dir / "qwen-7b.Q4_K_M.gguf",
-                "yi-6b": models_dir / "yi-6b.Q4_K_M.gguf",
-                "mistral-7b": models_dir / "mistral-7b.Q4_K_M.gguf",
-                "neural-7b": models_dir / "neural-7b.Q4_K_M.gguf"
-            }
-            
-            # 规范化模型名称并获取模型路径
-            normalized_model_name = model_name.lower().replace('_', '-').split('.')[0]
-            model_path = next((path for key, path in model_paths.items() 
-                              if key in normalized_model_name), None)
-            
-            if not model_path or not model_path.exists():
-                raise FileNotFoundError(f"找不到模型文件: {model_path}")
+            model_path = self._resolve_local_model_path(model_name)
             
             # 显示进度
             self.root.after(0, lambda: (
@@ -3799,65 +8269,85 @@ class CrawlerGUI:
             ))
             
             def update_progress(percentage, message):
-                self.root.after(0, lambda: (
-                    self.progress_var.set(percentage),
-                    self.progress_label.config(text=message)
-                ))
+                self.publish_progress(percentage, message)
             
             update_progress(10, "加载模型中...")
             
-            # 初始化模型
-            llm = Llama(
-                model_path=str(model_path),
-                n_ctx=4096,  # 上下文窗口大小
-                n_threads=max(1, os.cpu_count() // 2)  # 使用一半的CPU核心
-            )
-            
-            update_progress(30, "模型加载完成，开始处理...")
+            loop = asyncio.get_running_loop()
+            token_queue = asyncio.Queue()
+            cancel_event = threading.Event()
             
-            # 构建对话上下文
-            messages = [
-                {
-                    "role": "system",
-                    "content": "你是一个专业的文本优化助手，擅长提高文本的可读性、结构性和准确性。"
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-            
-            # 生成回复
-            update_progress(50, "正在生成优化内容...")
+            def generate():
+                """在推理线程中加载模型并生成，流式输出通过队列送回事件循环"""
+                def emit(*item):
+                    loop.call_soon_threadsafe(token_queue.put_nowait, item)
+                
+                try:
+                    with self._local_llm_lock:
+                        # 初始化模型（已加载时直接复用）
+                        llm = self._get_local_llm(model_path, n_ctx)
+                        emit('progress', 30, "模型加载完成，开始处理...")
+                        
+                        # 复用共享前缀的KV状态
+                        if prefix and prompt.startswith(prefix):
+                            self._restore_prompt_prefix(llm, prefix)
+                        
+                        # 生成回复
+                        emit('progress', 50, "正在生成优化内容...")
+                        response = llm.create_chat_completion(
+                            messages=self._local_chat_messages(prompt),
+                            max_tokens=max_tokens,
+                            temperature=0.7,
+                            top_p=0.9,
+                            stream=True
+                        )
+                        
+                        if isinstance(response, dict):
+                            # 非流式响应
+                            emit('token', response['choices'][0]['message']['content'])
+                        else:
+                            # 流式响应
+                            for chunk in response:
+                                if cancel_event.is_set():
+                                    logging.info("本地生成已取消")
+                                    break
+                                if 'choices' in chunk and chunk['choices']:
+                                    if 'delta' in chunk['choices'][0]:
+                                        content = chunk['choices'][0]['delta'].get('content', '')
+                                        if content:
+                                            emit('token', content)
+                    emit('done', None)
+                except Exception as e:
+                    emit('error', e)
             
-            response = llm.create_chat_completion(
-                messages=messages,
-                max_tokens=4096,
-                temperature=0.7,
-                top_p=0.9,
-                stream=True
-            )
+            # 推理在专用线程中执行，事件循环上的下载、爬取等任务可以继续运行
+            generation = loop.run_in_executor(self._llm_executor, generate)
             
             # 收集流式输出
             optimized_text = []
             current_progress = 50
-            
-            if isinstance(response, dict):
-                # 非流式响应
-                optimized_text = [response['choices'][0]['message']['content']]
-            else:
-                # 流式响应
-                for chunk in response:
-                    if 'choices' in chunk and chunk['choices']:
-                        if 'delta' in chunk['choices'][0]:
-                            content = chunk['choices'][0]['delta'].get('content', '')
-                            if content:
-                                optimized_text.append(content)
-                                # 更新进度
-                                current_progress = min(95, current_progress + 1)
-                                update_progress(current_progress, "正在生成优化内容...")
+            try:
+                while True:
+                    kind, *payload = await token_queue.get()
+                    if kind == 'progress':
+                        update_progress(*payload)
+                    elif kind == 'token':
+                        optimized_text.append(payload[0])
+                        # 更新进度
+                        current_progress = min(95, current_progress + 1)
+                        update_progress(current_progress, "正在生成优化内容...")
+                    elif kind == 'error':
+                        raise payload[0]
+                    else:
+                        break
+            finally:
+                # 调用方被取消或出错时通知推理线程停止生成
+                cancel_event.set()
+                await asyncio.shield(generation)
             
             result = ''.join(optimized_text)
+            # 流式输出每个分片约为一个token
+            LLM_TOKENS.inc(len(optimized_text), provider="local", kind="completion")
             
             update_progress(100, "优化完成!")
             self.root.after(3000, lambda: self.progress_frame.pack_forget())
@@ -3866,15 +8356,21 @@ class CrawlerGUI:
             if not result or result.strip() == prompt.strip():
                 raise ValueError("模型未能有效优化文本")
             
+            LLM_REQUESTS.inc(provider="local", status="ok")
             return result
             
         except Exception as e:
+            LLM_REQUESTS.inc(provider="local", status="error")
             logging.error(f"本地模型处理失败: {e}", exc_info=True)
-            self.root.after(0, lambda: messagebox.showerror(
-                "优化失败",
-                f"文本优化过程中发生错误：\n{str(e)}"
-            ))
+            if interactive:
+                self.root.after(0, lambda: messagebox.showerror(
+                    "优化失败",
+                    f"文本优化过程中发生错误：\n{str(e)}"
+                ))
             raise
+        finally:
+            INFLIGHT.dec(kind="llm")
+            LLM_SECONDS.observe(time.perf_counter() - started, provider="local")
 
     def toggle_api_key_visibility(self):
         """切换 API Key 的显示/隐藏状态"""
@@ -3916,6 +8412,16 @@ class CrawlerGUI:
 
 
 if __name__ == "__main__":
+    if "--worker" in sys.argv[1:]:
+        sys.exit(run_queue_worker(sys.argv[1:]))
     root = tk.Tk()
     app = CrawlerGUI(root)
-    root.mainloop()
\ No newline at end of file
+    try:
+        root.mainloop()
+    finally:
+        if app.metrics_server:
+            app.metrics_server.stop()
+
+    # 关闭窗口时一并停止本地推理服务
+    if app._llm_server_process and app._llm_server_process.poll() is None:
+        app._llm_server_process.terminate()
\ No newline at end of file